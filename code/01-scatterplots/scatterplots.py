@@ -1,76 +1,91 @@
 """
 Demonstrate bar chart visualizations with Matplotlib, Seaborn, and Plotly
 """
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
-from scipy import stats
-import plotly.io as pio
-pio.renderers.default = "browser"
-mpg = sns.load_dataset('mpg')
-plt.style.use('default')
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pyviz.datasets import load_dataset
+from pyviz.render import show
+from pyviz.scatter import DENSITY_POINTS, add_density_image, add_grouped_scatter, mpl_density_scatter, \
+    mpl_grouped_scatter
+
+
+def load_data() -> dict:
+    return {'mpg': load_dataset('mpg')}
 
 
 # matplotlib scatterplot with color by origin
-usa = mpg[mpg['origin'] == 'usa']
-japan = mpg[mpg['origin'] == 'japan']
-europe = mpg[mpg['origin'] == 'europe']
-plt.scatter(usa['mpg'], usa['acceleration'],
-            label="USA", color='b')
-plt.scatter(japan['mpg'], japan['acceleration'],
-            label="Japan", color='r')
-plt.scatter(europe['mpg'], europe['acceleration'],
-            label="Europe", color='k')
-plt.xlabel('MPG')
-plt.ylabel('Acceleration (0-60 time)')
-plt.title('Acceleration (0-60 time) vs MPG')
-plt.legend()
-plt.show()
+def mpl_scatter(mpg, single_trace=False):
+    import matplotlib.pyplot as plt
+    fig = plt.figure()
+    mpl_grouped_scatter(plt.gca(), mpg['mpg'], mpg['acceleration'], mpg['origin'],
+                        colors={'usa': 'b', 'japan': 'r', 'europe': 'k'},
+                        labels={'usa': "USA", 'japan': "Japan", 'europe': "Europe"},
+                        single_trace=single_trace)
+    plt.xlabel('MPG')
+    plt.ylabel('Acceleration (0-60 time)')
+    plt.title('Acceleration (0-60 time) vs MPG')
+    plt.legend()
+    return fig
+
 
 # seaborn scatterplot with origin/marker with color
-sns.scatterplot(data=mpg, x='mpg', y='acceleration', hue='origin',
-                style='origin', palette='deep')
-plt.xlabel('MPG')
-plt.ylabel('Acceleration (0-60 time)')
-plt.title('Acceleration (0-60 time) vs MPG')
-plt.show()
+def sns_scatter(mpg):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    if len(mpg) > DENSITY_POINTS:
+        palette = sns.color_palette('deep')
+        mpl_density_scatter(plt.gca(), mpg['mpg'], mpg['acceleration'], mpg['origin'],
+                            colors={'usa': palette[0], 'japan': palette[1], 'europe': palette[2]})
+        plt.legend(title='origin')
+    else:
+        sns.scatterplot(data=mpg, x='mpg', y='acceleration', hue='origin',
+                        style='origin', palette='deep')
+    plt.xlabel('MPG')
+    plt.ylabel('Acceleration (0-60 time)')
+    plt.title('Acceleration (0-60 time) vs MPG')
+    return fig
 
 
 # plotly express with different color and size options
-fig = px.scatter(mpg, x='mpg', y='acceleration', color='origin',
-                 hover_data=['name', 'model_year', 'cylinders'],
-                 title="Acceleration (0-60 time) vs MPG",
-                 labels={"mpg": "MPG", 
-                         "acceleration": "Acceleration (0-60) time"})
-fig.show()
+def px_scatter(mpg):
+    import plotly.express as px
+    if len(mpg) > DENSITY_POINTS:
+        import plotly.graph_objects as go
+        fig = add_density_image(go.Figure(), mpg['mpg'], mpg['acceleration'], mpg['origin'])
+        fig.update_layout(title="Acceleration (0-60 time) vs MPG", xaxis_title="MPG",
+                          yaxis_title="Acceleration (0-60) time", legend_title="origin")
+        return fig
+    fig = px.scatter(mpg, x='mpg', y='acceleration', color='origin',
+                     hover_data=['name', 'model_year', 'cylinders'],
+                     title="Acceleration (0-60 time) vs MPG",
+                     labels={"mpg": "MPG",
+                             "acceleration": "Acceleration (0-60) time"})
+    return fig
 
 
 # Plotly GO scatter with different markers
-usa = mpg[mpg['origin'] == 'usa']
-japan = mpg[mpg['origin'] == 'japan']
-europe = mpg[mpg['origin'] == 'europe']
+def go_scatter(mpg, single_trace=False):
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    add_grouped_scatter(fig, mpg['mpg'], mpg['acceleration'], mpg['origin'],
+                        colors={'usa': 'blue', 'japan': 'red', 'europe': 'green'},
+                        single_trace=single_trace,
+                        hovertemplate="MPG: %{x}<br>Acceleration: %{y}")
+    fig.update_layout(title="Acceleration (0-60 time) vs MPG",
+                      xaxis_title="MPG",
+                      yaxis_title="Acceleration (0-60) time")
+    return fig
+
+
+FIGURES = [mpl_scatter, sns_scatter, px_scatter, go_scatter]
 
-fig = go.Figure(data=go.Scatter(x=usa['mpg'],
-                                y=usa['acceleration'],
-                                mode='markers',
-                                marker={'color': 'blue'},
-                                name="usa",
-                                hovertemplate="MPG: %{x}<br>Acceleration: %{y}"))
-fig.add_trace(go.Scatter(x=japan['mpg'],
-                         y=japan['acceleration'],
-                         mode='markers',
-                         marker={'color': 'red'},
-                         name="japan",
-                         hovertemplate="MPG: %{x}<br>Acceleration: %{y}"))
-fig.add_trace(go.Scatter(x=europe['mpg'],
-                         y=europe['acceleration'],
-                         mode='markers',
-                         marker={'color': 'green'},
-                         name="europe",
-                         hovertemplate="MPG: %{x}<br>Acceleration: %{y}"))
-fig.update_layout(title="Acceleration (0-60 time) vs MPG",
-                  xaxis_title="MPG",
-                  yaxis_title="Acceleration (0-60) time")
-fig.show()
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+    import plotly.io as pio
+    plt.style.use('default')
+    pio.renderers.default = "browser"
+    data = load_data()
+    for make_figure in FIGURES:
+        show(make_figure(**data))
@@ -1,65 +1,100 @@
 """
 Demonstrate basic visualizations with Matplotlib, Seaborn, and Plotly
 """
-import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.io as pio
-pio.renderers.default = "browser"
-flights = sns.load_dataset("flights")
-plt.style.use('default')
-
-def create_date(row):
-        return datetime.datetime.strptime('{} {}'.format(row['month'], row['year']), '%b %Y').date()
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pyviz.datasets import load_dataset
+from pyviz.downsample import downsample_frame, resample_on_zoom
+from pyviz.render import show
+from pyviz.transforms import add_month_year_dates
+
+
+def load_data() -> dict:
+    return {'flights': load_dataset('flights')}
+
+
+def prepare(flights) -> dict:
+    return {'flights': add_month_year_dates(flights)}
+
 
 # Matplotlib linestyles
-one = flights[flights['year'] == 1956]
-two = flights[flights['year'] == 1957]
-three = flights[flights['year'] == 1958]
-four = flights[flights['year'] == 1959]
-plt.plot(one['month'], one['passengers'], 'k-', label="1956")
-plt.plot(two['month'], two['passengers'], 'b:', label="1957")
-plt.plot(three['month'], three['passengers'], 'g--', label="1958")
-plt.plot(four['month'], four['passengers'], 'r-.', label="1959")
-plt.xlabel('Month')
-plt.ylabel('Passengers')
-plt.title('Flights')
-plt.legend()
-plt.show()
-   
+def mpl_linestyles(flights):
+    import matplotlib.pyplot as plt
+    one = flights[flights['year'] == 1956]
+    two = flights[flights['year'] == 1957]
+    three = flights[flights['year'] == 1958]
+    four = flights[flights['year'] == 1959]
+    fig = plt.figure()
+    plt.plot(one['month'], one['passengers'], 'k-', label="1956")
+    plt.plot(two['month'], two['passengers'], 'b:', label="1957")
+    plt.plot(three['month'], three['passengers'], 'g--', label="1958")
+    plt.plot(four['month'], four['passengers'], 'r-.', label="1959")
+    plt.xlabel('Month')
+    plt.ylabel('Passengers')
+    plt.title('Flights')
+    plt.legend()
+    return fig
+
+
 # Seaborn with fixed dates
-flights['date'] = flights.apply(create_date, axis=1)
-sns.lineplot(data=flights, x='date', y='passengers')
-plt.title('Flights')
-plt.show()
-    
+# downsample='lttb' or 'minmax' draws only the points the chart has room for
+def sns_dates(flights, downsample=None):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    if downsample:
+        flights = downsample_frame(flights, 'date', 'passengers', downsample)
+    fig = plt.figure()
+    sns.lineplot(data=flights, x='date', y='passengers')
+    plt.title('Flights')
+    return fig
+
+
 # Plotly Express with corrected dates
-flights['date'] = flights.apply(create_date, axis=1)
-fig = px.line(flights, x='date', y='passengers',
-              title="Flights")
-fig.show()
-    
-    
+def px_dates(flights, downsample=None):
+    import plotly.express as px
+    points = flights
+    if downsample:
+        points = downsample_frame(flights, 'date', 'passengers', downsample)
+    fig = px.line(points, x='date', y='passengers',
+                  title="Flights")
+    if downsample:
+        fig = resample_on_zoom(fig, [(flights['date'], flights['passengers'])], downsample)
+    return fig
+
+
 # Plotly Graph Objects
-year1952 = flights[flights['year'] == 1952]
-year1955 = flights[flights['year'] == 1955]
-
-fig = go.Figure()
-fig.add_trace(go.Scatter(x=year1952['month'],
-                         y=year1952['passengers'],
-                         mode='lines',
-                         line={'color': '#2882BD',
-                               'width': 2},
-                         name="1952"))
-fig.add_trace(go.Scatter(x=year1955['month'],
-                         y=year1955['passengers'],
-                         mode='lines',
-                         line={'color': '#434343',
-                               'width': 2},
-                         name="1955"))
-fig.update_layout(title='Flights',
-                  xaxis_title="Month",
-                  yaxis_title="Passengers")
-fig.show()
+def go_lines(flights):
+    import plotly.graph_objects as go
+    year1952 = flights[flights['year'] == 1952]
+    year1955 = flights[flights['year'] == 1955]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=year1952['month'],
+                             y=year1952['passengers'],
+                             mode='lines',
+                             line={'color': '#2882BD',
+                                   'width': 2},
+                             name="1952"))
+    fig.add_trace(go.Scatter(x=year1955['month'],
+                             y=year1955['passengers'],
+                             mode='lines',
+                             line={'color': '#434343',
+                                   'width': 2},
+                             name="1955"))
+    fig.update_layout(title='Flights',
+                      xaxis_title="Month",
+                      yaxis_title="Passengers")
+    return fig
+
+
+FIGURES = [mpl_linestyles, sns_dates, px_dates, go_lines]
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+    import plotly.io as pio
+    plt.style.use('default')
+    pio.renderers.default = "browser"
+    data = prepare(**load_data())
+    for make_figure in FIGURES:
+        show(make_figure(**data))
@@ -1,42 +1,81 @@
 """
 Make histogram charts with Matplotlib, Seaborn, and Plotly
 """
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.io as pio
-pio.renderers.default = "browser"
-tips = sns.load_dataset('tips')
-plt.style.use('default')
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pyviz.datasets import load_dataset
+from pyviz.histogram import Histogram, go_bars, mpl_bars, px_bars
+from pyviz.kde import FFT_POINTS, mpl_hue_kde
+from pyviz.render import show
+
+
+def load_data() -> dict:
+    return {'tips': load_dataset('tips')}
+
+
+def prepare(tips) -> dict:
+    # bin the column once; the charts only ever see the 20 counts
+    return {'tips': tips, 'total_bill': Histogram.from_values(tips['total_bill'], bins=20)}
 
 
 # Matplotlib
-plt.hist(tips['total_bill'], bins=20)
-plt.xlabel('Total Bill')
-plt.ylabel('Number of Bills')
-plt.title('Tips Total Bill Histogram')
-plt.show()
+def mpl_histogram(tips, total_bill):
+    import matplotlib.pyplot as plt
+    fig = plt.figure()
+    mpl_bars(plt.gca(), total_bill)
+    plt.xlabel('Total Bill')
+    plt.ylabel('Number of Bills')
+    plt.title('Tips Total Bill Histogram')
+    return fig
+
 
 # Seaborn multiple probability function histograms
-sns.displot(tips, x='total_bill', hue="sex",
-            multiple="stack",
-            kind="kde", fill=True)
-plt.xlabel('Total Bill')
-plt.ylabel('Probability')
-plt.show()
+def sns_kde(tips, total_bill):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    if len(tips) > FFT_POINTS:
+        # binned FFT KDE: the same curves, without evaluating every point at every grid step
+        fig = plt.figure()
+        mpl_hue_kde(plt.gca(), tips['total_bill'], tips['sex'], multiple="stack", fill=True)
+        plt.legend(title='sex')
+        plt.xlabel('Total Bill')
+        plt.ylabel('Probability')
+        return fig
+    grid = sns.displot(tips, x='total_bill', hue="sex",
+                       multiple="stack",
+                       kind="kde", fill=True)
+    plt.xlabel('Total Bill')
+    plt.ylabel('Probability')
+    return grid.figure
 
 
 # Plotly Express histogram
-fig = px.histogram(tips, x='total_bill', nbins=20)
-fig.update_layout(title='Tips Total Bill Histogram',
-                  xaxis_title="Total Bill",
-                  yaxis_title="Count")
-fig.show()
- 
+def px_histogram(tips, total_bill):
+    fig = px_bars(total_bill)
+    fig.update_layout(title='Tips Total Bill Histogram',
+                      xaxis_title="Total Bill",
+                      yaxis_title="Count")
+    return fig
+
+
 # Plotly Graph Objects histogram
-fig = go.Figure(data=[go.Histogram(x=tips['total_bill'])])
-fig.update_layout(title='Tips Total Bill Histogram',
-                  xaxis_title="Total Bill",
-                  yaxis_title="Count")
-fig.show()
+def go_histogram(tips, total_bill):
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[go_bars(total_bill)])
+    fig.update_layout(bargap=0, title='Tips Total Bill Histogram',
+                      xaxis_title="Total Bill",
+                      yaxis_title="Count")
+    return fig
+
+
+FIGURES = [mpl_histogram, sns_kde, px_histogram, go_histogram]
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+    import plotly.io as pio
+    plt.style.use('default')
+    pio.renderers.default = "browser"
+    data = prepare(**load_data())
+    for make_figure in FIGURES:
+        show(make_figure(**data))
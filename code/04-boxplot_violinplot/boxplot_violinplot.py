@@ -2,100 +2,190 @@
 Learn how to make boxplots with Matplotlib, Seaborn, and Plotly
 https://catalog.data.gov/dataset/sat-results-e88d7
 """
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-import plotly.io as pio
-pio.renderers.default = "browser"
-df = pd.read_csv('https://raw.githubusercontent.com/alexkenan/pyviz/main/datasets/sat.csv')
-df.dropna(inplace=True)
-del df['Number of Test Takers']
-df.rename(columns={'Critical Reading Mean': 'Reading',
-                   'Mathematics Mean': 'Math',
-                   'Writing Mean': 'Writing'},
-          inplace=True)
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pyviz.datasets import load_dataset
+from pyviz.quantiles import SKETCH_ROWS, box_stats, go_box_traces, go_violin_traces, sketch_frame, violin_stats
+from pyviz.render import show
+from pyviz.swarm import SWARM_POINTS, go_swarm_traces, mpl_swarm
+
+
+def load_data() -> dict:
+    return {'df': load_dataset('sat')}
+
+
+def prepare(df) -> dict:
+    df.dropna(inplace=True)
+    del df['Number of Test Takers']
+    df.rename(columns={'Critical Reading Mean': 'Reading',
+                       'Mathematics Mean': 'Math',
+                       'Writing Mean': 'Writing'},
+              inplace=True)
+    # one pass over the scores; the box and violin statistics all come from these sketches
+    return {'df': df, 'scores': sketch_frame(df, ['Reading', 'Math', 'Writing'])}
 
 
 # Matplotlib boxplot with customized parameters
-data = [df['Reading'],
-        df['Math'],
-        df['Writing']]
-plt.boxplot(data, notch=True, sym='+', whis=3.5)
-plt.xticks(ticks=[1, 2, 3], labels=['Reading','Math', 'Writing'])
-plt.title('Boxplots for NY SAT Testing')
-plt.ylabel('Score')
-plt.show()
-'''
+def mpl_boxplot(df, scores):
+    import matplotlib.pyplot as plt
+    stats = [box_stats(scores[column], whis=3.5, label=column)
+             for column in ['Reading', 'Math', 'Writing']]
+    fig = plt.figure()
+    plt.gca().bxp(stats, shownotches=True, flierprops={'marker': '+'})
+    plt.xticks(ticks=[1, 2, 3], labels=['Reading','Math', 'Writing'])
+    plt.title('Boxplots for NY SAT Testing')
+    plt.ylabel('Score')
+    return fig
+
+
 # Matplotlib violinplot with custom parameters
-data = [df['Reading'],
-        df['Math'],
-        df['Writing']]
-plt.violinplot(data, vert=True, showmedians=True,
-               quantiles=[[0.25, 0.75], [0.25, 0.75],
-                         [0.25, 0.75]],
-               showextrema=False)
-plt.xticks(ticks=[1, 2, 3], labels=['Reading','Math', 'Writing'])
-plt.title('Violinplot for NY SAT Testing')
-plt.ylabel('Score')
-plt.show()
+def mpl_violinplot(df, scores):
+    import matplotlib.pyplot as plt
+    stats = [violin_stats(scores[column], quantiles=[0.25, 0.75])
+             for column in ['Reading', 'Math', 'Writing']]
+    fig = plt.figure()
+    plt.gca().violin(stats, showmedians=True, showextrema=False)
+    plt.xticks(ticks=[1, 2, 3], labels=['Reading','Math', 'Writing'])
+    plt.title('Violinplot for NY SAT Testing')
+    plt.ylabel('Score')
+    return fig
+
 
 # Seaborn boxplot
-sns.boxplot(data=df, orient='v', palette="Set2", 
-            width=0.25)
-plt.ylabel('Score')
-plt.title('Boxplots for NY SAT Testing')
-plt.show()
+def sns_boxplot(df, scores):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.boxplot(data=df, orient='v', palette="Set2",
+                width=0.25)
+    plt.ylabel('Score')
+    plt.title('Boxplots for NY SAT Testing')
+    return fig
+
 
 # Seaborn violinplot
-sns.violinplot(data=df, orient='v', palette='Set2',
-               width=0.25)
-plt.title('Violinplot for NY SAT Testing')
-plt.ylabel('Score')
-plt.xticks(ticks=[0, 1, 2],
-           labels=['Reading','Math', 'Writing'])
-plt.show()
+def sns_violinplot(df, scores):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    sns.violinplot(data=df, orient='v', palette='Set2',
+                   width=0.25)
+    plt.title('Violinplot for NY SAT Testing')
+    plt.ylabel('Score')
+    plt.xticks(ticks=[0, 1, 2],
+               labels=['Reading','Math', 'Writing'])
+    return fig
+
 
 # Seaborn swarmplot
-sns.swarmplot(data=df, orient='v', palette="Set2", size=3)
-plt.plot([-0.33, 0.33], [df['Reading'].median(),
-                         df['Reading'].median()],
-         'k-')
-plt.plot([0.67, 1.33], [df['Math'].mean(),
-                        df['Math'].mean()],
-         'k-')
-plt.plot([1.67, 2.33], [df['Writing'].mean(),
-                        df['Writing'].mean()],
-         'k-')
-plt.ylabel('Score')
-plt.title('Swarmplot for NY SAT Testing')
-plt.show()
+def sns_swarmplot(df, scores):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure()
+    if 3 * len(df) > SWARM_POINTS:
+        # seaborn's placement slows to a crawl and gives up on dense swarms
+        mpl_swarm(plt.gca(), {column: df[column] for column in ['Reading', 'Math', 'Writing']},
+                  size=3, colors=sns.color_palette("Set2"))
+    else:
+        sns.swarmplot(data=df, orient='v', palette="Set2", size=3)
+    plt.plot([-0.33, 0.33], [df['Reading'].median(),
+                             df['Reading'].median()],
+             'k-')
+    plt.plot([0.67, 1.33], [df['Math'].mean(),
+                            df['Math'].mean()],
+             'k-')
+    plt.plot([1.67, 2.33], [df['Writing'].mean(),
+                            df['Writing'].mean()],
+             'k-')
+    plt.ylabel('Score')
+    plt.title('Swarmplot for NY SAT Testing')
+    return fig
+
+
+# Plotly swarmplot
+def go_swarmplot(df, scores):
+    import plotly.graph_objects as go
+    columns = ['Reading', 'Math', 'Writing']
+    fig = go.Figure(go_swarm_traces({column: df[column] for column in columns}, size=4))
+    fig.update_layout(title='Swarmplot for NY SAT Testing', yaxis_title='Score',
+                      xaxis={'tickvals': list(range(len(columns))), 'ticktext': columns},
+                      width=800, height=550, margin={'l': 50, 'r': 50, 't': 50, 'b': 50}, showlegend=False)
+    return fig
 
 
 # Plotly Express box plot customized
-fig = px.box(df, y=["Reading", 'Math', 'Writing'],
-             notched=True, 
-             color=["Reading", 'Math', 'Writing'],
-             labels={'variable': "", "value": 'Score'},
-             title='Boxplots for NY SAT Testing',
-             hover_data=['School Name'])
-fig.update_traces(quartilemethod="inclusive")
-fig.show()
+def px_boxplot(df, scores):
+    import plotly.express as px
+    if len(df) > SKETCH_ROWS:
+        # precomputed quartiles, fences and notches instead of every score
+        import plotly.graph_objects as go
+        stats = [box_stats(scores[column], label=column) for column in ['Reading', 'Math', 'Writing']]
+        fig = go.Figure(go_box_traces(stats, notched=True))
+        fig.update_layout(title='Boxplots for NY SAT Testing', yaxis_title='Score')
+        return fig
+    # long form, one row per school and subject, so each subject gets its own color
+    scores_long = df.melt(id_vars=['School Name'], value_vars=['Reading', 'Math', 'Writing'],
+                          var_name='Subject', value_name='Score')
+    fig = px.box(scores_long, x='Subject', y='Score',
+                 notched=True,
+                 color='Subject',
+                 labels={'Subject': ""},
+                 title='Boxplots for NY SAT Testing',
+                 hover_data=['School Name'])
+    fig.update_traces(quartilemethod="inclusive")
+    return fig
+
+
+def go_violins(scores: dict, boxes: bool, title: str):
+    """
+    Plotly violins drawn from the score sketches, for data too big to send to the browser
+    :param scores: dict of column name to QuantileSketch
+    :param boxes: bool draw the quartile box and the outliers (in red) inside each violin
+    :param title: str chart title
+    :return: plotly Figure
+    """
+    import plotly.graph_objects as go
+    columns = ['Reading', 'Math', 'Writing']
+    violins = [violin_stats(scores[column]) for column in columns]
+    inner = [box_stats(scores[column]) for column in columns] if boxes else None
+    fig = go.Figure(go_violin_traces(violins, columns, inner, outliercolor='red'))
+    fig.update_layout(title=title, yaxis_title='Score',
+                      xaxis={'tickvals': list(range(len(columns))), 'ticktext': columns})
+    return fig
+
 
 # Plotly Express violinplot
-fig = px.violin(df, y=['Reading', 'Math', 'Writing'],
-                title="New York School System SAT Scores",
-                points=False,
-                labels={'variable': "", 'value': 'Score'})
-fig.show()
-    
+def px_violinplot(df, scores):
+    import plotly.express as px
+    if len(df) > SKETCH_ROWS:
+        return go_violins(scores, boxes=False, title="New York School System SAT Scores")
+    fig = px.violin(df, y=['Reading', 'Math', 'Writing'],
+                    title="New York School System SAT Scores",
+                    points=False,
+                    labels={'variable': "", 'value': 'Score'})
+    return fig
+
 
 # Plotly express more advanced swarmplot and violinplot
-fig = px.violin(df, y=['Reading', 'Math', 'Writing'],
-                points="suspectedoutliers", 
-                labels={'variable': "", 'value': 'Score'},
-                title="New York School System SAT Scores")
-fig.update_traces(marker={'outliercolor': 'red'})
-fig.show()
-'''
+def px_violin_outliers(df, scores):
+    import plotly.express as px
+    if len(df) > SKETCH_ROWS:
+        return go_violins(scores, boxes=True, title="New York School System SAT Scores")
+    fig = px.violin(df, y=['Reading', 'Math', 'Writing'],
+                    points="suspectedoutliers",
+                    labels={'variable': "", 'value': 'Score'},
+                    title="New York School System SAT Scores")
+    fig.update_traces(marker={'outliercolor': 'red'})
+    return fig
+
+
+FIGURES = [mpl_boxplot, mpl_violinplot, sns_boxplot, sns_violinplot, sns_swarmplot, go_swarmplot,
+           px_boxplot, px_violinplot, px_violin_outliers]
+
+if __name__ == '__main__':
+    import plotly.io as pio
+    pio.renderers.default = "browser"
+    data = prepare(**load_data())
+    for make_figure in FIGURES:
+        show(make_figure(**data))
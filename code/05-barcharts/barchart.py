@@ -1,138 +1,148 @@
 """
 Demonstrate bar chart visualizations with Matplotlib, Seaborn, and Plotly
 """
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.io as pio
-pio.renderers.default = "browser"
-mpg = sns.load_dataset('mpg')
-
-
-def h_autolabel(rects, axis) -> None:
-    """
-    Write data labels to the right of bars in horizontal bar charts
-    :param rects: The result of calling ax.barh(), a BarContainer that is list-like
-    :param axis: Typically the "ax" figure used to plot.
-    :return: None
-    """
-    for position, rect in enumerate(rects):
-        x = rect.get_width()
-        y = position
-        axis.annotate('{}'.format(x),
-                      xy=(x, y + 0.5),
-                      xytext=(9, 0),
-                      textcoords="offset points",
-                      ha='center', va='bottom', size=7)
-
-def v_autolabel(rects, axis) -> None:
-    """
-    Write data labels to the right of bars in horizontal bar charts
-    :param rects: The result of calling ax.bar(), a BarContainer that is list-like
-    :param axis: Typically the "ax" figure used to plot.
-    :return: None
-    """
-    for rect in rects:
-        height = rect.get_height()
-        axis.annotate('{}'.format(int(round(height, 0))),
-                      xy=(rect.get_x() + rect.get_width() / 2, height),
-                      xytext=(0, 3),
-                      textcoords="offset points",
-                      ha='center', va='bottom', size=7)
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pyviz.bars import bar_table, go_grouped_bars, mpl_grouped_bars
+from pyviz.datasets import load_dataset
+from pyviz.labels import go_bar_labels, mpl_bar_labels
+from pyviz.render import show
+
+
+def load_data() -> dict:
+    return {'mpg': load_dataset('mpg')}
+
+
+def prepare(mpg) -> dict:
+    # average mpg for every model year and origin, shared by the grouped bar charts
+    return {'mpg': mpg,
+            'mpg_by_origin': bar_table(mpg, 'model_year', 'origin', 'mpg',
+                                       groups=['usa', 'japan', 'europe'])}
 
 
 # matplotlib basic bar chart
-pinto = mpg[mpg['name'] == 'ford pinto']
-plt.bar(pinto['model_year'], pinto['mpg'])
-plt.xlabel('Model Year')
-plt.ylabel('MPG')
-plt.title('Ford Pinto MPG vs Model Year')
-plt.show()
+def mpl_bar(mpg, mpg_by_origin):
+    import matplotlib.pyplot as plt
+    pinto = mpg[mpg['name'] == 'ford pinto']
+    fig = plt.figure()
+    plt.bar(pinto['model_year'], pinto['mpg'])
+    plt.xlabel('Model Year')
+    plt.ylabel('MPG')
+    plt.title('Ford Pinto MPG vs Model Year')
+    return fig
+
 
 # matplotlib basic horizontal bar chart
-year1976 = mpg[mpg['model_year'] == 76]
-year1976 = year1976.iloc[0:5]
-year1976.sort_values(by='mpg', ascending=True,
-                     inplace=True)
-plt.barh(year1976['name'], year1976['mpg'])
-plt.xlabel('MPG')
-plt.title('Select Model Year 1976 Cars vs MPG')
-plt.show()
+def mpl_barh(mpg, mpg_by_origin):
+    import matplotlib.pyplot as plt
+    year1976 = mpg[mpg['model_year'] == 76]
+    year1976 = year1976.iloc[0:5]
+    year1976.sort_values(by='mpg', ascending=True,
+                         inplace=True)
+    fig = plt.figure()
+    plt.barh(year1976['name'], year1976['mpg'])
+    plt.xlabel('MPG')
+    plt.title('Select Model Year 1976 Cars vs MPG')
+    return fig
+
 
 # Matplotlib grouped bar chart with label at end
 # if you want to avoid the default colors, you can pass your own argument
-fig, ax = plt.subplots()
-bar_width = 0.3
-mpg_usa = mpg[mpg['origin'] == 'usa'].groupby('model_year')['mpg'].mean().reset_index()
-mpg_usa['model_year'] = mpg_usa['model_year'] - bar_width
-mpg_japan = mpg[mpg['origin'] == 'japan'].groupby('model_year')['mpg'].mean().reset_index()
-mpg_europe = mpg[mpg['origin'] == 'europe'].groupby('model_year')['mpg'].mean().reset_index()
-mpg_europe['model_year'] = mpg_europe['model_year'] + bar_width
-usa = ax.bar(mpg_usa['model_year'], mpg_usa['mpg'],
-             label="USA", width=bar_width)
-japan = ax.bar(mpg_japan['model_year'], mpg_japan['mpg'],
-               label="Japan", width=bar_width)
-europe = ax.bar(mpg_europe['model_year'], mpg_europe['mpg'],
-                label="Europe", width=bar_width)
-ax.set_ylabel("Average MPG")
-ax.set_title("Average MPG by model year and origin")
-ax.legend()
-ax.set_xticks(mpg_japan['model_year'])
-v_autolabel(usa, ax)
-v_autolabel(japan, ax)
-v_autolabel(europe, ax)
-plt.show()
+def mpl_grouped_bar(mpg, mpg_by_origin):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots()
+    bars = mpl_grouped_bars(ax, mpg_by_origin, width=0.3,
+                            labels={'usa': "USA", 'japan': "Japan", 'europe': "Europe"})
+    ax.set_ylabel("Average MPG")
+    ax.set_title("Average MPG by model year and origin")
+    ax.legend()
+    ax.set_xticks(mpg_by_origin.index)
+    for group in bars:
+        mpl_bar_labels(ax, group)
+    return fig
+
+
+# Plotly grouped bar chart from the same averages
+def go_grouped_bar(mpg, mpg_by_origin):
+    import plotly.graph_objects as go
+    fig = go.Figure(go_grouped_bars(mpg_by_origin, names={'usa': "USA", 'japan': "Japan",
+                                                          'europe': "Europe"}))
+    fig.update_layout(barmode='group', title="Average MPG by model year and origin",
+                      xaxis_title="Model Year", yaxis_title="Average MPG")
+    go_bar_labels(fig, fmt='.0f', size=9)
+    return fig
+
 
 # Plotly Express bar chart with corrected data
-pinto = mpg[mpg['name'] == 'ford pinto']
-pinto = pinto[pinto['cylinders'] == 4]
-fig = px.bar(pinto, x='model_year', y='mpg')
-fig.update_layout(title='Ford Pinto MPG vs Model Year',
-                  xaxis_title="Model Year",
-                  yaxis_title="MPG")
-fig.show()
+def px_bar(mpg, mpg_by_origin):
+    import plotly.express as px
+    pinto = mpg[mpg['name'] == 'ford pinto']
+    pinto = pinto[pinto['cylinders'] == 4]
+    fig = px.bar(pinto, x='model_year', y='mpg')
+    fig.update_layout(title='Ford Pinto MPG vs Model Year',
+                      xaxis_title="Model Year",
+                      yaxis_title="MPG")
+    return fig
+
 
 # Plotly Express bar chart with direct labeling
-hornet = mpg[mpg['name'] == 'amc hornet']
-fig = px.bar(hornet, x='model_year', y='mpg',
-             text=hornet['mpg'])
-fig.update_layout(title='AMC Hornet Model Year and MPG',
-                  xaxis_title="Model Year",
-                  yaxis_title="MPG")
-fig.update_traces(textposition='outside')
-fig.show()
+def px_labeled_bar(mpg, mpg_by_origin):
+    import plotly.express as px
+    hornet = mpg[mpg['name'] == 'amc hornet']
+    fig = px.bar(hornet, x='model_year', y='mpg')
+    fig.update_layout(title='AMC Hornet Model Year and MPG',
+                      xaxis_title="Model Year",
+                      yaxis_title="MPG")
+    go_bar_labels(fig)
+    return fig
+
 
 # Advanced stacked bar chart
-crashes = sns.load_dataset('car_crashes').sort_values(by='total', ascending=True)
-# needed to reduce overlap of text
-plt.figure(figsize=(12.0, 8.0))
-plt.subplot(1, 2, 1)
-sns.set_color_codes('pastel')
-sns.barplot(data=crashes, x='total', y='abbrev',
-            color='b', label='Total')
-
-sns.set_color_codes('dark')
-sns.barplot(data=crashes, x='speeding', y='abbrev',
-            color='b', label='Speeding-involved')
-plt.legend()
-plt.xlabel('Car crashes per 1 billion miles')
-plt.ylabel('State')
-plt.title('Speeding involvement in car crashes per billion miles')
-
-plt.subplot(1, 2, 2)
-sns.set_color_codes('pastel')
-sns.barplot(data=crashes, x='total', y='abbrev',
-            color='b', label='Total')
-
-sns.set_color_codes('colorblind')
-sns.barplot(data=crashes, x='alcohol', y='abbrev',
-            color='b', label='Alcohol-involved')
-
-plt.xlabel('Car crashes per 1 billion miles')
-plt.ylabel('State')
-plt.title('Alcohol involvement in car crashes per billion miles')
-sns.despine(left=True, bottom=True)
-plt.legend()
-#plt.savefig('crashes.png')
-plt.show()
+def sns_stacked_bar(mpg, mpg_by_origin):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    # loaded here rather than in load_data() while datasets/car_crashes.csv is not in the
+    # repository, so a missing table only costs this figure
+    crashes = load_dataset('car_crashes').sort_values(by='total', ascending=True)
+    # needed to reduce overlap of text
+    fig = plt.figure(figsize=(12.0, 8.0))
+    plt.subplot(1, 2, 1)
+    sns.set_color_codes('pastel')
+    sns.barplot(data=crashes, x='total', y='abbrev',
+                color='b', label='Total')
+
+    sns.set_color_codes('dark')
+    sns.barplot(data=crashes, x='speeding', y='abbrev',
+                color='b', label='Speeding-involved')
+    plt.legend()
+    plt.xlabel('Car crashes per 1 billion miles')
+    plt.ylabel('State')
+    plt.title('Speeding involvement in car crashes per billion miles')
+
+    plt.subplot(1, 2, 2)
+    sns.set_color_codes('pastel')
+    sns.barplot(data=crashes, x='total', y='abbrev',
+                color='b', label='Total')
+
+    sns.set_color_codes('colorblind')
+    sns.barplot(data=crashes, x='alcohol', y='abbrev',
+                color='b', label='Alcohol-involved')
+
+    plt.xlabel('Car crashes per 1 billion miles')
+    plt.ylabel('State')
+    plt.title('Alcohol involvement in car crashes per billion miles')
+    sns.despine(left=True, bottom=True)
+    plt.legend()
+    #plt.savefig('crashes.png')
+    return fig
+
+
+FIGURES = [mpl_bar, mpl_barh, mpl_grouped_bar, go_grouped_bar, px_bar, px_labeled_bar, sns_stacked_bar]
+
+if __name__ == '__main__':
+    import plotly.io as pio
+    pio.renderers.default = "browser"
+    data = prepare(**load_data())
+    for make_figure in FIGURES:
+        show(make_figure(**data))
@@ -1,51 +1,81 @@
 """
 Demonstrate basic pie chart visualizations
 """
-import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.io as pio
-pio.renderers.default = "browser"
-alcohol = pd.read_csv('https://raw.githubusercontent.com/alexkenan/pyviz/main/datasets/alcohol.csv')
-countries = alcohol[(alcohol['location'] == 'Belarus') 
-                        | (alcohol['location'] == 'France')
-                        | (alcohol['location'] == 'Japan')
-                        | (alcohol['location'] == 'Honduras')]
-plt.style.use('default')
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pyviz.datasets import load_dataset
+from pyviz.render import show
+from pyviz.treemap import MIN_SHARE, TREEMAP_LEAVES, treemap_nodes
+
+
+def load_data() -> dict:
+    return {'alcohol': load_dataset('alcohol')}
+
+
+def prepare(alcohol) -> dict:
+    countries = alcohol[alcohol['location'].isin(['Belarus', 'France', 'Japan', 'Honduras'])]
+    # every country under a World node; too many to see and the smallest are folded together
+    min_share = MIN_SHARE if len(alcohol) > TREEMAP_LEAVES else 0
+    world = treemap_nodes(alcohol, ['location'], 'alcohol', root='World', min_share=min_share)
+    return {'alcohol': alcohol, 'countries': countries, 'world': world}
 
 
 # Matplotlib selection of countries with pct labels
-plt.pie(countries['alcohol'], labels=countries['location'],
-        autopct='%1.1f%%')
-plt.title('Alcohol Consumption for Select Countries')
-plt.show()
+def mpl_pie(alcohol, countries, world):
+    import matplotlib.pyplot as plt
+    fig = plt.figure()
+    plt.pie(countries['alcohol'], labels=countries['location'],
+            autopct='%1.1f%%')
+    plt.title('Alcohol Consumption for Select Countries')
+    return fig
 
 
 # Plotly Express pie customization
-fig = px.pie(countries, values='alcohol', names='location',
-             title="Alcohol Consumption by Select Countries")
-fig.update_traces(textposition='inside', textinfo='percent+label')
-fig.show()
-    
+def px_pie(alcohol, countries, world):
+    import plotly.express as px
+    fig = px.pie(countries, values='alcohol', names='location',
+                 title="Alcohol Consumption by Select Countries")
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
+
+
 # Plotly Graph Objects
-fig = go.Figure(data=[go.Pie(labels=countries['location'],
-                             values=countries['alcohol'])])
-fig.update_layout(title="Alcohol Consumption by Select Countries")
-fig.show()
-    
+def go_pie(alcohol, countries, world):
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[go.Pie(labels=countries['location'],
+                                 values=countries['alcohol'])])
+    fig.update_layout(title="Alcohol Consumption by Select Countries")
+    return fig
+
 
 # PX treemap for narrowed df
-fig = px.treemap(countries, names='location',
-                 values='alcohol',
-                 parents=["" for _ in countries['location']])
-fig.update_layout(title="Alcohol Consumption by Select Countries")
-fig.show()
+def px_treemap_countries(alcohol, countries, world):
+    import plotly.express as px
+    fig = px.treemap(countries, names='location',
+                     values='alcohol',
+                     parents=[''] * len(countries))
+    fig.update_layout(title="Alcohol Consumption by Select Countries")
+    return fig
 
 
 # PX treemap for alcohol df
-fig = px.treemap(alcohol, names='location',
-                 values='alcohol',
-                 parents=["World" for _ in alcohol['location']])
-fig.update_layout(title='Alcohol Consumption by Country')
-fig.show()
+def px_treemap_world(alcohol, countries, world):
+    import plotly.express as px
+    fig = px.treemap(world, ids='id', names='label',
+                     values='value', parents='parent',
+                     branchvalues='total')
+    fig.update_layout(title='Alcohol Consumption by Country')
+    return fig
+
+
+FIGURES = [mpl_pie, px_pie, go_pie, px_treemap_countries, px_treemap_world]
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+    import plotly.io as pio
+    plt.style.use('default')
+    pio.renderers.default = "browser"
+    data = prepare(**load_data())
+    for make_figure in FIGURES:
+        show(make_figure(**data))
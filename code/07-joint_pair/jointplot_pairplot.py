@@ -1,39 +1,118 @@
 """
 Extra charts offered by Seaborn and Plotly
 """
-import matplotlib.pyplot as plt
-import seaborn as sns
-tips = sns.load_dataset('tips')
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pyviz.datasets import load_dataset
+from pyviz.render import show
+from pyviz.hexbin import HEXBIN_POINTS, HexBins, go_hexbins, mpl_hexbins
+from pyviz.kde import FFT_POINTS, mpl_kde_contour, mpl_rug
+from pyviz.pairplot import PAIRPLOT_POINTS, pairplot
+from pyviz.scatter import DENSITY_POINTS, data_range, mpl_density_scatter
+
+
+def load_data() -> dict:
+    return {'tips': load_dataset('tips')}
+
+
+def prepare(tips) -> dict:
+    # the tips binned into hexagons once, for both hex plots
+    hexes = HexBins(data_range(tips['total_bill']) + data_range(tips['tip']), gridsize=30)
+    hexes.add(tips['total_bill'], tips['tip'])
+    return {'tips': tips, 'hexes': hexes}
+
 
 # Seaborn 2D density plot
-sns.displot(tips, x='total_bill', y="tip")
-plt.xlabel('Total Bill')
-plt.ylabel('Tip')
-plt.suptitle('Tips Total Bill 2D Density Plot')
-plt.show()
+def sns_density(tips, hexes):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    grid = sns.displot(tips, x='total_bill', y="tip")
+    plt.xlabel('Total Bill')
+    plt.ylabel('Tip')
+    plt.suptitle('Tips Total Bill 2D Density Plot')
+    return grid.figure
+
 
 # Seaborn contour with rug
-sns.displot(tips, x='total_bill', y='tip',
-            kind="kde", rug=True)
-plt.suptitle('Seaborn Tips Contour Plot')
-plt.show()
+def sns_contour(tips, hexes):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    if len(tips) > FFT_POINTS:
+        # binned FFT KDE: the same contours, without evaluating every point at every grid node
+        fig = plt.figure()
+        mpl_kde_contour(plt.gca(), tips['total_bill'], tips['tip'])
+        mpl_rug(plt.gca(), tips['total_bill'], tips['tip'])
+        plt.xlabel('total_bill')
+        plt.ylabel('tip')
+        plt.suptitle('Seaborn Tips Contour Plot')
+        return fig
+    grid = sns.displot(tips, x='total_bill', y='tip',
+                       kind="kde", rug=True)
+    plt.suptitle('Seaborn Tips Contour Plot')
+    return grid.figure
+
 
 # Seaborn bivariate jointplot
-sns.jointplot(data=tips, x='total_bill',
-              y='tip', alpha=0.75)
-plt.suptitle('Seaborn Tips Jointplot')
-plt.show()
+def sns_jointplot(tips, hexes):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    if len(tips) > DENSITY_POINTS:
+        # too many points to draw one by one: rasterize the joint plot, keep the marginals
+        grid = sns.JointGrid(data=tips, x='total_bill', y='tip')
+        mpl_density_scatter(grid.ax_joint, tips['total_bill'], tips['tip'])
+        grid.plot_marginals(sns.histplot)
+    else:
+        grid = sns.jointplot(data=tips, x='total_bill',
+                             y='tip', alpha=0.75)
+    plt.suptitle('Seaborn Tips Jointplot')
+    return grid.figure
+
 
 # Seaborn hex bivariate jointplot
-sns.jointplot(data=tips, x='total_bill',
-              y='tip', kind='hex')
-plt.suptitle('     Seaborn Tips Hex Jointplot')
-plt.show()
+def sns_hex_jointplot(tips, hexes):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    if len(tips) > HEXBIN_POINTS:
+        # the hexagons are already counted; seaborn would bin every point again
+        grid = sns.JointGrid(data=tips, x='total_bill', y='tip')
+        mpl_hexbins(grid.ax_joint, hexes, cmap=sns.light_palette('C0', as_cmap=True))
+        grid.plot_marginals(sns.histplot)
+    else:
+        grid = sns.jointplot(data=tips, x='total_bill',
+                             y='tip', kind='hex')
+    plt.suptitle('     Seaborn Tips Hex Jointplot')
+    return grid.figure
+
+
+# Plotly hexbin plot
+def go_hexbin(tips, hexes):
+    import plotly.graph_objects as go
+    fig = go.Figure(go_hexbins(hexes, name='tables'))
+    fig.update_layout(title='Plotly Tips Hexbin Plot', xaxis_title='total_bill', yaxis_title='tip',
+                      plot_bgcolor='white')
+    return fig
+
 
 # Seaborn pairplot
-pairplot = sns.pairplot(tips)
-pairplot.savefig("tips_pairplot.png")
+def sns_pairplot(tips, hexes):
+    import seaborn as sns
+    columns = len(tips.select_dtypes('number').columns)
+    if len(tips) * columns * (columns - 1) > PAIRPLOT_POINTS:
+        # panels drawn in parallel, as densities once there are too many rows to scatter
+        return pairplot(tips)
+    grid = sns.pairplot(tips)
+    return grid.figure
+
+
+FIGURES = [sns_density, sns_contour, sns_jointplot, sns_hex_jointplot, go_hexbin, sns_pairplot]
 
-# or, to show the pairplot:
-# plt.show()
+if __name__ == '__main__':
+    data = prepare(**load_data())
+    for make_figure in FIGURES[:-1]:
+        show(make_figure(**data))
 
+    # the pairplot is big, so save it instead of showing it
+    sns_pairplot(**data).savefig("tips_pairplot.png")
+    # or, to show the pairplot:
+    # plt.show()
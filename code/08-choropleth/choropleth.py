@@ -1,36 +1,53 @@
 """
 Learn choropleths with Plotly
 """
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-import plotly.io as pio
-pio.renderers.default = "browser"
-df = pd.read_csv('https://raw.githubusercontent.com/alexkenan/pyviz/main/datasets/states.csv')
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pyviz.datasets import load_dataset
+from pyviz.formatting import join_text, scaled_numbers
+from pyviz.render import show
+
+
+def load_data() -> dict:
+    return {'df': load_dataset('states')}
+
+
+def prepare(df) -> dict:
+    # e.g. 'Texas (TX)<br>Population 27.0M', built column-wise rather than row by row
+    df['Readable'] = join_text(df['State'], ' (', df['Postal'], ')<br>Population ',
+                               scaled_numbers(df['Population'], units=((1E6, 'M'), (1E3, 'K'))))
+    return {'df': df}
 
 
 # Plotly choropleth of state populations
-fig = px.choropleth(df, locations='Postal', locationmode="USA-states", scope="usa",
-                    color='Population', color_continuous_scale='Blues')
-fig.update_layout(title='US State Populations in 2014')
-fig.show()
+def px_choropleth(df):
+    import plotly.express as px
+    fig = px.choropleth(df, locations='Postal', locationmode="USA-states", scope="usa",
+                        color='Population', color_continuous_scale='Blues')
+    fig.update_layout(title='US State Populations in 2014')
+    return fig
 
 
 # Plotly GO US map with populations
-def readable_pop(row):
-    if row['Population'] >= 1E6:
-        return '{} ({})<br>Population {:.1f}M'.format(row['State'], row['Postal'], row['Population']/1E6)
-    else:
-        return '{} ({})<br>Population {:.1f}K'.format(row['State'], row['Postal'], row['Population']/1E3)
-
-
-df['Readable'] = df.apply(readable_pop, axis=1)
-fig = go.Figure(data=go.Choropleth(locations=df['Postal'], 
-                                   locationmode="USA-states",
-                                   z=df['Population'],
-                                   colorscale='Blues',
-                                   text=df['Readable'],
-                                   hovertemplate='%{text}',
-                                   name=""))
-fig.update_layout(geo_scope='usa', title="US State Populations in 2014")
-fig.show()
+def go_choropleth(df):
+    import plotly.graph_objects as go
+    fig = go.Figure(data=go.Choropleth(locations=df['Postal'],
+                                       locationmode="USA-states",
+                                       z=df['Population'],
+                                       colorscale='Blues',
+                                       text=df['Readable'],
+                                       hovertemplate='%{text}',
+                                       name=""))
+    fig.update_layout(geo_scope='usa', title="US State Populations in 2014")
+    return fig
+
+
+FIGURES = [px_choropleth, go_choropleth]
+
+if __name__ == '__main__':
+    import plotly.io as pio
+    pio.renderers.default = "browser"
+    data = prepare(**load_data())
+    for make_figure in FIGURES:
+        show(make_figure(**data))
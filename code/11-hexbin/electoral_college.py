@@ -1,65 +1,86 @@
 """
 Show hexbinning with Electoral College data
 """
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-import json
-import requests
+import os
+import sys
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pyviz.datasets import load_dataset
+from pyviz.formatting import join_text
+from pyviz.geometry import geometry_asset, load_geometry
+from pyviz.render import figure_dir, show
 
+# the zoom level the hexmap is shown at, and simplified for
+HEXMAP_ZOOM = 4.2
 
-df = pd.read_csv('https://raw.githubusercontent.com/alexkenan/pyviz/main/datasets/elect.csv')
-j_file_str = requests.get('https://raw.githubusercontent.com/alexkenan/pyviz/main/datasets/geoJSONstates.json').text
-j_file = json.loads(j_file_str)
-df['Needed to Win'] = df['Cumulative Count'] <= 270
 
-
-def binary_win(row):
-    if row['Needed to Win']:
-        return 1
-    else:
-        return 0
-
-
-def hover_text(row):
-    if row['Needed to Win']:
-        return '{} <b>is</b> needed to win with {} electors'.format(row['State'], row['Electors'])
-    else:
-        return '{} <b>is not</b> needed to win with {} electors'.format(row['State'], row['Electors'])
+def load_data() -> dict:
+    df = load_dataset('elect')
+    # parsed once into the dataset cache; later runs memory-map the stored arrays
+    hex_geometry = load_geometry('geoJSONstates.json')
+    return {'df': df, 'hex_geometry': hex_geometry}
 
 
-df['Binary'] = df.apply(binary_win, axis=1)
-df['Display Text'] = df.apply(hover_text, axis=1)
+def prepare(df, hex_geometry) -> dict:
+    df['Needed to Win'] = df['Cumulative Count'] <= 270
+    df['Binary'] = df['Needed to Win'].astype(int)
+    df['Display Text'] = join_text(df['State'], np.where(df['Needed to Win'], ' <b>is</b>', ' <b>is not</b>'),
+                                   ' needed to win with ', df['Electors'], ' electors')
+    return {'df': df, 'hex_geometry': hex_geometry}
 
 
 # Plotly Express US states needed to win
-fig = px.choropleth(df, locations=df['Abbr'], locationmode="USA-states", color="Needed to Win",
-                    color_discrete_sequence=['#0c68e6', '#f4f4f6'], scope="usa")
-fig.update_layout(title="Electoral College Minimum States Needed to Win")
-fig.show()
+def px_choropleth(df, hex_geometry):
+    import plotly.express as px
+    fig = px.choropleth(df, locations=df['Abbr'], locationmode="USA-states", color="Needed to Win",
+                        color_discrete_sequence=['#0c68e6', '#f4f4f6'], scope="usa")
+    fig.update_layout(title="Electoral College Minimum States Needed to Win")
+    return fig
 
 
 # Plotly GO US map with faded states that aren't needed to win
-fig = go.Figure(data=go.Choropleth(locations=df['Abbr'], locationmode="USA-states",
-                                   z=df['Binary'],
-                                   colorscale=['#f4f4f6', '#0c68e6'],
-                                   marker_line_color='white',
-                                   marker_line_width=0.01,
-                                   showscale=False,
-                                   text=df['Display Text'],
-                                   hovertemplate='%{text}',
-                                   name=""))
-fig.update_layout(geo_scope='usa', title="Electoral College Minimum States Needed to Win")
-fig.show()
+def go_choropleth(df, hex_geometry):
+    import plotly.graph_objects as go
+    fig = go.Figure(data=go.Choropleth(locations=df['Abbr'], locationmode="USA-states",
+                                       z=df['Binary'],
+                                       colorscale=['#f4f4f6', '#0c68e6'],
+                                       marker_line_color='white',
+                                       marker_line_width=0.01,
+                                       showscale=False,
+                                       text=df['Display Text'],
+                                       hovertemplate='%{text}',
+                                       name=""))
+    fig.update_layout(geo_scope='usa', title="Electoral College Minimum States Needed to Win")
+    return fig
+
 
 # Plotly Hexbin of US Electoral College
-fig = px.choropleth_mapbox(df, geojson=j_file, color="Needed to Win",
-                           color_discrete_sequence=['#0c68e6', '#dadbde'],
-                           locations="State", featureidkey="properties.State",
-                           center={"lat": 5.0, "lon": 10.0},  # hover_data=['State', 'Electors'],
-                           zoom=4.2, hover_data={'State': True, 'Electors': True, 'Abbr': False,
-                                                 'Needed to Win': False})
+def px_hexmap(df, hex_geometry):
+    import plotly.express as px
+    # only the detail that shows at the map's zoom level; when rendering to files, one
+    # shared GeoJSON file next to the HTML instead of a copy inside the figure
+    directory = figure_dir()
+    if directory:
+        geojson = geometry_asset('geoJSONstates.json', directory, zoom=HEXMAP_ZOOM)
+    else:
+        geojson = hex_geometry.geojson(zoom=HEXMAP_ZOOM)
+    fig = px.choropleth_map(df, geojson=geojson, color="Needed to Win",
+                            color_discrete_sequence=['#0c68e6', '#dadbde'],
+                            locations="State", featureidkey="properties.State",
+                            center={"lat": 5.0, "lon": 10.0},  # hover_data=['State', 'Electors'],
+                            zoom=HEXMAP_ZOOM, map_style="white-bg",
+                            hover_data={'State': True, 'Electors': True, 'Abbr': False,
+                                        'Needed to Win': False})
+
+    fig.update_layout(margin={"r": 0, "t": 0, "l": 0, "b": 0})
+    return fig
+
+
+FIGURES = [px_choropleth, go_choropleth, px_hexmap]
 
-fig.update_layout(margin={"r": 0, "t": 0, "l": 0, "b": 0},
-                  mapbox_style="white-bg")
-fig.show()
+if __name__ == '__main__':
+    import plotly.io as pio
+    pio.renderers.default = "browser"
+    data = prepare(**load_data())
+    for make_figure in FIGURES:
+        show(make_figure(**data))
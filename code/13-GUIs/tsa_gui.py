@@ -1,13 +1,20 @@
 """
 Use Matplotlib and Tkinter together
 """
-import tkinter as tk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.ticker import FuncFormatter
+from __future__ import annotations
+
+import os
+import sys
+from typing import TYPE_CHECKING
 import pandas as pd
 #import matplotlib
 #matplotlib.use("TkAgg")
+if TYPE_CHECKING:
+    import tkinter as tk
+    import matplotlib.pyplot as plt
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from pyviz.datasets import load_dataset
+from pyviz.downsample import plot_downsampled
 
 
 def _quit(main: tk.Tk):
@@ -15,19 +22,33 @@ def _quit(main: tk.Tk):
     main.destroy()
 
 
-def tsa(path: str) -> pd.DataFrame:
+def tsa() -> pd.DataFrame:
     """
     Load the TSA Passenger Throughput data
-    :param path: str of path to TSA spreadsheet
     :return: pd.DataFrame of the TSA Passenger throughput results
     """
-    dataframe = pd.read_csv(path,
-                            names=['Date', '2020', '2019'],
-                            header=0, parse_dates=['Date'])
+    dataframe = load_dataset('tsa_pax')
+    return add_yoy(dataframe)
+
+
+def add_yoy(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add 2020 passengers as a percentage of 2019 passengers
+    :param dataframe: pd.DataFrame of the TSA Passenger throughput results
+    :return: pd.DataFrame with a 'yoy' column
+    """
     dataframe['yoy'] = (dataframe['2020'] / dataframe['2019']) * 100
     return dataframe
 
 
+def load_data() -> dict:
+    return {'df1': load_dataset('tsa_pax')}
+
+
+def prepare(df1) -> dict:
+    return {'df1': add_yoy(df1)}
+
+
 def plot_new_canvas(figure: plt.figure, main: tk.Tk) -> None:
     """
     Plot the new figure on the Tk canvas
@@ -35,12 +56,98 @@ def plot_new_canvas(figure: plt.figure, main: tk.Tk) -> None:
     :param main: tk.Tk() instance
     :return: None
     """
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
     figure.set_size_inches((9, 6))
     canvas = FigureCanvasTkAgg(figure, master=main)
     canvas.draw()
     canvas.get_tk_widget().grid(column=0, row=0, columnspan=2, rowspan=8)
 
 
+blue = "#327ff6"
+gray = "#bdb8b6"
+
+
+def plot_line(axis, x: pd.Series, y: pd.Series, downsample: str = None, **kwargs) -> None:
+    """
+    Plot one series, downsampled to the axis width when asked to
+    :param axis: matplotlib Axes to draw on
+    :param x: pd.Series of dates
+    :param y: pd.Series of values
+    :param downsample: str 'lttb' or 'minmax' to draw only what fits the axis, None for every point
+    :return: None
+    """
+    if downsample:
+        plot_downsampled(axis, x, y, downsample, **kwargs)
+    else:
+        axis.plot(x, y, **kwargs)
+
+
+# Daily raw pax numbers
+def mpl_daily(df1: pd.DataFrame, downsample: str = None) -> plt.Figure:
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import FuncFormatter
+    fig, axis = plt.subplots()
+    plot_line(axis, df1['Date'], df1['2020'], downsample, color=blue, linestyle='-', label="2020")
+    plot_line(axis, df1['Date'], df1['2019'], downsample, color=gray, linestyle='-', label="2019")
+    plt.legend()
+    plt.xlabel('Date')
+    plt.ylabel('Passengers')
+    plt.title('TSA Passenger Daily Throughput 2019 and 2020')
+    axis.get_yaxis().set_major_formatter(FuncFormatter(lambda x, p: format(int(x), ',')))
+    return fig
+
+
+# Weekly raw pax numbers
+def mpl_weekly(df1: pd.DataFrame) -> plt.Figure:
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import FuncFormatter
+    weekly_data = df1.resample('W-Mon', label='right', closed='right',
+                               on='Date').sum().reset_index().sort_values(by='Date')
+    fig, axis = plt.subplots()
+    axis.plot(weekly_data['Date'], weekly_data['2020'], color=blue, linestyle='-',
+              label="2020")
+    axis.plot(weekly_data['Date'], weekly_data['2019'], color=gray, linestyle='-',
+              label="2019")
+    axis.get_yaxis().set_major_formatter(FuncFormatter(lambda x, p: format(int(x), ',')))
+    plt.xlabel('Date')
+    plt.ylabel('Passengers')
+    plt.legend()
+    plt.ylim(0, 20E6)
+    plt.title('TSA Passenger Weekly Throughput 2019 and 2020')
+    return fig
+
+
+# Daily YoY percentage
+def mpl_daily_yoy(df1: pd.DataFrame, downsample: str = None) -> plt.Figure:
+    import matplotlib.pyplot as plt
+    fig, axis = plt.subplots()
+    plot_line(axis, df1['Date'], df1['yoy'], downsample, color=blue, linestyle='-', label="2020")
+    plt.legend()
+    plt.xlabel('Date')
+    plt.ylabel('Passenger Load Factor (%)')
+    plt.title('TSA Passenger Daily Throughput in 2020 as a Percentage of 2019')
+    return fig
+
+
+# Weekly YoY percentage
+def mpl_weekly_yoy(df1: pd.DataFrame) -> plt.Figure:
+    import matplotlib.pyplot as plt
+    weekly_data = df1.resample('W-Mon', label='right', closed='right',
+                               on='Date').sum().reset_index().sort_values(by='Date')
+    weekly_data['yoy'] = (weekly_data['2020']/weekly_data['2019'])*100
+    fig, axis = plt.subplots()
+    axis.plot(weekly_data['Date'], weekly_data['yoy'], color=blue, linestyle='-',
+              label="2020")
+    plt.xlabel('Date')
+    plt.ylabel('Passenger Load Factor (%)')
+    plt.legend()
+    plt.title('TSA Passenger Daily Throughput in 2020 as a Percentage of 2019')
+    return fig
+
+
+FIGURES = [mpl_daily, mpl_weekly, mpl_daily_yoy, mpl_weekly_yoy]
+
+
 def plot_choice(num: int, plot: plt, df1: pd.DataFrame) -> None:
     """
     Function to re-draw the canvas
@@ -50,87 +157,33 @@ def plot_choice(num: int, plot: plt, df1: pd.DataFrame) -> None:
     :return: None
     """
     plot.clf()
-    blue = "#327ff6"
-    gray = "#bdb8b6"
-    if num == 1:
-        # Daily raw pax numbers
-        fig, axis = plt.subplots()
-        axis.plot(df1['Date'], df1['2020'], color=blue, linestyle='-', label="2020")
-        axis.plot(df1['Date'], df1['2019'], color=gray, linestyle='-', label="2019")
-        plot.legend()
-        plot.xlabel('Date')
-        plot.ylabel('Passengers')
-        plot.title('TSA Passenger Daily Throughput 2019 and 2020')
-        axis.get_yaxis().set_major_formatter(FuncFormatter(lambda x, p: format(int(x), ',')))
-
-        plot_new_canvas(fig, root)
-
-    elif num == 2:
-        # Weekly raw pax numbers
-        weekly_data = df1.resample('W-Mon', label='right', closed='right',
-                                   on='Date').sum().reset_index().sort_values(by='Date')
-        fig, axis = plt.subplots()
-        axis.plot(weekly_data['Date'], weekly_data['2020'], color=blue, linestyle='-',
-                  label="2020")
-        axis.plot(weekly_data['Date'], weekly_data['2019'], color=gray, linestyle='-',
-                  label="2019")
-        axis.get_yaxis().set_major_formatter(FuncFormatter(lambda x, p: format(int(x), ',')))
-        plot.xlabel('Date')
-        plot.ylabel('Passengers')
-        plot.legend()
-        plot.ylim(0, 20E6)
-        plot.title('TSA Passenger Weekly Throughput 2019 and 2020')
-
-        plot_new_canvas(fig, root)
-
-    elif num == 3:
-        # Daily YoY percentage
-        fig, axis = plt.subplots()
-        axis.plot(df1['Date'], df1['yoy'], color=blue, linestyle='-', label="2020")
-        plot.legend()
-        plot.xlabel('Date')
-        plot.ylabel('Passenger Load Factor (%)')
-        plot.title('TSA Passenger Daily Throughput in 2020 as a Percentage of 2019')
-
-        plot_new_canvas(fig, root)
-
-    elif num == 4:
-        # Weekly YoY percentage
-        weekly_data = df1.resample('W-Mon', label='right', closed='right',
-                                   on='Date').sum().reset_index().sort_values(by='Date')
-        weekly_data['yoy'] = (weekly_data['2020']/weekly_data['2019'])*100
-        fig, axis = plt.subplots()
-        axis.plot(weekly_data['Date'], weekly_data['yoy'], color=blue, linestyle='-',
-                  label="2020")
-        plot.xlabel('Date')
-        plot.ylabel('Passenger Load Factor (%)')
-        plot.legend()
-        plot.title('TSA Passenger Daily Throughput in 2020 as a Percentage of 2019')
-
-        plot_new_canvas(fig, root)
-
-
-root = tk.Tk()
-root.geometry("1100x750")
-root.wm_title("TSA Passenger Throughput")
-
-selection = tk.IntVar()
-selection.set(1)
-tk.Radiobutton(root, text="Daily", variable=selection, value=1,
-                                 command=lambda: plot_choice(selection.get(), plt, df)).grid(row=1, column=3)
-tk.Radiobutton(root, text="Weekly", variable=selection, value=2,
-                                 command=lambda: plot_choice(selection.get(), plt, df)).grid(row=2, column=3)
-tk.Radiobutton(root, text="Daily % YoY", variable=selection, value=3,
-                                 command=lambda: plot_choice(selection.get(), plt, df)).grid(row=3, column=3)
-tk.Radiobutton(root, text="Weekly % YoY", variable=selection, value=4,
-                                 command=lambda: plot_choice(selection.get(), plt, df)).grid(row=4, column=3)
-
-
-button = tk.Button(master=root, text="Quit", command=lambda: _quit(root))
-button.grid(row=5, column=3)
-
-
-df = tsa('https://raw.githubusercontent.com/alexkenan/pyviz/main/datasets/tsa_pax.csv')
-plot_choice(1, plt, df)
-
-tk.mainloop()
+    plot_new_canvas(FIGURES[num - 1](df1), root)
+
+
+if __name__ == '__main__':
+    import tkinter as tk
+    import matplotlib.pyplot as plt
+    root = tk.Tk()
+    root.geometry("1100x750")
+    root.wm_title("TSA Passenger Throughput")
+
+    selection = tk.IntVar()
+    selection.set(1)
+    tk.Radiobutton(root, text="Daily", variable=selection, value=1,
+                                     command=lambda: plot_choice(selection.get(), plt, df)).grid(row=1, column=3)
+    tk.Radiobutton(root, text="Weekly", variable=selection, value=2,
+                                     command=lambda: plot_choice(selection.get(), plt, df)).grid(row=2, column=3)
+    tk.Radiobutton(root, text="Daily % YoY", variable=selection, value=3,
+                                     command=lambda: plot_choice(selection.get(), plt, df)).grid(row=3, column=3)
+    tk.Radiobutton(root, text="Weekly % YoY", variable=selection, value=4,
+                                     command=lambda: plot_choice(selection.get(), plt, df)).grid(row=4, column=3)
+
+
+    button = tk.Button(master=root, text="Quit", command=lambda: _quit(root))
+    button.grid(row=5, column=3)
+
+
+    df = tsa()
+    plot_choice(1, plt, df)
+
+    tk.mainloop()
@@ -0,0 +1,3 @@
+"""
+Shared helpers for the How to (Not) Lie with Data chapter scripts
+"""
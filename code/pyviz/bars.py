@@ -0,0 +1,106 @@
+"""
+Grouped and stacked bar charts from a single aggregation
+
+Filtering the frame once per group and aggregating each subset scans the whole table
+once per group. bar_table() does one groupby over both the x column and the group column
+and unstacks the result into a table with one row per x value and one column per group.
+The drawing helpers take that table, so it can be worked out once (in a chapter's
+prepare()) and shared by the Matplotlib and Plotly versions of a chart.
+
+    table = bar_table(mpg, 'model_year', 'origin', 'mpg')
+    mpl_grouped_bars(plt.gca(), table)
+"""
+import numpy as np
+import pandas as pd
+
+
+def bar_table(dataframe: pd.DataFrame, x: str, group: str, value: str, func='mean',
+              groups: list = None) -> pd.DataFrame:
+    """
+    Aggregate a value for every combination of x and group in one pass
+    :param dataframe: pd.DataFrame with the x, group and value columns
+    :param x: str name of the column along the x axis
+    :param group: str name of the column that splits the bars
+    :param value: str name of the column to aggregate
+    :param func: str or function passed on to groupby.agg, e.g. 'mean', 'sum', 'count'
+    :param groups: list of group values to keep, in bar order; default every group in
+                   order of first appearance
+    :return: pd.DataFrame with one row per x value and one column per group, NaN where an
+             x value has no rows of a group
+    """
+    table = dataframe.groupby([x, group], sort=False, observed=True)[value].agg(func).unstack(group)
+    if groups is None:
+        groups = pd.unique(dataframe[group].dropna())
+    return table.reindex(columns=groups).sort_index()
+
+
+def bar_offsets(count: int, width: float) -> np.ndarray:
+    """
+    Shift each group's bars so the groups sit side by side, centered on the x value
+    :param count: int number of groups
+    :param width: float width of one bar in x units
+    :return: np.ndarray of x offsets, one per group
+    """
+    return (np.arange(count) - (count - 1) / 2) * width
+
+
+def stack_bottoms(table: pd.DataFrame) -> np.ndarray:
+    """
+    Where each bar of a stacked bar chart starts: the sum of the groups below it
+    :param table: pd.DataFrame from bar_table()
+    :return: np.ndarray of the same shape as the table
+    """
+    values = np.nan_to_num(table.to_numpy(dtype=np.float64))
+    return np.cumsum(values, axis=1) - values
+
+
+def mpl_grouped_bars(axis, table: pd.DataFrame, width: float = None, stacked: bool = False,
+                     labels: dict = None, colors: dict = None, **kwargs) -> list:
+    """
+    Draw a grouped (side by side) or stacked bar chart of a bar_table() on a Matplotlib axis
+    :param axis: matplotlib Axes to draw on
+    :param table: pd.DataFrame from bar_table(); numeric x values
+    :param width: float width of one bar in x units, default 0.8 split between the groups
+                  (or 0.8 for stacked bars)
+    :param stacked: bool stack the groups on top of each other instead of side by side
+    :param labels: dict of group value to legend label, default the value itself
+    :param colors: dict of group value to color, default the Matplotlib color cycle
+    :param kwargs: passed on to every axis.bar
+    :return: list of BarContainer, one per group
+    """
+    labels, colors = labels or {}, colors or {}
+    x = table.index.to_numpy(dtype=np.float64)
+    values = table.to_numpy(dtype=np.float64)
+    if width is None:
+        width = 0.8 if stacked else 0.8 / max(1, len(table.columns))
+    if stacked:
+        offsets = np.zeros(len(table.columns))
+        bottoms = stack_bottoms(table)
+    else:
+        offsets = bar_offsets(len(table.columns), width)
+        bottoms = np.zeros(values.shape)
+    containers = []
+    for i, name in enumerate(table.columns):
+        color = {'color': colors[name]} if name in colors else {}
+        containers.append(axis.bar(x + offsets[i], values[:, i], width=width, bottom=bottoms[:, i],
+                                   label=labels.get(name, name), **color, **kwargs))
+    return containers
+
+
+def go_grouped_bars(table: pd.DataFrame, names: dict = None, colors: dict = None, **kwargs) -> list:
+    """
+    Make Plotly bar traces of a bar_table(), one per group
+    Set the figure's layout barmode to 'group' or 'stack' to place them.
+    :param table: pd.DataFrame from bar_table()
+    :param names: dict of group value to trace name, default the value itself
+    :param colors: dict of group value to color, default Plotly's color sequence
+    :param kwargs: passed on to every go.Bar
+    :return: list of go.Bar
+    """
+    import plotly.graph_objects as go
+    names, colors = names or {}, colors or {}
+    x = table.index.to_numpy()
+    values = table.to_numpy(dtype=np.float64)
+    return [go.Bar(x=x, y=values[:, i], name=names.get(name, str(name)),
+                   marker={'color': colors[name]} if name in colors else {}, **kwargs)
+            for i, name in enumerate(table.columns)]
@@ -0,0 +1,274 @@
+"""
+Time how expensive every chart in the book is, phase by phase
+
+For each chapter the data is loaded once (timed), then for every scale factor a
+synthetic copy of the data is made by repeating each row and jittering the float
+columns. Each chart is then timed in three more phases:
+    transform - the chapter's prepare() step (the DataFrame.apply helpers and friends)
+    build     - the figure function, i.e. constructing the Matplotlib/Seaborn/Plotly figure
+    render    - rasterizing to PNG (Matplotlib/Seaborn), writing the GIF (animations),
+                or serializing to HTML (Plotly)
+A chart that takes longer than the time budget at one scale is skipped at the larger
+ones, so the report shows which backends fall over first.
+
+Run it from the code/ folder; the results are written as JSON:
+    python -m pyviz.benchmark -o benchmark.json
+    python -m pyviz.benchmark 03 04 --scales 1 10 100 --compare benchmark.json
+"""
+import argparse
+import copy
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from pyviz.render import CODE_DIR, chapter_scripts, figure_names, load_chapter, prepare_data
+
+SCALES = (1, 10, 100, 1000)
+BACKENDS = {'mpl': 'matplotlib', 'sns': 'seaborn', 'px': 'plotly express', 'go': 'plotly graph objects'}
+PHASES = ('load', 'transform', 'build', 'render')
+
+
+def scale_frame(dataframe: pd.DataFrame, factor: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Make a synthetic DataFrame `factor` times longer than the shipped one
+    Every row is repeated in place (so sorted and grouped data stay sorted and grouped)
+    and float columns get a little noise so the copies are not exact duplicates.
+    :param dataframe: pd.DataFrame of the shipped data
+    :param factor: int how many times longer to make it
+    :param rng: np.random.Generator used for the jitter
+    :return: pd.DataFrame of len(dataframe) * factor rows
+    """
+    if factor == 1:
+        return dataframe.copy()
+    scaled = dataframe.iloc[np.repeat(np.arange(len(dataframe)), factor)].reset_index(drop=True)
+    for column in scaled.columns:
+        if scaled[column].dtype.kind == 'f':
+            values = scaled[column].to_numpy()
+            spread = np.nanstd(values) * 0.01 if len(values) else 0.0
+            scaled[column] = values + rng.normal(0.0, spread, len(values))
+    return scaled
+
+
+def scale_data(data: dict, factor: int, seed: int = 0) -> dict:
+    """
+    Scale every table in a chapter's data; anything that is not a table is copied as is
+    :param data: dict returned by a chapter's load_data()
+    :param factor: int scale factor
+    :param seed: int seed for the jitter, so runs are comparable
+    :return: dict of the same keys with scaled values
+    """
+    rng = np.random.default_rng(seed)
+    scaled = {}
+    for key, value in data.items():
+        if isinstance(value, pd.DataFrame):
+            scaled[key] = scale_frame(value, factor, rng)
+        elif isinstance(value, np.ndarray) and value.ndim:
+            scaled[key] = np.tile(value, (factor,) + (1,) * (value.ndim - 1))
+        else:
+            scaled[key] = copy.deepcopy(value)
+    return scaled
+
+
+def data_rows(data: dict) -> int:
+    return sum(len(value) for value in data.values() if isinstance(value, (pd.DataFrame, np.ndarray)))
+
+
+def render_figure(figure) -> int:
+    """
+    Finish a figure the way the batch renderer would, without touching the output folder
+    :param figure: Matplotlib figure or animation, or Plotly figure
+    :return: int number of bytes produced
+    """
+    if hasattr(figure, 'to_plotly_json'):
+        import plotly.io as pio
+        return len(pio.to_html(figure, include_plotlyjs=False, full_html=False).encode('utf-8'))
+
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import Animation, PillowWriter
+    if isinstance(figure, Animation):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'animation.gif')
+            figure.save(path, writer=PillowWriter(fps=30))
+            plt.close(figure._fig)
+            return os.path.getsize(path)
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png')
+    plt.close(figure)
+    return buffer.tell()
+
+
+def timed(function, *args, **kwargs) -> tuple:
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def benchmark_chapter(path: str, scales: tuple, budget: float, repeat: int) -> list:
+    """
+    Benchmark every chart of one chapter at every scale
+    :param path: str path to the chapter script
+    :param scales: tuple of int scale factors
+    :param budget: float seconds; a chart slower than this is skipped at larger scales
+    :param repeat: int number of runs per measurement, the fastest one is kept
+    :return: list of dict results, one per chart and scale
+    """
+    chapter = os.path.basename(os.path.dirname(path))
+    try:
+        module = load_chapter(path)
+        raw, load_seconds = timed(module.load_data)
+    except Exception as error:
+        # a chapter whose data can't be loaded still gets a row per chart, so the run goes on
+        status = 'error: {}: {}'.format(type(error).__name__, error)
+        results = [_failed(chapter, name, scale, status) for scale in scales for name in figure_names(path)]
+        for result in results:
+            print('{}/{} x{}: {}'.format(chapter, result['figure'], result['scale'], status), file=sys.stderr)
+        return results
+    over_budget = set()
+    results = []
+
+    for scale in scales:
+        transform_seconds = None
+        prepared = None
+        try:
+            for _ in range(repeat):
+                scaled = scale_data(raw, scale)
+                prepared, seconds = timed(prepare_data, module, scaled)
+                transform_seconds = seconds if transform_seconds is None else min(transform_seconds, seconds)
+        except Exception as error:
+            status = 'error: {}: {}'.format(type(error).__name__, error)
+            for name in figure_names(path):
+                results.append(_failed(chapter, name, scale, status))
+                print('{}/{} x{}: {}'.format(chapter, name, scale, status), file=sys.stderr)
+            continue
+
+        for name in figure_names(path):
+            result = {'chapter': chapter, 'figure': name,
+                      'backend': BACKENDS.get(name.split('_')[0], 'other'),
+                      'scale': scale, 'rows': data_rows(prepared),
+                      'load': load_seconds if scale == 1 else None,
+                      'transform': transform_seconds, 'build': None, 'render': None,
+                      'output_bytes': None, 'status': 'ok'}
+            if name in over_budget:
+                result['status'] = 'skipped'
+                results.append(result)
+                continue
+            try:
+                for _ in range(repeat):
+                    figure, build_seconds = timed(getattr(module, name), **prepared)
+                    output_bytes, render_seconds = timed(render_figure, figure)
+                    if result['build'] is None or build_seconds + render_seconds < result['build'] + result['render']:
+                        result.update(build=build_seconds, render=render_seconds,
+                                      output_bytes=output_bytes)
+            except Exception as error:
+                result['status'] = 'error: {}: {}'.format(type(error).__name__, error)
+                over_budget.add(name)
+            else:
+                if result['build'] + result['render'] > budget:
+                    over_budget.add(name)
+            results.append(result)
+            print('{}/{} x{}: {}'.format(chapter, name, scale, _summary(result)), file=sys.stderr)
+    return results
+
+
+def _failed(chapter: str, name: str, scale: int, status: str) -> dict:
+    return {'chapter': chapter, 'figure': name, 'backend': BACKENDS.get(name.split('_')[0], 'other'),
+            'scale': scale, 'rows': None, 'load': None, 'transform': None, 'build': None,
+            'render': None, 'output_bytes': None, 'status': status}
+
+
+def _summary(result: dict) -> str:
+    if result['status'] != 'ok':
+        return result['status']
+    return ', '.join('{} {:.3f}s'.format(phase, result[phase]) for phase in PHASES
+                     if result[phase] is not None)
+
+
+def environment() -> dict:
+    """
+    Describe the machine and library versions so results from different runs can be compared
+    """
+    versions = {}
+    for library in ('numpy', 'pandas', 'matplotlib', 'seaborn', 'plotly', 'scipy'):
+        try:
+            versions[library] = __import__(library).__version__
+        except ImportError:
+            versions[library] = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=CODE_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': commit, 'python': platform.python_version(),
+            'platform': platform.platform(), 'cpus': os.cpu_count(), 'versions': versions}
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2) -> list:
+    """
+    Find the phases that got slower than the baseline by more than the threshold
+    :param baseline: dict of a previous benchmark JSON file
+    :param current: dict of this run's results
+    :param threshold: float relative slowdown to report, 0.2 means 20% slower
+    :return: list of str lines describing each regression
+    """
+    previous = {(row['chapter'], row['figure'], row['scale']): row for row in baseline['results']}
+    lines = []
+    for row in current['results']:
+        old = previous.get((row['chapter'], row['figure'], row['scale']))
+        if old is None:
+            continue
+        for phase in PHASES:
+            if old.get(phase) and row.get(phase) and row[phase] > old[phase] * (1 + threshold):
+                lines.append('{}/{} x{} {}: {:.3f}s -> {:.3f}s ({:+.0%})'.format(
+                    row['chapter'], row['figure'], row['scale'], phase,
+                    old[phase], row[phase], row[phase] / old[phase] - 1))
+    return lines
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark loading, transforming, building "
+                                                 "and rendering the book's figures")
+    parser.add_argument('chapters', nargs='*',
+                        help='chapter numbers or names to benchmark, e.g. 01 barcharts (default: all)')
+    parser.add_argument('-o', '--output', default='benchmark.json', help='JSON file to write')
+    parser.add_argument('-s', '--scales', nargs='+', type=int, default=list(SCALES),
+                        help='dataset scale factors (default: 1 10 100 1000)')
+    parser.add_argument('-b', '--budget', type=float, default=30.0,
+                        help='seconds per chart before larger scales are skipped')
+    parser.add_argument('-r', '--repeat', type=int, default=1,
+                        help='runs per measurement; the fastest is kept')
+    parser.add_argument('-c', '--compare', help='previous benchmark JSON to compare against')
+    args = parser.parse_args(argv)
+
+    os.environ['MPLBACKEND'] = 'Agg'
+
+    report = {'environment': environment(), 'scales': args.scales, 'results': []}
+    for path in chapter_scripts(args.chapters):
+        report['results'].extend(benchmark_chapter(path, tuple(args.scales), args.budget,
+                                                   max(1, args.repeat)))
+
+    with open(args.output, 'w', encoding='utf-8') as outfile:
+        json.dump(report, outfile, indent=1)
+    print('Wrote {} results to {}'.format(len(report['results']), args.output))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as infile:
+            regressions = compare(json.load(infile), report)
+        for line in regressions:
+            print('SLOWER ' + line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
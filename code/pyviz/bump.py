@@ -0,0 +1,176 @@
+"""
+Bump and slope charts of many lines, built from one sort of the table
+
+Drawing a line per team by filtering the frame for each team (df[df['Team'] == team])
+scans every row once per team, and in Plotly makes a trace and an annotation per team.
+line_blocks() sorts the rows once by (line, x), so each line is a contiguous block of
+rows between two offsets, and the drawing helpers work on whole columns:
+    - Matplotlib: one LineCollection for every line, one scatter for every marker and
+      one PathCollection for the end labels
+    - Plotly: one trace per distinct color, holding all the lines of that color with
+      NaN gaps between them, plus one text trace for the end labels
+
+    mpl_bump(plt.gca(), df, 'Team', 'Matchweek', 'Rank', color='Color')
+    fig = go.Figure(go_bump_traces(df, 'Team', 'Matchweek', 'Rank', color='Color'))
+"""
+import numpy as np
+import pandas as pd
+
+from pyviz.scatter import WEBGL_POINTS, group_codes
+
+# above this many points the lines are drawn without a marker on every point
+BUMP_MARKER_POINTS = 50_000
+# above this many lines the end labels can't fit next to each other, so none are written
+BUMP_LABEL_LINES = 100
+
+
+def line_blocks(dataframe: pd.DataFrame, entity: str, x: str) -> tuple:
+    """
+    Sort the rows once so every line is one contiguous block, ordered along x
+    :param dataframe: pd.DataFrame in long form: one row per line and x value
+    :param entity: str name of the column that says which line a row belongs to
+    :param x: str name of the x column
+    :return: tuple of (pd.DataFrame of the sorted rows, np.ndarray of offsets: line i is
+             rows offsets[i] to offsets[i + 1]); lines keep their order of first appearance
+             and rows with a missing entity are left out
+    """
+    codes, names = group_codes(dataframe[entity])
+    order = np.lexsort((dataframe[x].to_numpy(), codes))
+    order = order[codes[order] >= 0]
+    sizes = np.bincount(codes[order], minlength=len(names))
+    offsets = np.concatenate([[0], np.cumsum(sizes[sizes > 0])])
+    return dataframe.iloc[order], offsets
+
+
+def _columns(*names) -> list:
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def with_gaps(values, offsets: np.ndarray) -> np.ndarray:
+    """
+    Put a gap (NaN, or None for text) between consecutive lines, for a Plotly trace that
+    draws many lines
+    :param values: array of one value per sorted row
+    :param offsets: np.ndarray of line offsets from line_blocks()
+    :return: np.ndarray with len(offsets) - 2 more values
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in 'biuf':
+        return np.insert(values.astype(np.float64), offsets[1:-1], np.nan)
+    return np.insert(values.astype(object), offsets[1:-1], None)
+
+
+def line_colors(rows: pd.DataFrame, offsets: np.ndarray, color: str = None, sequence: list = None) -> np.ndarray:
+    """
+    Pick one color per line
+    :param rows: pd.DataFrame of sorted rows from line_blocks()
+    :param offsets: np.ndarray of line offsets from line_blocks()
+    :param color: str name of a column of colors (the first row of each line is used), or None
+    :param sequence: list of colors to cycle through when `color` is None
+    :return: np.ndarray of color strings, one per line
+    """
+    if color is not None:
+        return rows[color].to_numpy(dtype=object)[offsets[:-1]]
+    count = len(offsets) - 1
+    return np.array(sequence, dtype=object)[np.arange(count) % len(sequence)]
+
+
+def mpl_bump(axis, dataframe: pd.DataFrame, entity: str, x: str, y: str, color: str = None,
+             markers: bool = None, marker_size: float = 36, linewidth: float = 1.5, labels: bool = None,
+             label_x: float = None, label_dy: float = 0, fontsize: float = 7):
+    """
+    Draw one line per entity on a Matplotlib axis, like a plt.plot per entity
+    :param axis: matplotlib Axes to draw on
+    :param dataframe: pd.DataFrame in long form: one row per entity and x value
+    :param entity: str name of the column of line names
+    :param x: str name of the x column
+    :param y: str name of the y column, e.g. a rank
+    :param color: str name of a column of colors, default Matplotlib's color cycle
+    :param markers: bool draw a marker on every point, default up to BUMP_MARKER_POINTS points
+    :param marker_size: float marker area in points squared, as for plt.scatter
+    :param linewidth: float line width in points
+    :param labels: bool write each entity's name at the end of its line, default up to
+                   BUMP_LABEL_LINES lines
+    :param label_x: float x position of the names, default the last x of each line
+    :param label_dy: float shift of the names along y, in data units
+    :param fontsize: float font size of the names in points
+    :return: matplotlib LineCollection of the lines
+    """
+    from matplotlib.collections import LineCollection
+    from pyviz.labels import mpl_text_labels
+    rows, offsets = line_blocks(dataframe[_columns(entity, x, y, color)], entity, x)
+    points = np.column_stack([rows[x].to_numpy(dtype=np.float64), rows[y].to_numpy(dtype=np.float64)])
+    colors = line_colors(rows, offsets, color, ['C{}'.format(i) for i in range(10)])
+    lines = LineCollection(np.split(points, offsets[1:-1]), colors=list(colors), linewidths=linewidth)
+    axis.add_collection(lines)
+    if markers is None:
+        markers = len(points) <= BUMP_MARKER_POINTS
+    if markers:
+        axis.scatter(points[:, 0], points[:, 1], s=marker_size, c=list(np.repeat(colors, np.diff(offsets))),
+                     zorder=lines.get_zorder())
+    if labels is None:
+        labels = len(offsets) - 1 <= BUMP_LABEL_LINES
+    if labels:
+        ends = points[offsets[1:] - 1]
+        label_xs = ends[:, 0] if label_x is None else np.full(len(ends), label_x)
+        mpl_text_labels(axis, label_xs, ends[:, 1] + label_dy,
+                        rows[entity].to_numpy()[offsets[:-1]], size=fontsize, colors=list(colors))
+    axis.autoscale_view()
+    return lines
+
+
+def go_bump_traces(dataframe: pd.DataFrame, entity: str, x: str, y: str, color: str = None,
+                   text: str = None, markers: bool = None, marker_size: float = 14, labels: bool = None,
+                   label_x: float = None, fontsize: float = 10, webgl: bool = None, **kwargs) -> list:
+    """
+    Make Plotly traces of one line per entity: one trace per distinct color, not per entity
+    :param dataframe: pd.DataFrame in long form: one row per entity and x value
+    :param entity: str name of the column of line names
+    :param x: str name of the x column
+    :param y: str name of the y column, e.g. a rank
+    :param color: str name of a column of colors, default Plotly's color sequence
+    :param text: str name of a column of hover text, used as %{text} in a hovertemplate
+    :param markers: bool draw a marker on every point, default up to BUMP_MARKER_POINTS points
+    :param marker_size: float marker size in pixels
+    :param labels: bool write each entity's name at the end of its line, default up to
+                   BUMP_LABEL_LINES lines
+    :param label_x: float x position of the names, default the last x of each line
+    :param fontsize: float font size of the names in pixels
+    :param webgl: bool make go.Scattergl traces, default above WEBGL_POINTS
+    :param kwargs: passed on to every line trace, e.g. hovertemplate
+    :return: list of go.Scatter or go.Scattergl traces: the lines, then the labels
+    """
+    import plotly.graph_objects as go
+    from plotly.colors import qualitative
+    rows, offsets = line_blocks(dataframe[_columns(entity, x, y, color, text)], entity, x)
+    colors = line_colors(rows, offsets, color, qualitative.Plotly)
+    if markers is None:
+        markers = len(rows) <= BUMP_MARKER_POINTS
+    if webgl is None:
+        webgl = len(rows) > WEBGL_POINTS
+    trace = go.Scattergl if webgl else go.Scatter
+    kwargs.setdefault('name', '')
+    kwargs.setdefault('showlegend', False)
+    columns = {name: rows[name].to_numpy() for name in (x, y, text) if name}
+    sizes = np.diff(offsets)
+    traces = []
+    for line_color in pd.unique(colors):
+        # the lines of one color are still contiguous blocks of the sorted rows
+        chosen = colors == line_color
+        part = {name: values[np.repeat(chosen, sizes)] for name, values in columns.items()}
+        part_offsets = np.concatenate([[0], np.cumsum(sizes[chosen])])
+        traces.append(trace(x=with_gaps(part[x], part_offsets), y=with_gaps(part[y], part_offsets),
+                            text=with_gaps(part[text], part_offsets) if text else None,
+                            mode='lines+markers' if markers else 'lines',
+                            marker={'size': marker_size, 'color': line_color},
+                            line={'color': line_color}, **kwargs))
+    if labels is None:
+        labels = len(offsets) - 1 <= BUMP_LABEL_LINES
+    if labels:
+        ends = offsets[1:] - 1
+        label_xs = rows[x].to_numpy()[ends] if label_x is None else np.full(len(ends), label_x)
+        traces.append(trace(x=label_xs, y=rows[y].to_numpy()[ends], text=rows[entity].to_numpy()[offsets[:-1]],
+                            mode='text', textposition='middle right',
+                            textfont={'size': fontsize, 'color': list(colors)},
+                            hoverinfo='skip', showlegend=False))
+    return traces
@@ -0,0 +1,253 @@
+"""
+Load the book's datasets from the local datasets/ folder with an on-disk columnar cache
+
+Each dataset is parsed once and written to the cache as one .npy file per column
+(text columns are stored as integer codes plus their unique values), which is then
+memory-mapped on later loads. The cache is invalidated when the source file's
+modification time and SHA-256 hash both change. If a dataset is not available
+locally it is downloaded once into the cache and read from there afterwards.
+
+The seaborn example datasets (mpg, tips, flights, car_crashes) come back with the
+same categorical dtypes seaborn.load_dataset gives them, without touching the network.
+"""
+import hashlib
+import json
+import os
+import shutil
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_URL = 'https://raw.githubusercontent.com/alexkenan/pyviz/main/datasets/'
+DATASETS_DIR = Path(os.environ.get('PYVIZ_DATASETS',
+                                   Path(__file__).resolve().parents[2] / 'datasets'))
+CACHE_DIR = Path(os.environ.get('PYVIZ_CACHE', DATASETS_DIR / '.cache'))
+CACHE_VERSION = 2
+
+# dataset name -> (file name, keyword arguments for the pandas reader)
+DATASETS = {
+    'alcohol': ('alcohol.csv', {'index_col': 0}),
+    'car_crashes': ('car_crashes.csv', {}),
+    'elect': ('elect.csv', {}),
+    'flights': ('flights.csv', {'index_col': 0, 'dtype': {'month': pd.CategoricalDtype(
+        ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])}}),
+    'jeopardy_dd': ('jeopardy_dd.json', {}),
+    'mpg': ('mpg.csv', {'index_col': 0,
+                        'dtype': {'origin': pd.CategoricalDtype(['usa', 'japan', 'europe'])}}),
+    'predictions': ('predictions.csv', {'names': ['Team', 'Actual', 'Predicted'], 'header': 0}),
+    'prem': ('prem.csv', {'names': ['Matchweek', 'Team', 'Rank'], 'header': 0}),
+    'sat': ('sat.csv', {}),
+    'states': ('states.csv', {'index_col': 0}),
+    'tips': ('tips.csv', {'index_col': 0, 'dtype': {
+        'sex': pd.CategoricalDtype(['Male', 'Female']),
+        'smoker': pd.CategoricalDtype(['Yes', 'No']),
+        'day': pd.CategoricalDtype(['Thur', 'Fri', 'Sat', 'Sun']),
+        'time': pd.CategoricalDtype(['Lunch', 'Dinner'])}}),
+    'tsa_pax': ('tsa_pax.csv', {'names': ['Date', '2020', '2019'], 'header': 0,
+                                'parse_dates': ['Date']}),
+}
+
+
+def dataset_path(filename: str) -> str:
+    """
+    Resolve a dataset file to the local datasets/ copy, falling back to GitHub
+    :param filename: str of the file name inside datasets/, e.g. 'geoJSONstates.json'
+    :return: str of the local path if it exists (in datasets/ or already downloaded
+             into the cache), otherwise the URL to download it from
+    """
+    for local in (DATASETS_DIR / filename, CACHE_DIR / 'downloads' / filename):
+        if local.is_file():
+            return str(local)
+    return REPO_URL + filename
+
+
+def load_json(filename: str):
+    """
+    Load a JSON file (such as the GeoJSON hexmap) from datasets/ without the network
+    :param filename: str of the file name inside datasets/
+    :return: the parsed JSON object
+    """
+    path = dataset_path(filename)
+    if path.startswith('https://'):
+        path = _download(path, filename)
+    with open(path, encoding='utf-8') as infile:
+        return json.load(infile)
+
+
+def load_dataset(name: str, cache: bool = True) -> pd.DataFrame:
+    """
+    Load one of the book's datasets by name, e.g. load_dataset('sat')
+    :param name: str key of DATASETS
+    :param cache: bool whether to read from and write to the columnar cache
+    :return: pd.DataFrame of the parsed dataset
+    """
+    if name not in DATASETS:
+        raise KeyError('Unknown dataset {!r}, choose from {}'.format(name, sorted(DATASETS)))
+    filename, read_kwargs = DATASETS[name]
+    path = dataset_path(filename)
+
+    if not cache:
+        return _read_source(path, read_kwargs)
+    if path.startswith('https://'):
+        path = _download(path, filename)
+
+    source = Path(path)
+    cache_dir = CACHE_DIR / name
+    key = _spec_key(filename, read_kwargs)
+    meta = _read_meta(cache_dir)
+    if meta is not None and meta['key'] == key and _source_unchanged(source, meta, cache_dir):
+        return _read_cache(cache_dir, meta)
+
+    dataframe = _read_source(path, read_kwargs)
+    _write_cache(dataframe, source, cache_dir, key)
+    return dataframe
+
+
+def clear_cache(name: str = None) -> None:
+    """
+    Delete the cached copy of one dataset, or of every dataset
+    :param name: str key of DATASETS, or None for all
+    :return: None
+    """
+    target = CACHE_DIR / name if name else CACHE_DIR
+    shutil.rmtree(target, ignore_errors=True)
+
+
+def _download(url: str, filename: str) -> str:
+    """
+    Fetch a missing dataset once so every later run can work offline
+    """
+    target = CACHE_DIR / 'downloads' / filename
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name('{}.tmp{}'.format(filename, os.getpid()))
+    with urllib.request.urlopen(url) as response, open(tmp, 'wb') as outfile:
+        shutil.copyfileobj(response, outfile)
+    os.replace(tmp, target)
+    return str(target)
+
+
+def _read_source(path: str, read_kwargs: dict) -> pd.DataFrame:
+    if path.endswith('.json'):
+        return pd.read_json(path, **read_kwargs)
+    return pd.read_csv(path, **read_kwargs)
+
+
+def _spec_key(filename: str, read_kwargs: dict) -> str:
+    spec = json.dumps([CACHE_VERSION, filename, read_kwargs], sort_keys=True, default=repr)
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as infile:
+        for block in iter(lambda: infile.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_meta(cache_dir: Path):
+    try:
+        with open(cache_dir / 'meta.json', encoding='utf-8') as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        return None
+
+
+def _source_unchanged(source: Path, meta: dict, cache_dir: Path) -> bool:
+    """
+    A matching mtime and size is trusted outright. Otherwise the file is hashed, and
+    if only the timestamp moved (a fresh checkout, a copy) the cache is kept.
+    """
+    stat = source.stat()
+    if stat.st_mtime_ns == meta['mtime_ns'] and stat.st_size == meta['size']:
+        return True
+    if stat.st_size != meta['size'] or _file_hash(source) != meta['sha256']:
+        return False
+    meta['mtime_ns'] = stat.st_mtime_ns
+    _write_meta(cache_dir, meta)
+    return True
+
+
+def _write_meta(cache_dir: Path, meta: dict) -> None:
+    tmp = cache_dir / 'meta.json.tmp{}'.format(os.getpid())
+    with open(tmp, 'w', encoding='utf-8') as outfile:
+        json.dump(meta, outfile)
+    os.replace(tmp, cache_dir / 'meta.json')
+
+
+def _write_cache(dataframe: pd.DataFrame, source: Path, cache_dir: Path, key: str) -> None:
+    """
+    Write each column to its own .npy file. Text columns become integer codes plus a
+    list of unique values. Frames holding anything else are simply not cached.
+    """
+    frame = dataframe
+    has_index = not dataframe.index.equals(pd.RangeIndex(len(dataframe)))
+    if has_index:
+        frame = frame.reset_index(names='__index__')
+
+    columns = []
+    arrays = []
+    for position, (column, series) in enumerate(frame.items()):
+        entry = {'name': column, 'file': '{}.npy'.format(position), 'dtype': str(series.dtype)}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.cat.categories
+            entry['kind'] = 'category'
+            entry['ordered'] = bool(series.cat.ordered)
+            codes = series.cat.codes.to_numpy()
+        elif series.dtype.kind in 'biufcmM':
+            entry['kind'] = 'array'
+            arrays.append(series.to_numpy())
+            columns.append(entry)
+            continue
+        else:
+            entry['kind'] = 'text'
+            codes, values = pd.factorize(series)
+        if not all(isinstance(value, str) for value in values):
+            return
+        entry['values'] = list(values)
+        arrays.append(np.asarray(codes, dtype=np.int32))
+        columns.append(entry)
+
+    stat = source.stat()
+    meta = {'key': key, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+            'sha256': _file_hash(source), 'has_index': has_index,
+            'index_name': dataframe.index.name, 'columns': columns}
+
+    tmp_dir = cache_dir.with_name('{}.tmp{}'.format(cache_dir.name, os.getpid()))
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    try:
+        tmp_dir.mkdir(parents=True)
+        for entry, array in zip(columns, arrays):
+            np.save(tmp_dir / entry['file'], array, allow_pickle=False)
+        with open(tmp_dir / 'meta.json', 'w', encoding='utf-8') as outfile:
+            json.dump(meta, outfile)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.replace(tmp_dir, cache_dir)
+    except OSError:
+        # a read-only or full disk just means no cache, not a failed load
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _read_cache(cache_dir: Path, meta: dict) -> pd.DataFrame:
+    data = {}
+    for entry in meta['columns']:
+        array = np.load(cache_dir / entry['file'], mmap_mode='c', allow_pickle=False)
+        if entry['kind'] == 'array':
+            data[entry['name']] = np.asarray(array)
+        elif entry['kind'] == 'category':
+            data[entry['name']] = pd.Categorical.from_codes(array, entry['values'],
+                                                            ordered=entry['ordered'])
+        else:
+            values = pd.array(entry['values'] + [None], dtype=entry['dtype'])
+            data[entry['name']] = values.take(np.where(array < 0, len(entry['values']), array))
+
+    # copy=False keeps the numeric columns backed by the memory-mapped files; mmap_mode
+    # 'c' makes them copy-on-write so in-place edits never reach the cache on disk
+    dataframe = pd.DataFrame(data, columns=[entry['name'] for entry in meta['columns']],
+                             copy=False)
+    if meta['has_index']:
+        dataframe = dataframe.set_index('__index__')
+        dataframe.index.name = meta['index_name']
+    return dataframe
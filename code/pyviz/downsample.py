@@ -0,0 +1,209 @@
+"""
+Downsample long line series to what the screen can actually show
+
+A line chart can't show more points than it has pixels, so a series with millions of
+points is reduced to a few thousand that keep its visual shape:
+    lttb   - Largest-Triangle-Three-Buckets: one point per bucket, the one that forms the
+             largest triangle with its neighbours; keeps peaks and the overall shape
+    minmax - the lowest and highest point of every bucket; never hides a spike
+Both expect x to be sorted; downsample_indices() and the plotting helpers sort x first
+when it isn't, e.g. for a table stored newest first. The Matplotlib and Plotly helpers
+keep the full series and downsample again for the visible x range whenever the user
+zooms or pans.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_POINTS = 2000
+
+
+def _as_numeric(values) -> np.ndarray:
+    """
+    Turn x values (numbers or datetimes) into floats, for the triangle areas and for searching
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        return values.astype('datetime64[ns]').view(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def _x_order(x):
+    """
+    :return: np.ndarray of the positions that sort x, or None when x is sorted already
+    """
+    positions = _as_numeric(x)
+    if np.all(positions[1:] >= positions[:-1]):
+        return None
+    return np.argsort(positions, kind='stable')
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """
+    Pick the points to keep with Largest-Triangle-Three-Buckets
+    :param x: array of sorted x values
+    :param y: array of y values
+    :param n_out: int number of points to keep
+    :return: np.ndarray of int positions of the points to keep, in order
+    """
+    x, y = _as_numeric(x), _as_numeric(y)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # the first and last points are always kept; the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        keep[bucket + 1] = previous
+    return keep
+
+
+def minmax(x, y, n_out: int) -> np.ndarray:
+    """
+    Pick the lowest and highest point of each bucket
+    :param x: array of sorted x values
+    :param y: array of y values
+    :param n_out: int number of points to keep, two per bucket
+    :return: np.ndarray of int positions of the points to keep, in order
+    """
+    y = _as_numeric(y)
+    n = len(y)
+    buckets = max(1, n_out // 2)
+    if n_out >= n or n == 0:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts, sizes = edges[:-1], np.diff(edges)
+    bucket_of = np.repeat(np.arange(buckets), sizes)
+    keep = [np.array([0, n - 1])]
+    for extreme in (np.fmin.reduceat(y, starts), np.fmax.reduceat(y, starts)):
+        hits = np.flatnonzero(y == extreme[bucket_of])
+        # the first hit in each bucket; buckets that are all NaN have none
+        _, first = np.unique(bucket_of[hits], return_index=True)
+        keep.append(hits[first])
+    return np.unique(np.concatenate(keep))
+
+
+METHODS = {'lttb': lttb, 'minmax': minmax}
+
+
+def downsample_indices(x, y, n_out: int = DEFAULT_POINTS, method: str = 'lttb',
+                       x_range: tuple = None) -> np.ndarray:
+    """
+    Pick the points to draw, optionally only inside the visible x range
+    :param x: array of x values, sorted or not
+    :param y: array of y values
+    :param n_out: int number of points to keep
+    :param method: str 'lttb' or 'minmax'
+    :param x_range: tuple of (low, high) x values in the same units as x, or None for all
+    :return: np.ndarray of int positions of the points to keep, in order of x
+    """
+    if method not in METHODS:
+        raise ValueError('method must be one of {}, not {!r}'.format(', '.join(METHODS), method))
+    order = _x_order(x)
+    if order is not None:
+        return order[downsample_indices(np.asarray(x)[order], np.asarray(y)[order], n_out, method, x_range)]
+    start, stop = 0, len(x)
+    if x_range is not None:
+        positions = _as_numeric(x)
+        if np.asarray(x).dtype.kind == 'M':
+            # datetimes come back from Plotly as strings like '2020-03-01 12:00:00.5'
+            x_range = np.array([pd.Timestamp(value).to_datetime64() for value in x_range])
+        low, high = _as_numeric(x_range)
+        # keep one point either side so the line runs off the edges instead of stopping short
+        start = max(0, int(np.searchsorted(positions, low, side='left')) - 1)
+        stop = min(len(x), int(np.searchsorted(positions, high, side='right')) + 1)
+    x_view = np.asarray(x)[start:stop]
+    y_view = np.asarray(y)[start:stop]
+    return start + METHODS[method](x_view, y_view, n_out)
+
+
+def downsample_frame(dataframe: pd.DataFrame, x: str, y: str, method: str = 'lttb',
+                     n_out: int = DEFAULT_POINTS) -> pd.DataFrame:
+    """
+    Keep only the rows needed to draw y against x
+    :param dataframe: pd.DataFrame
+    :param x: str name of the x column
+    :param y: str name of the y column
+    :param method: str 'lttb' or 'minmax'
+    :param n_out: int number of rows to keep
+    :return: pd.DataFrame of at most n_out rows (two per bucket for 'minmax'), sorted by x
+    """
+    keep = downsample_indices(dataframe[x].to_numpy(), dataframe[y].to_numpy(), n_out, method)
+    return dataframe.iloc[keep]
+
+
+def plot_downsampled(axis, x, y, method: str = 'lttb', n_out: int = None, **kwargs):
+    """
+    Plot a long series on a Matplotlib axis, downsampled to the axis width
+    The full series is kept; zooming or panning re-draws the visible part at full detail.
+    :param axis: matplotlib Axes to draw on
+    :param x: array or pd.Series of x values (numbers or datetimes), sorted or not
+    :param y: array or pd.Series of y values
+    :param method: str 'lttb' or 'minmax'
+    :param n_out: int points to draw, default two per pixel of the axis width
+    :param kwargs: passed on to axis.plot
+    :return: matplotlib Line2D
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    order = _x_order(x)
+    if order is not None:
+        # sorted once here, so every zoom can search the x values
+        x, y = x[order], y[order]
+
+    def points() -> int:
+        return n_out or max(3, 2 * int(axis.get_window_extent().width))
+
+    keep = downsample_indices(x, y, points(), method)
+    line, = axis.plot(x[keep], y[keep], **kwargs)
+    # the axis positions of every x, in the axis' own units (days for dates)
+    positions = np.asarray(axis.xaxis.convert_units(x), dtype=np.float64)
+
+    def update(changed_axis) -> None:
+        low, high = changed_axis.get_xlim()
+        start = max(0, int(np.searchsorted(positions, low, side='left')) - 1)
+        stop = min(len(x), int(np.searchsorted(positions, high, side='right')) + 1)
+        visible = start + METHODS[method](positions[start:stop], y[start:stop], points())
+        line.set_data(x[visible], y[visible])
+
+    axis.callbacks.connect('xlim_changed', update)
+    return line
+
+
+def resample_on_zoom(figure, series: list, method: str = 'lttb', n_out: int = DEFAULT_POINTS):
+    """
+    Make a Plotly figure re-downsample its traces for the visible x range
+    This needs a live Python kernel (Jupyter) and the optional anywidget package; without
+    them the figure is returned as it is, with the points it was built with.
+    :param figure: plotly Figure whose first traces show the downsampled series
+    :param series: list of (x, y) tuples with the full data, one per trace, in trace order
+    :param method: str 'lttb' or 'minmax'
+    :param n_out: int points to draw per trace
+    :return: plotly FigureWidget, or the figure unchanged
+    """
+    import plotly.graph_objects as go
+    try:
+        widget = go.FigureWidget(figure)
+    except ImportError:
+        return figure
+    full = []
+    for x, y in series:
+        x, y = np.asarray(x), np.asarray(y)
+        order = _x_order(x)
+        full.append((x, y) if order is None else (x[order], y[order]))
+
+    def update(layout, x_range) -> None:
+        with widget.batch_update():
+            for trace, (x, y) in zip(widget.data, full):
+                keep = downsample_indices(x, y, n_out, method, x_range=x_range)
+                trace.x, trace.y = x[keep], y[keep]
+
+    widget.layout.on_change(update, 'xaxis.range')
+    return widget
@@ -0,0 +1,128 @@
+"""
+Dumbbell (Cleveland dot) charts of many rows, drawn with a handful of artists
+
+A dumbbell chart joins two values of each row, e.g. a predicted and an actual place.
+Drawing it row by row takes a line, two markers and up to three annotations per row.
+Here the rows are arrays:
+    - Matplotlib: one LineCollection for every segment, one scatter per end, and one
+      PathCollection each for the values and the names
+    - Plotly: one trace for every segment (NaN gaps between them) and one marker trace
+      per end, whose values are written by a texttemplate, plus one text trace of names
+
+Rows whose two values are the same get no segment and only the start marker.
+
+    mpl_dumbbell(plt.gca(), preds['Actual'], preds['Predicted'], preds['Actual'], names=preds['Team'])
+"""
+import numpy as np
+
+from pyviz.scatter import WEBGL_POINTS
+
+# above this many rows the markers are too small to write values in, so none are written
+DUMBBELL_LABEL_ROWS = 200
+
+
+def dumbbell_segments(start, end, y) -> tuple:
+    """
+    Join the two ends of every row, for a single Plotly trace: start, end, gap, start, ...
+    :param start: array of start values
+    :param end: array of end values
+    :param y: array of the y position of each row
+    :return: tuple of (np.ndarray x, np.ndarray y), three values per row
+    """
+    start, end, y = (np.asarray(column, dtype=np.float64) for column in (start, end, y))
+    gap = np.full(len(start), np.nan)
+    return np.column_stack([start, end, gap]).ravel(), np.column_stack([y, y, gap]).ravel()
+
+
+def mpl_dumbbell(axis, start, end, y, names=None, start_color: str = 'C0', end_color: str = 'C1',
+                 line_color: str = 'gray', marker_size: float = 11, values: bool = None,
+                 fmt: str = '{:g}', fontsize: float = 7, name_color: str = 'black'):
+    """
+    Draw a dumbbell chart on a Matplotlib axis
+    :param axis: matplotlib Axes to draw on
+    :param start: array of start values, drawn on top
+    :param end: array of end values
+    :param y: array of the y position of each row
+    :param names: array of row names written after the larger end, or None
+    :param start_color: str color of the start markers
+    :param end_color: str color of the end markers
+    :param line_color: str color of the segments
+    :param marker_size: float marker diameter in points, as plt.plot's markersize
+    :param values: bool write each value inside its marker, default up to DUMBBELL_LABEL_ROWS rows
+    :param fmt: str format of the values
+    :param fontsize: float font size in points
+    :param name_color: str color of the names
+    :return: matplotlib LineCollection of the segments
+    """
+    from matplotlib.collections import LineCollection
+    from pyviz.labels import mpl_text_labels
+    start, end, y = (np.asarray(column, dtype=np.float64) for column in (start, end, y))
+    differs = start != end
+    segments = np.stack([np.column_stack([start, y]), np.column_stack([end, y])], axis=1)[differs]
+    lines = LineCollection(segments, colors=line_color, zorder=2)
+    axis.add_collection(lines)
+    area = marker_size ** 2
+    axis.scatter(end[differs], y[differs], s=area, color=end_color, zorder=2)
+    axis.scatter(start, y, s=area, color=start_color, zorder=2)
+    if values is None:
+        values = len(start) <= DUMBBELL_LABEL_ROWS
+    if values:
+        x = np.concatenate([start, end[differs]])
+        mpl_text_labels(axis, x, np.concatenate([y, y[differs]]), [fmt.format(value) for value in x],
+                        size=fontsize, colors='white', ha='center', va='center', zorder=3)
+    if names is not None:
+        # just past the marker of the larger end
+        mpl_text_labels(axis, np.maximum(start, end), y, list(names), size=fontsize, colors=name_color,
+                        va='center', offset=(marker_size / 2 + 3, 0), zorder=3)
+    axis.autoscale_view()
+    return lines
+
+
+def go_dumbbell_traces(start, end, y, names=None, start_color: str = '#1f77b4', end_color: str = '#ff7f0e',
+                       line_color: str = 'gray', marker_size: float = 18, values: bool = None,
+                       fmt: str = None, fontsize: float = 10, webgl: bool = None, **kwargs) -> list:
+    """
+    Make the Plotly traces of a dumbbell chart
+    :param start: array of start values, drawn on top
+    :param end: array of end values
+    :param y: array of the y position of each row
+    :param names: array of row names written after the larger end and used as %{text} in
+                  the hovertemplate, or None
+    :param start_color: str color of the start markers
+    :param end_color: str color of the end markers
+    :param line_color: str color of the segments
+    :param marker_size: float marker size in pixels
+    :param values: bool write each value inside its marker, default up to DUMBBELL_LABEL_ROWS rows
+    :param fmt: str d3 format of the values, e.g. '.1f', default Plotly's own number format
+    :param fontsize: float font size in pixels
+    :param webgl: bool make go.Scattergl traces, default above WEBGL_POINTS
+    :param kwargs: passed on to both marker traces, e.g. hovertemplate
+    :return: list of go.Scatter or go.Scattergl traces: segments, end markers, start markers, names
+    """
+    import plotly.graph_objects as go
+    start, end, y = (np.asarray(column, dtype=np.float64) for column in (start, end, y))
+    names = None if names is None else np.asarray(names, dtype=object)
+    if webgl is None:
+        webgl = 3 * len(start) > WEBGL_POINTS
+    if values is None:
+        values = len(start) <= DUMBBELL_LABEL_ROWS
+    trace = go.Scattergl if webgl else go.Scatter
+    kwargs.setdefault('name', '')
+    kwargs.setdefault('showlegend', False)
+    differs = start != end
+    segment_x, segment_y = dumbbell_segments(start[differs], end[differs], y[differs])
+    text = {'mode': 'markers+text', 'texttemplate': '%{{x:{}}}'.format(fmt) if fmt else '%{x}',
+            'textposition': 'middle center', 'textfont': {'size': fontsize, 'color': 'white'}} \
+        if values else {'mode': 'markers'}
+    traces = [trace(x=segment_x, y=segment_y, mode='lines', line={'color': line_color},
+                    hoverinfo='skip', name='', showlegend=False),
+              trace(x=end[differs], y=y[differs], text=None if names is None else names[differs],
+                    marker={'size': marker_size, 'color': end_color}, **text, **kwargs),
+              trace(x=start, y=y, text=names, marker={'size': marker_size, 'color': start_color},
+                    **text, **kwargs)]
+    if names is not None:
+        # an invisible marker as big as the real ones pushes the names clear of them
+        traces.append(trace(x=np.maximum(start, end), y=y, text=names, mode='markers+text',
+                            marker={'size': marker_size, 'opacity': 0}, textposition='middle right',
+                            textfont={'size': fontsize, 'color': 'black'}, hoverinfo='skip', showlegend=False))
+    return traces
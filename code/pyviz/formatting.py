@@ -0,0 +1,103 @@
+"""
+Labels and hover text for whole columns at once
+
+Building a label with DataFrame.apply(..., axis=1) calls a Python function on every row
+and builds a Series for each one. These helpers work on whole columns: the choices are
+made with np.select and Series.map, numbers are formatted in one pass over a plain list
+of floats, and the pieces are glued together with vectorized string concatenation.
+
+    df['Readable'] = join_text(df['State'], '<br>Population ', scaled_numbers(df['Population']))
+
+For Plotly the formatting can also be left to the browser: pass scale_units() results
+as customdata and format them in a hovertemplate, e.g. '%{customdata[0]:.1f}%{customdata[1]}'.
+"""
+import numpy as np
+import pandas as pd
+
+# (threshold, suffix) from the largest unit down; smaller values use the last one
+UNITS = ((1e9, 'B'), (1e6, 'M'), (1e3, 'K'))
+
+
+def join_text(*parts) -> pd.Series:
+    """
+    Concatenate columns and fixed strings row by row, like '{}{}'.format over every row
+    :param parts: pd.Series, arrays, or str (repeated on every row), in order
+    :return: pd.Series of str, with the index of the first pd.Series among the parts
+    """
+    index = next((part.index for part in parts if isinstance(part, pd.Series)), None)
+    text = ''
+    for part in parts:
+        if not isinstance(part, str):
+            part = pd.Series(np.asarray(part), index=index).astype(str)
+        text = text + part
+    if isinstance(text, str):
+        raise ValueError('join_text needs at least one column')
+    return text
+
+
+def ordinal_suffixes(numbers) -> np.ndarray:
+    """
+    The English ordinal suffix of each whole number: st, nd, rd or th (11th, 12th, 13th)
+    :param numbers: array or pd.Series of int
+    :return: np.ndarray of str
+    """
+    numbers = np.abs(np.asarray(numbers, dtype=np.int64))
+    last, tens = numbers % 10, numbers % 100
+    teen = (tens >= 11) & (tens <= 13)
+    return np.select([~teen & (last == 1), ~teen & (last == 2), ~teen & (last == 3)],
+                     ['st', 'nd', 'rd'], default='th')
+
+
+def ordinals(numbers) -> pd.Series:
+    """
+    Write whole numbers as ordinals: 1st, 2nd, 3rd, 4th, ...
+    :param numbers: array or pd.Series of int
+    :return: pd.Series of str
+    """
+    numbers = numbers if isinstance(numbers, pd.Series) else pd.Series(numbers)
+    return join_text(numbers.astype(np.int64), ordinal_suffixes(numbers))
+
+
+def scale_units(values, units: tuple = UNITS) -> tuple:
+    """
+    Scale each number by the largest unit it reaches
+    :param values: array or pd.Series of numbers
+    :param units: tuple of (threshold, suffix) pairs from the largest unit down; values
+                  below every threshold use the last one
+    :return: tuple of (np.ndarray of scaled floats, np.ndarray of str suffixes)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    magnitude = np.abs(values)
+    conditions = [magnitude >= threshold for threshold, _ in units[:-1]]
+    divisors = np.select(conditions, [threshold for threshold, _ in units[:-1]], default=units[-1][0])
+    suffixes = np.select(conditions, [suffix for _, suffix in units[:-1]], default=units[-1][1])
+    return values / divisors, suffixes
+
+
+def scaled_numbers(values, decimals: int = 1, units: tuple = UNITS) -> np.ndarray:
+    """
+    Write numbers with a unit suffix: 12.3M, 456.7K
+    :param values: array or pd.Series of numbers
+    :param decimals: int decimals to keep
+    :param units: tuple of (threshold, suffix) pairs, see scale_units()
+    :return: np.ndarray of str objects
+    """
+    scaled, suffixes = scale_units(values, units)
+    # a list comprehension over floats formats about twice as fast as np.char.mod
+    text = np.array(['%.*f' % (decimals, value) for value in scaled.tolist()], dtype=object)
+    return text + suffixes.astype(object)
+
+
+def lookup(keys, mapping: dict, default=None) -> pd.Series:
+    """
+    Look up a value (such as a color) for every row
+    :param keys: pd.Series or array of keys
+    :param mapping: dict of key to value
+    :param default: value for keys missing from the mapping
+    :return: pd.Series of values, with the index of `keys` if it is a pd.Series
+    """
+    keys = keys if isinstance(keys, pd.Series) else pd.Series(keys)
+    values = keys.map(mapping)
+    if default is not None:
+        values = values.where(keys.isin(mapping.keys()), default)
+    return values
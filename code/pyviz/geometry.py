@@ -0,0 +1,270 @@
+"""
+GeoJSON polygons parsed once, stored as quantized arrays, and simplified per zoom level
+
+Choropleths carry their whole geometry: parsing a large GeoJSON file on every run is
+slow, and Plotly writes every coordinate into every figure that uses it. A Geometry
+keeps the polygons of a FeatureCollection as flat NumPy arrays:
+    points   - every coordinate, quantized to integers on a 2**20 grid over the bounds
+    rings    - where each ring starts in points
+    polygons - where each polygon (exterior ring, then holes) starts in rings
+    features - where each feature starts in polygons
+plus the feature properties. load_geometry() writes those arrays to the dataset cache
+the first time and memory-maps them afterwards.
+
+simplify(zoom) snaps the points to the grid of one screen pixel at a web map zoom level
+and drops the points that land on the one before them, so each level of detail only
+keeps what can be seen at that zoom. geometry_asset() writes a level as one GeoJSON file
+that any number of Plotly figures can load by URL instead of each carrying a copy.
+
+    states = load_geometry('geoJSONstates.json')
+    fig = px.choropleth_map(df, geojson=states.geojson(zoom=4.2), ...)
+"""
+import hashlib
+import json
+import math
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from pyviz.datasets import CACHE_DIR, _download, _file_hash, dataset_path
+
+GEOMETRY_DIR = CACHE_DIR / 'geometry'
+QUANTIZATION = 1 << 20
+# part of every asset's file name; bump it when simplify() or geojson() change their output
+ASSET_VERSION = 1
+
+# per-process cache, so figures in the same run share one parsed geometry
+_geometries = {}
+
+
+class Geometry:
+    """
+    The polygons and properties of a GeoJSON FeatureCollection as quantized arrays
+    """
+
+    def __init__(self, points, rings, polygons, features, bounds: tuple, properties: list,
+                 quantization: int = QUANTIZATION):
+        self.points = points
+        self.rings = rings
+        self.polygons = polygons
+        self.features = features
+        self.bounds = tuple(bounds)
+        self.properties = properties
+        self.quantization = quantization
+
+    @classmethod
+    def from_geojson(cls, collection: dict, quantization: int = QUANTIZATION) -> 'Geometry':
+        """
+        Parse the Polygon and MultiPolygon features of a GeoJSON FeatureCollection
+        :param collection: dict of the parsed GeoJSON
+        :param quantization: int number of grid steps across the bounds
+        :return: Geometry
+        """
+        coordinates, ring_sizes, polygon_sizes, feature_sizes, properties = [], [], [], [], []
+        for feature in collection['features']:
+            geometry = feature.get('geometry') or {'type': 'MultiPolygon', 'coordinates': []}
+            if geometry['type'] == 'Polygon':
+                parts = [geometry['coordinates']]
+            elif geometry['type'] == 'MultiPolygon':
+                parts = geometry['coordinates']
+            else:
+                raise ValueError('only Polygon and MultiPolygon features can be stored, not {}'.format(
+                    geometry['type']))
+            for polygon in parts:
+                for ring in polygon:
+                    coordinates.extend(point[:2] for point in ring)
+                    ring_sizes.append(len(ring))
+                polygon_sizes.append(len(polygon))
+            feature_sizes.append(len(parts))
+            properties.append(feature.get('properties') or {})
+        points = np.array(coordinates, dtype=np.float64).reshape(-1, 2)
+        low, high = points.min(axis=0), points.max(axis=0)
+        span = np.where(high > low, high - low, 1)
+        quantized = np.round((points - low) / span * (quantization - 1)).astype(np.int32)
+        return cls(quantized, _offsets(ring_sizes), _offsets(polygon_sizes), _offsets(feature_sizes),
+                   (low[0], low[1], high[0], high[1]), properties, quantization)
+
+    @property
+    def step(self) -> np.ndarray:
+        """
+        :return: np.ndarray of the x and y size of one grid step
+        """
+        x0, y0, x1, y1 = self.bounds
+        span = np.array([x1 - x0, y1 - y0])
+        return np.where(span > 0, span, 1) / (self.quantization - 1)
+
+    def coordinates(self) -> np.ndarray:
+        """
+        :return: np.ndarray of shape (n, 2) of every point in the original units
+        """
+        return self.bounds[:2] + self.points * self.step
+
+    def simplify(self, zoom: float) -> 'Geometry':
+        """
+        Keep only the detail that shows at a web map zoom level (256 pixel tiles, degrees)
+        Rings that shrink below a triangle are dropped, and so are polygons whose outer
+        ring does, unless that would leave a feature with nothing to draw.
+        :param zoom: float zoom level; one pixel is 360 / (256 * 2**zoom) degrees
+        :return: Geometry with fewer points
+        """
+        pixel = 360 / (256 * 2 ** zoom)
+        grid = np.maximum(1, np.floor(pixel / self.step)).astype(np.int64)
+        snapped = (np.round(self.points / grid) * grid).astype(np.int32)
+        ring_of = np.repeat(np.arange(len(self.rings) - 1), np.diff(self.rings))
+        starts = np.zeros(len(snapped), dtype=bool)
+        starts[self.rings[:-1][np.diff(self.rings) > 0]] = True
+        # drop points that snapped onto the point before them in the same ring
+        keep = starts | np.any(snapped != np.roll(snapped, 1, axis=0), axis=1)
+        ring_sizes = np.bincount(ring_of[keep], minlength=len(self.rings) - 1)
+        ring_ok = ring_sizes >= 4
+
+        # a polygon stays if its outer ring does; a feature whose polygons would all go
+        # keeps them unsnapped, so it still shows up
+        polygon_of = np.repeat(np.arange(len(self.polygons) - 1), np.diff(self.polygons))
+        feature_of = np.repeat(np.arange(len(self.features) - 1), np.diff(self.features))
+        exterior_ok = ring_ok[self.polygons[:-1]]
+        shown = np.bincount(feature_of, weights=exterior_ok, minlength=len(self.features) - 1)
+        polygon_lost = shown[feature_of] == 0
+        polygon_keep = exterior_ok | polygon_lost
+        ring_lost = polygon_lost[polygon_of]
+        ring_keep = (ring_ok & exterior_ok[polygon_of]) | ring_lost
+        point_lost = ring_lost[ring_of]
+        point_keep = ring_keep[ring_of] & (keep | point_lost)
+        points = np.where(point_lost[:, np.newaxis], self.points, snapped)[point_keep]
+        new_ring_sizes = np.where(ring_lost, np.diff(self.rings), ring_sizes)[ring_keep]
+        polygon_rings = np.bincount(polygon_of[ring_keep], minlength=len(self.polygons) - 1)[polygon_keep]
+        feature_sizes = np.bincount(feature_of[polygon_keep], minlength=len(self.features) - 1)
+        return Geometry(points, _offsets(new_ring_sizes), _offsets(polygon_rings), _offsets(feature_sizes),
+                        self.bounds, self.properties, self.quantization)
+
+    def geojson(self, zoom: float = None, decimals: int = None) -> dict:
+        """
+        Build a GeoJSON FeatureCollection, optionally simplified for a zoom level
+        :param zoom: float web map zoom level to simplify for, or None for full detail
+        :param decimals: int decimals to round the coordinates to, default as many as the
+                         level of detail needs
+        :return: dict of the GeoJSON
+        """
+        geometry = self.simplify(zoom) if zoom is not None else self
+        if decimals is None:
+            smallest = 360 / (256 * 2 ** zoom) if zoom is not None else float(self.step.min())
+            decimals = max(0, int(math.ceil(-math.log10(smallest))) + 1)
+        rings = np.split(np.round(geometry.coordinates(), decimals), geometry.rings[1:-1])
+        polygons = [[ring.tolist() for ring in rings[start:stop]]
+                    for start, stop in zip(geometry.polygons[:-1], geometry.polygons[1:])]
+        features = []
+        for number, (start, stop) in enumerate(zip(geometry.features[:-1], geometry.features[1:])):
+            parts = polygons[start:stop]
+            shape = {'type': 'Polygon', 'coordinates': parts[0]} if len(parts) == 1 else \
+                {'type': 'MultiPolygon', 'coordinates': parts}
+            features.append({'type': 'Feature', 'properties': self.properties[number], 'geometry': shape})
+        return {'type': 'FeatureCollection', 'features': features}
+
+    def save(self, directory: Path) -> None:
+        """
+        Write the arrays and properties to a folder
+        :param directory: Path of the folder to (re)create
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ('points', 'rings', 'polygons', 'features'):
+            np.save(directory / '{}.npy'.format(name), getattr(self, name), allow_pickle=False)
+        with open(directory / 'geometry.json', 'w', encoding='utf-8') as outfile:
+            json.dump({'bounds': [float(value) for value in self.bounds], 'properties': self.properties,
+                       'quantization': self.quantization}, outfile)
+
+    @classmethod
+    def load(cls, directory: Path) -> 'Geometry':
+        """
+        Read a Geometry written by save(), memory-mapping the arrays
+        :param directory: Path of the folder
+        :return: Geometry
+        """
+        directory = Path(directory)
+        with open(directory / 'geometry.json', encoding='utf-8') as infile:
+            meta = json.load(infile)
+        arrays = [np.load(directory / '{}.npy'.format(name), mmap_mode='r', allow_pickle=False)
+                  for name in ('points', 'rings', 'polygons', 'features')]
+        return cls(*arrays, meta['bounds'], meta['properties'], meta['quantization'])
+
+    def __len__(self) -> int:
+        return len(self.features) - 1
+
+    def __repr__(self) -> str:
+        return 'Geometry({} features, {} rings, {} points)'.format(
+            len(self), len(self.rings) - 1, len(self.points))
+
+
+def _offsets(sizes) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)])
+
+
+def load_geometry(filename: str, cache: bool = True) -> Geometry:
+    """
+    Load a GeoJSON file from datasets/ as a Geometry, parsing it only the first time
+    :param filename: str of the file name inside datasets/, e.g. 'geoJSONstates.json'
+    :param cache: bool whether to read from and write to the on-disk cache
+    :return: Geometry
+    """
+    if filename in _geometries:
+        return _geometries[filename]
+    path = dataset_path(filename)
+    if path.startswith('https://'):
+        path = _download(path, filename)
+    source = Path(path)
+    cache_dir = GEOMETRY_DIR / source.stem
+    digest = _file_hash(source) if cache else None
+    try:
+        with open(cache_dir / 'source.json', encoding='utf-8') as infile:
+            cached = json.load(infile)['sha256'] == digest
+    except (OSError, ValueError, KeyError):
+        cached = False
+    if cache and cached:
+        geometry = Geometry.load(cache_dir)
+    else:
+        with open(source, encoding='utf-8') as infile:
+            geometry = Geometry.from_geojson(json.load(infile))
+        if cache:
+            tmp_dir = cache_dir.with_name('{}.tmp{}'.format(cache_dir.name, os.getpid()))
+            try:
+                geometry.save(tmp_dir)
+                with open(tmp_dir / 'source.json', 'w', encoding='utf-8') as outfile:
+                    json.dump({'sha256': digest}, outfile)
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                os.replace(tmp_dir, cache_dir)
+            except OSError:
+                # a read-only or full disk just means no cache, not a failed load
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+    _geometries[filename] = geometry
+    return geometry
+
+
+def geometry_asset(filename: str, directory: str, zoom: float = None) -> str:
+    """
+    Write one level of detail of a geometry as a GeoJSON file for figures to share
+    Pass the returned name as the geojson of a Plotly trace to have the browser fetch it,
+    instead of writing the geometry into the figure. The figure and the file have to be
+    served from the same web server; browsers don't fetch files for pages opened from disk.
+    :param filename: str of the GeoJSON file name inside datasets/
+    :param directory: str folder the figures' HTML files are written to
+    :param zoom: float web map zoom level to simplify for, or None for full detail
+    :return: str name of the written file, relative to `directory`
+    """
+    path = dataset_path(filename)
+    if path.startswith('https://'):
+        path = _download(path, filename)
+    # named after the source's contents, so a changed source or simplification gets a new
+    # file instead of an old one being served
+    digest = hashlib.sha256('{}:{}:{}'.format(_file_hash(Path(path)), QUANTIZATION, ASSET_VERSION)
+                            .encode('utf-8')).hexdigest()
+    name = '{}{}-{}.json'.format(Path(filename).stem, '' if zoom is None else '-z{:g}'.format(zoom), digest[:12])
+    target = Path(directory) / name
+    if not target.is_file():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name('{}.tmp{}'.format(name, os.getpid()))
+        with open(tmp, 'w', encoding='utf-8') as outfile:
+            json.dump(load_geometry(filename).geojson(zoom), outfile, separators=(',', ':'))
+        os.replace(tmp, target)
+    return name
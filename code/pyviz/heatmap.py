@@ -0,0 +1,165 @@
+"""
+Heatmaps from keyed or long-form data, with cell labels that are only drawn when they fit
+
+array_from_keys() and array_from_long() fill a dense NumPy array in one vectorized
+assignment, instead of indexing every key by hand. The cell labels are written as one
+artist: a Matplotlib PathCollection (pyviz.labels.mpl_text_labels) whose label colors come
+from the colormap, white on dark cells and black on light ones, or a Plotly texttemplate,
+where Plotly picks the contrasting color itself. Labels are dropped altogether when a
+cell is smaller than its label, as in a 2000 x 2000 correlation matrix, where a label per
+cell would only be noise that takes minutes to draw. Matrices too big to load at all are
+drawn through pyviz.pyramid instead.
+
+    array = array_from_keys(daily_doubles, (5, 6))
+    image = mpl_annotated_heatmap(plt.gca(), array * 100, fmt='{:.2f}%', cmap='Blues')
+"""
+import numpy as np
+import pandas as pd
+
+# a digit is a little over half as wide as the font size
+CHARACTER_WIDTH = 0.6
+
+
+def array_from_keys(mapping: dict, shape: tuple, fill=np.nan) -> np.ndarray:
+    """
+    Lay out keyed values as a dense array
+    :param mapping: dict or pd.Series of key to value; keys are flat (row-major) cell
+                    numbers, which may be str like '12', or (row, column) tuples
+    :param shape: tuple of (rows, columns)
+    :param fill: value of cells without a key
+    :return: np.ndarray of float of the given shape
+    """
+    array = np.full(shape[0] * shape[1], fill, dtype=np.float64)
+    if isinstance(mapping, pd.Series):
+        keys, values = list(mapping.index), mapping.to_numpy(dtype=np.float64)
+    else:
+        keys = list(mapping.keys())
+        values = np.fromiter(mapping.values(), dtype=np.float64, count=len(keys))
+    if keys and isinstance(keys[0], tuple):
+        rows, columns = np.array(keys, dtype=np.int64).T
+        cells = rows * shape[1] + columns
+    else:
+        cells = np.array(keys).astype(np.int64)
+    array[cells] = values
+    return array.reshape(shape)
+
+
+def array_from_long(dataframe: pd.DataFrame, row: str, column: str, value: str) -> tuple:
+    """
+    Lay out long-form data, one row per cell, as a dense array; cells with several rows get
+    their mean and cells without any get NaN
+    :param dataframe: pd.DataFrame
+    :param row: str name of the column of row labels
+    :param column: str name of the column of column labels
+    :param value: str name of the column of values
+    :return: tuple of (np.ndarray of shape (rows, columns), list of row labels, list of
+             column labels), labels in order of first appearance
+    """
+    row_codes, rows = pd.factorize(dataframe[row])
+    column_codes, columns = pd.factorize(dataframe[column])
+    keep = (row_codes >= 0) & (column_codes >= 0)
+    cells = row_codes[keep] * len(columns) + column_codes[keep]
+    size = len(rows) * len(columns)
+    values = dataframe[value].to_numpy(dtype=np.float64)[keep]
+    counts = np.bincount(cells, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        array = np.bincount(cells, weights=values, minlength=size) / counts
+    return array.reshape(len(rows), len(columns)), list(rows), list(columns)
+
+
+def label_colors(array: np.ndarray, cmap='Blues', vmin: float = None, vmax: float = None, norm=None,
+                 dark: str = 'white', light: str = 'black') -> np.ndarray:
+    """
+    Pick a readable label color for every cell from the color the cell is painted
+    :param array: np.ndarray of cell values
+    :param cmap: str or matplotlib Colormap of the heatmap
+    :param vmin: float value at the bottom of the colormap, default the smallest value
+    :param vmax: float value at the top of the colormap, default the largest value
+    :param norm: matplotlib Normalize of the heatmap, instead of vmin and vmax
+    :param dark: str label color on dark cells
+    :param light: str label color on light cells
+    :return: np.ndarray of color names, the shape of `array`
+    """
+    import matplotlib as mpl
+    from matplotlib.colors import Normalize
+    cmap = mpl.colormaps[cmap] if isinstance(cmap, str) else cmap
+    if norm is None:
+        norm = Normalize(np.nanmin(array) if vmin is None else vmin, np.nanmax(array) if vmax is None else vmax)
+    rgb = cmap(norm(np.asarray(array, dtype=np.float64)))[..., :3]
+    # relative luminance, with the same cut-off as seaborn's annotated heatmaps
+    linear = np.where(rgb <= 0.03928, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    luminance = linear @ [0.2126, 0.7152, 0.0722]
+    return np.where(luminance > 0.408, light, dark)
+
+
+def labels_fit(shape: tuple, width: float, height: float, fontsize: float, characters: int) -> bool:
+    """
+    Check whether a label fits inside each cell of a heatmap
+    :param shape: tuple of (rows, columns)
+    :param width: float width of the heatmap, in the same unit as the font size
+    :param height: float height of the heatmap
+    :param fontsize: float font size
+    :param characters: int length of the longest label
+    :return: bool
+    """
+    return width / shape[1] >= characters * CHARACTER_WIDTH * fontsize and height / shape[0] >= fontsize
+
+
+def mpl_annotated_heatmap(axis, array: np.ndarray, fmt: str = '{:.2f}', fontsize: float = 10,
+                          labels: bool = None, cmap='Blues', **kwargs):
+    """
+    Draw a heatmap with axis.imshow and write the value of every cell on it as one artist
+    :param axis: matplotlib Axes to draw on
+    :param array: np.ndarray of shape (rows, columns)
+    :param fmt: str format of the labels
+    :param fontsize: float font size of the labels in points
+    :param labels: bool write the labels, default when they fit in the cells
+    :param cmap: str or matplotlib Colormap
+    :param kwargs: passed on to axis.imshow, e.g. vmin or aspect
+    :return: matplotlib AxesImage; pass it to plt.colorbar for a color bar
+    """
+    from pyviz.labels import mpl_text_labels
+    array = np.asarray(array, dtype=np.float64)
+    image = axis.imshow(array, cmap=cmap, **kwargs)
+    if labels is None:
+        # the size of the cells on screen, once imshow's aspect ratio is applied
+        axis.apply_aspect()
+        box = axis.get_window_extent()
+        finite = array[np.isfinite(array)]
+        # a matrix that is all NaN, e.g. a masked block, has nothing to label
+        labels = finite.size > 0 and labels_fit(
+            array.shape, box.width, box.height, fontsize * axis.figure.dpi / 72,
+            max(len(fmt.format(finite.min())), len(fmt.format(finite.max()))))
+    if labels:
+        rows, columns = np.nonzero(np.isfinite(array))
+        values = array[rows, columns]
+        colors = label_colors(values, image.get_cmap(), norm=image.norm)
+        mpl_text_labels(axis, columns, rows, [fmt.format(value) for value in values], size=fontsize,
+                        colors=list(colors), ha='center', va='center')
+    return image
+
+
+def go_heatmap_labels(figure, texttemplate: str = '%{z:.2f}', fontsize: float = 12, labels: bool = None,
+                      characters: int = 6):
+    """
+    Label every cell of the heatmaps of a Plotly figure through a texttemplate
+    Plotly colors each label to contrast with its cell.
+    :param figure: plotly Figure with heatmap traces, e.g. from px.imshow
+    :param texttemplate: str label template, e.g. '%{z:.1%}'
+    :param fontsize: float font size in pixels
+    :param labels: bool write the labels, default when they fit in the cells at the
+                   figure's size
+    :param characters: int length of the longest label, to check that it fits
+    :return: the figure
+    """
+    if labels is None:
+        layout = figure.layout
+        margin = layout.margin
+        # Plotly's defaults: a 700 x 450 figure with 80 pixel margins and 100 at the top
+        width = (layout.width or 700) - (80 if margin.l is None else margin.l) - (80 if margin.r is None else margin.r)
+        height = (layout.height or 450) - (100 if margin.t is None else margin.t) - (80 if margin.b is None else margin.b)
+        shapes = [np.shape(trace.z) for trace in figure.data if trace.type == 'heatmap']
+        labels = all(labels_fit(shape, width, height, fontsize, characters) for shape in shapes)
+    if labels:
+        figure.update_traces(texttemplate=texttemplate, textfont={'size': fontsize}, selector={'type': 'heatmap'})
+    return figure
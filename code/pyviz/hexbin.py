@@ -0,0 +1,216 @@
+"""
+Hexagonal binning that can keep adding points
+
+HexBins lays a fixed grid of pointy-top hexagons over an extent, the same grid, in the
+same order, as Matplotlib's hexbin, and keeps a count and a sum per hexagon. Every batch
+of points is binned in one vectorized pass: each point goes to the nearer of the closest
+centers of the grid's two lattices, as in axis.hexbin, and is counted with np.bincount. New points simply
+add to the totals, so streaming data can be re-binned every few seconds by adding only
+what arrived since the last update. The hexagon of each point can be kept (assign())
+and reused to total other columns without binning the points again.
+
+The filled hexagons are drawn by one Matplotlib PolyCollection, or as a few Plotly
+traces: one filled outline trace per color level plus a marker trace for the hover
+text and the color bar.
+
+    bins = HexBins((0, 60, 0, 12), gridsize=30)
+    bins.add(tips['total_bill'], tips['tip'])
+    mpl_hexbins(plt.gca(), bins)
+"""
+import numpy as np
+
+# above this many points the chapters bin with HexBins instead of seaborn's hex joint plot
+HEXBIN_POINTS = 100_000
+
+SQRT3 = np.sqrt(3)
+
+
+class HexBins:
+    """
+    Counts and sums of values in a fixed grid of hexagons; add points at any time
+    """
+
+    def __init__(self, extent: tuple, gridsize=30):
+        """
+        :param extent: tuple of (x low, x high, y low, y high) the hexagon centers cover;
+                       points beyond the outer hexagons are ignored
+        :param gridsize: int number of hexagons across x, or a tuple of (across x, rows along y);
+                         with one number there are int(gridsize / sqrt(3)) rows, like plt.hexbin
+        """
+        self.extent = tuple(float(value) for value in extent)
+        x0, x1, y0, y1 = self.extent
+        if x1 <= x0 or y1 <= y0:
+            raise ValueError('extent must be (x low, x high, y low, y high) with low < high')
+        nx, ny = gridsize if np.ndim(gridsize) else (gridsize, int(gridsize / SQRT3))
+        self.nx, self.ny = int(nx), int(ny)
+        # the same padding as axis.hexbin, so points on the edges land in the same hexagons
+        padding = 1e-9 * (x1 - x0)
+        self.origin = (x0 - padding, y0)
+        # distance between hexagon centers across x and between rows along y
+        self.width = (x1 - x0 + 2 * padding) / self.nx
+        self.height = (y1 - y0) / self.ny
+        # two lattices: (nx + 1) x (ny + 1) centers on the grid corners, then nx x ny centers
+        # in between, in axis.hexbin's order
+        self.corners = (self.nx + 1) * (self.ny + 1)
+        size = self.corners + self.nx * self.ny
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.sums = np.zeros(size, dtype=np.float64)
+
+    def assign(self, x, y) -> np.ndarray:
+        """
+        Find the hexagon of every point, the way axis.hexbin does
+        :param x: array of x values
+        :param y: array of y values
+        :return: np.ndarray of int hexagon numbers, -1 for points outside the grid or NaN
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        # positions in units of the center spacing; NaN is parked far outside the grid
+        finite = np.isfinite(x) & np.isfinite(y)
+        ix = np.where(finite, (x - self.origin[0]) / self.width, -2)
+        iy = np.where(finite, (y - self.origin[1]) / self.height, -2)
+        # the nearest center of each lattice; y distances count 3 times, since the hexagons
+        # are sqrt(3) times as tall as the rows are apart
+        ix1, iy1 = np.round(ix).astype(np.int64), np.round(iy).astype(np.int64)
+        ix2, iy2 = np.floor(ix).astype(np.int64), np.floor(iy).astype(np.int64)
+        first = (ix - ix1) ** 2 + 3 * (iy - iy1) ** 2 < (ix - ix2 - 0.5) ** 2 + 3 * (iy - iy2 - 0.5) ** 2
+        nx, ny = self.nx, self.ny
+        index1 = np.where((ix1 >= 0) & (ix1 <= nx) & (iy1 >= 0) & (iy1 <= ny), ix1 * (ny + 1) + iy1, -1)
+        index2 = np.where((ix2 >= 0) & (ix2 < nx) & (iy2 >= 0) & (iy2 < ny), self.corners + ix2 * ny + iy2, -1)
+        return np.where(first, index1, index2)
+
+    def add(self, x=None, y=None, values=None, index: np.ndarray = None) -> 'HexBins':
+        """
+        Add points to the counts, and their values to the sums
+        :param x: array of x values
+        :param y: array of y values
+        :param values: array of values to total per hexagon, or None to only count
+        :param index: np.ndarray from assign(), instead of x and y, to skip binning again
+        :return: this HexBins
+        """
+        if index is None:
+            index = self.assign(x, y)
+        keep = index >= 0
+        size = len(self.counts)
+        self.counts += np.bincount(index[keep], minlength=size)
+        if values is not None:
+            values = np.asarray(values, dtype=np.float64)[keep]
+            self.sums += np.bincount(index[keep], weights=np.nan_to_num(values), minlength=size)
+        return self
+
+    def merge(self, other: 'HexBins') -> 'HexBins':
+        """
+        Add the totals of another HexBins with the same grid, e.g. from a worker process
+        :param other: HexBins
+        :return: this HexBins
+        """
+        if (other.extent, other.nx, other.ny) != (self.extent, self.nx, self.ny):
+            raise ValueError('can only merge hexbins with the same grid')
+        self.counts += other.counts
+        self.sums += other.sums
+        return self
+
+    def values(self, reduce: str = 'count') -> np.ndarray:
+        """
+        :param reduce: str 'count', 'sum' or 'mean'
+        :return: np.ndarray with one value per hexagon (NaN means for empty hexagons)
+        """
+        if reduce == 'count':
+            return self.counts.astype(np.float64)
+        if reduce == 'sum':
+            return self.sums.copy()
+        if reduce == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return self.sums / self.counts
+        raise ValueError("reduce must be 'count', 'sum' or 'mean', not {!r}".format(reduce))
+
+    def centers(self) -> np.ndarray:
+        """
+        :return: np.ndarray of shape (n, 2) with the x, y center of every hexagon
+        """
+        nx, ny = self.nx, self.ny
+        x = np.concatenate([np.repeat(np.arange(nx + 1), ny + 1), np.repeat(np.arange(nx) + 0.5, ny)])
+        y = np.concatenate([np.tile(np.arange(ny + 1), nx + 1), np.tile(np.arange(ny) + 0.5, nx)])
+        return np.column_stack([self.origin[0] + x * self.width, self.origin[1] + y * self.height])
+
+    def hexagon(self) -> np.ndarray:
+        """
+        :return: np.ndarray of shape (6, 2): the corners of a hexagon centered on 0, 0, as axis.hexbin draws it
+        """
+        return np.array([[0.5, -0.5], [0.5, 0.5], [0, 1], [-0.5, 0.5], [-0.5, -0.5], [0, -1]]) \
+            * [self.width, self.height / 3]
+
+    def __repr__(self) -> str:
+        return 'HexBins({} hexagons, {} filled, {} points)'.format(
+            len(self.counts), int((self.counts > 0).sum()), int(self.counts.sum()))
+
+
+def mpl_hexbins(axis, bins: HexBins, reduce: str = 'count', mincnt: int = 1, log: bool = False,
+                **kwargs):
+    """
+    Draw the filled hexagons on a Matplotlib axis as one PolyCollection, like axis.hexbin
+    :param axis: matplotlib Axes to draw on
+    :param bins: HexBins
+    :param reduce: str color by 'count', 'sum' or 'mean'
+    :param mincnt: int only draw hexagons with at least this many points
+    :param log: bool log color scale
+    :param kwargs: passed on to the PolyCollection, e.g. cmap or edgecolors
+    :return: matplotlib PolyCollection; pass it to plt.colorbar for a color bar
+    """
+    from matplotlib.collections import PolyCollection
+    from matplotlib.colors import LogNorm
+    from matplotlib.transforms import AffineDeltaTransform
+    shown = bins.counts >= max(1, mincnt)
+    kwargs.setdefault('edgecolors', 'face')
+    if log:
+        kwargs.setdefault('norm', LogNorm())
+    # one hexagon shape moved to every center, the way axis.hexbin draws
+    collection = PolyCollection([bins.hexagon()], offsets=bins.centers()[shown],
+                                offset_transform=axis.transData,
+                                transform=AffineDeltaTransform(axis.transData), **kwargs)
+    collection.set_array(bins.values(reduce)[shown])
+    axis.add_collection(collection, autolim=False)
+    x0, x1, y0, y1 = bins.extent
+    axis.update_datalim([(x0, y0), (x1, y1)])
+    axis.autoscale_view()
+    return collection
+
+
+def go_hexbins(bins: HexBins, reduce: str = 'count', mincnt: int = 1, colorscale: str = 'Blues',
+               levels: int = 12, name: str = None) -> list:
+    """
+    Make Plotly traces of the filled hexagons
+    Plotly can't color the shapes of one trace separately, so the hexagons are split into
+    `levels` color levels, each one a filled trace of outlines separated by None.
+    :param bins: HexBins
+    :param reduce: str color by 'count', 'sum' or 'mean'
+    :param mincnt: int only draw hexagons with at least this many points
+    :param colorscale: str name of a Plotly color scale
+    :param levels: int number of color levels
+    :param name: str name of the value in the hover text, default `reduce`
+    :return: list of go.Scatter: one per color level, then the hover and color bar markers
+    """
+    import plotly.graph_objects as go
+    from plotly.colors import get_colorscale, sample_colorscale
+    shown = bins.counts >= max(1, mincnt)
+    centers = bins.centers()[shown]
+    values = bins.values(reduce)[shown]
+    traces = []
+    if len(values):
+        low, high = np.nanmin(values), np.nanmax(values)
+        level = np.zeros(len(values), dtype=np.int64)
+        if high > low:
+            level = np.minimum(((values - low) / (high - low) * levels).astype(np.int64), levels - 1)
+        colors = sample_colorscale(get_colorscale(colorscale), (np.arange(levels) + 0.5) / levels)
+        # seven points per hexagon: six corners and a gap
+        outline = np.vstack([bins.hexagon(), [np.nan, np.nan]])
+        for i in np.unique(level):
+            corners = (centers[level == i][:, np.newaxis, :] + outline).reshape(-1, 2)
+            traces.append(go.Scatter(x=corners[:, 0], y=corners[:, 1], mode='lines', fill='toself',
+                                     fillcolor=colors[i], line={'width': 0.5, 'color': colors[i]},
+                                     hoverinfo='skip', showlegend=False))
+    traces.append(go.Scatter(x=centers[:, 0], y=centers[:, 1], mode='markers', showlegend=False,
+                             marker={'size': 1, 'opacity': 0, 'color': values, 'colorscale': colorscale,
+                                     'showscale': True, 'colorbar': {'title': {'text': name or reduce}}},
+                             hovertemplate='%{{marker.color:.4g}} {}<extra></extra>'.format(name or reduce)))
+    return traces
@@ -0,0 +1,273 @@
+"""
+Histograms counted chunk by chunk, so the values never have to be in memory at once
+
+A Histogram is just bin edges and counts. Counts from separate chunks, files, or worker
+processes add up as long as the edges match, so the work is done in two mergeable passes:
+    1. value_range() finds the smallest and largest value (and how many there are)
+    2. Histogram.add() counts every chunk into bins laid over that range
+Only the bins are handed to the plotting libraries, which draw them as pre-binned bars.
+For Plotly that means the HTML holds one number per bin instead of every raw value.
+
+    histogram = histogram_files(['part-0.csv', 'part-1.csv'], 'total_bill', bins=20)
+    mpl_bars(plt.gca(), histogram)
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 1_000_000
+
+
+class Histogram:
+    """
+    Counts of values in fixed bins; histograms with the same edges can be added together
+    """
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        if self.edges.ndim != 1 or len(self.edges) < 2 or np.any(np.diff(self.edges) <= 0):
+            raise ValueError('edges must be at least two increasing values')
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.missing = 0
+
+    @classmethod
+    def from_range(cls, low: float, high: float, bins: int = 10) -> 'Histogram':
+        """
+        Make an empty histogram of equal-width bins, the way np.histogram lays them out
+        :param low: float smallest value to cover
+        :param high: float largest value to cover
+        :param bins: int number of bins
+        :return: Histogram
+        """
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        return cls(np.linspace(low, high, bins + 1))
+
+    @classmethod
+    def from_values(cls, values, bins=10) -> 'Histogram':
+        """
+        Count values that do fit in memory
+        :param values: array or pd.Series of numbers
+        :param bins: int number of equal-width bins, 'sturges', or a sequence of bin edges
+        :return: Histogram
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if np.ndim(bins):
+            return cls(bins).add(values)
+        return cls(auto_edges(value_range([values]), bins)).add(values)
+
+    def add(self, values) -> 'Histogram':
+        """
+        Count another chunk of values; values outside the edges are ignored like np.histogram does
+        :param values: array or pd.Series of numbers
+        :return: this Histogram
+        """
+        values = np.asarray(values, dtype=np.float64)
+        finite = np.isfinite(values)
+        self.missing += int(len(values) - finite.sum())
+        values = values[finite]
+        values = values[(values >= self.edges[0]) & (values <= self.edges[-1])]
+        # bins are half-open except the last one, which includes the top edge
+        index = np.searchsorted(self.edges, values, side='right') - 1
+        index[index == len(self.counts)] -= 1
+        self.counts += np.bincount(index, minlength=len(self.counts))
+        return self
+
+    def merge(self, other: 'Histogram') -> 'Histogram':
+        """
+        Add the counts of another histogram with the same edges, e.g. from a worker process
+        :param other: Histogram
+        :return: this Histogram
+        """
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError('can only merge histograms with the same bin edges')
+        self.counts += other.counts
+        self.missing += other.missing
+        return self
+
+    def __add__(self, other: 'Histogram') -> 'Histogram':
+        return self.copy().merge(other)
+
+    def copy(self) -> 'Histogram':
+        histogram = Histogram(self.edges)
+        histogram.counts = self.counts.copy()
+        histogram.missing = self.missing
+        return histogram
+
+    @property
+    def centers(self) -> np.ndarray:
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    @property
+    def widths(self) -> np.ndarray:
+        return np.diff(self.edges)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        :return: pd.DataFrame with one row per bin: left, right, center, width, count
+        """
+        return pd.DataFrame({'left': self.edges[:-1], 'right': self.edges[1:], 'center': self.centers,
+                             'width': self.widths, 'count': self.counts})
+
+    def __repr__(self) -> str:
+        return 'Histogram({} bins from {:g} to {:g}, {} values)'.format(
+            len(self.counts), self.edges[0], self.edges[-1], self.total)
+
+
+def value_range(chunks) -> tuple:
+    """
+    Find the range of values in a stream of chunks, ignoring NaN and infinity
+    :param chunks: iterable of arrays or pd.Series of numbers
+    :return: tuple of (float low, float high, int count of finite values)
+    """
+    low, high, count = np.inf, -np.inf, 0
+    for chunk in chunks:
+        values = np.asarray(chunk, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values):
+            low, high = min(low, values.min()), max(high, values.max())
+            count += len(values)
+    return float(low), float(high), count
+
+
+def merge_ranges(ranges) -> tuple:
+    """
+    Combine the value_range() results of several chunks or files
+    """
+    ranges = list(ranges)
+    return min(r[0] for r in ranges), max(r[1] for r in ranges), sum(r[2] for r in ranges)
+
+
+def sturges_bins(count: int) -> int:
+    """
+    The number of bins np.histogram(bins='sturges') would use for `count` values
+    """
+    return int(np.ceil(np.log2(count) + 1)) if count else 1
+
+
+def auto_edges(value_range: tuple, bins=10) -> np.ndarray:
+    """
+    Lay equal-width bins over a range found by value_range()
+    :param value_range: tuple of (low, high, count)
+    :param bins: int number of bins or 'sturges'
+    :return: np.ndarray of bin edges
+    """
+    low, high, count = value_range
+    if not count:
+        raise ValueError('no finite values to make a histogram of')
+    return Histogram.from_range(low, high, sturges_bins(count) if bins == 'sturges' else bins).edges
+
+
+def read_frames(path: str, columns: list, chunk_size: int = CHUNK_SIZE):
+    """
+    Read some columns of a CSV or Parquet file a chunk at a time
+    Parquet needs the optional pyarrow package.
+    :param path: str path to a .csv (optionally compressed) or .parquet file
+    :param columns: list of str column names
+    :param chunk_size: int rows per chunk
+    :return: generator of pd.DataFrame chunks
+    """
+    if path.endswith(('.parquet', '.pq')):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=list(columns)):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(path, usecols=list(columns), chunksize=chunk_size) as reader:
+            yield from reader
+
+
+def read_chunks(path: str, column: str, chunk_size: int = CHUNK_SIZE):
+    """
+    Read one column of a CSV or Parquet file a chunk at a time
+    :param path: str path to a .csv (optionally compressed) or .parquet file
+    :param column: str name of the column
+    :param chunk_size: int rows per chunk
+    :return: generator of np.ndarray chunks
+    """
+    for frame in read_frames(path, [column], chunk_size):
+        yield frame[column].to_numpy()
+
+
+def file_range(path: str, column: str, chunk_size: int = CHUNK_SIZE) -> tuple:
+    return value_range(read_chunks(path, column, chunk_size))
+
+
+def file_histogram(path: str, column: str, edges, chunk_size: int = CHUNK_SIZE) -> Histogram:
+    histogram = Histogram(edges)
+    for chunk in read_chunks(path, column, chunk_size):
+        histogram.add(chunk)
+    return histogram
+
+
+def histogram_files(paths: list, column: str, bins=10, jobs: int = None,
+                    chunk_size: int = CHUNK_SIZE) -> Histogram:
+    """
+    Histogram one column across many files, one file per worker process
+    :param paths: list of str paths to CSV or Parquet files
+    :param column: str name of the column
+    :param bins: int number of equal-width bins, 'sturges', or a sequence of bin edges
+    :param jobs: int number of worker processes, default one per core
+    :param chunk_size: int rows per chunk
+    :return: Histogram of every file together
+    """
+    if not paths:
+        raise ValueError('no files to make a histogram of')
+    with ProcessPoolExecutor(max_workers=min(len(paths), jobs or os.cpu_count())) as pool:
+        if np.ndim(bins):
+            edges = np.asarray(bins, dtype=np.float64)
+        else:
+            # first pass: the range of the whole column, so every worker uses the same edges
+            edges = auto_edges(merge_ranges(pool.map(file_range, paths, [column] * len(paths),
+                                                     [chunk_size] * len(paths))), bins)
+        parts = pool.map(file_histogram, paths, [column] * len(paths), [edges] * len(paths),
+                         [chunk_size] * len(paths))
+        histogram = Histogram(edges)
+        for part in parts:
+            histogram.merge(part)
+    return histogram
+
+
+def mpl_bars(axis, histogram: Histogram, **kwargs):
+    """
+    Draw a histogram's bins on a Matplotlib axis, looking just like plt.hist
+    :param axis: matplotlib Axes to draw on
+    :param histogram: Histogram
+    :param kwargs: passed on to axis.hist
+    :return: the BarContainer of the bars
+    """
+    # one weighted value per bin reproduces plt.hist without the raw values
+    _, _, bars = axis.hist(histogram.edges[:-1], bins=histogram.edges, weights=histogram.counts, **kwargs)
+    return bars
+
+
+def go_bars(histogram: Histogram, **kwargs):
+    """
+    Make a Plotly bar trace of a histogram's bins; use layout bargap=0 for touching bars
+    :param histogram: Histogram
+    :param kwargs: passed on to go.Bar
+    :return: go.Bar
+    """
+    import plotly.graph_objects as go
+    kwargs.setdefault('hovertemplate', '%{customdata[0]:g} - %{customdata[1]:g}<br>count=%{y}<extra></extra>')
+    return go.Bar(x=histogram.centers, y=histogram.counts, width=histogram.widths,
+                  customdata=np.column_stack([histogram.edges[:-1], histogram.edges[1:]]), **kwargs)
+
+
+def px_bars(histogram: Histogram, **kwargs):
+    """
+    Make a Plotly Express bar chart of a histogram's bins
+    :param histogram: Histogram
+    :param kwargs: passed on to px.bar
+    :return: plotly Figure
+    """
+    import plotly.express as px
+    fig = px.bar(histogram.to_frame(), x='center', y='count', hover_data=['left', 'right'], **kwargs)
+    fig.update_traces(width=histogram.widths)
+    fig.update_layout(bargap=0)
+    return fig
@@ -0,0 +1,104 @@
+"""
+Report how long it takes to import each chapter script and each plotting backend
+
+Every measurement runs in a fresh interpreter, so nothing is already in sys.modules,
+and only the import itself is timed, not the interpreter starting up. Importing a
+chapter should only cost pandas/NumPy; Matplotlib, Seaborn, Plotly and SciPy are
+imported inside the figure functions that use them.
+
+Run it from the code/ folder:
+    python -m pyviz.importtime
+    python -m pyviz.importtime 01 10 --repeat 5 --json importtime.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from pyviz.render import CODE_DIR, chapter_scripts
+
+BACKENDS = ('matplotlib.pyplot', 'seaborn', 'plotly.express', 'plotly.graph_objects', 'scipy.stats')
+HEAVY_MODULES = ('matplotlib', 'seaborn', 'plotly', 'scipy', 'tkinter')
+
+# runs in the child interpreter; prints the seconds spent and the heavy modules loaded
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{'seconds': seconds, 'loaded': loaded}}))
+'''
+
+
+def probe(statement: str, repeat: int = 3) -> dict:
+    """
+    Time a statement in fresh interpreters
+    :param statement: str Python code to time, e.g. 'import seaborn'
+    :param repeat: int number of fresh interpreters to try, the fastest one is kept
+    :return: dict with 'seconds' and the list of heavy modules 'loaded'
+    """
+    best = None
+    env = dict(os.environ, MPLBACKEND='Agg')
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+                                cwd=CODE_DIR, env=env, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+
+def chapter_import(path: str, repeat: int = 3) -> dict:
+    """
+    Time importing a chapter script the way the batch renderer does
+    :param path: str path to the chapter script
+    :param repeat: int number of fresh interpreters to try
+    :return: dict with 'seconds' and the heavy modules 'loaded'
+    """
+    return probe('from pyviz.render import load_chapter\nload_chapter({!r})'.format(path), repeat)
+
+
+def report(chapters: list = None, repeat: int = 3) -> dict:
+    """
+    Measure the baseline (pandas and the pyviz helpers), every backend, and every chapter
+    :param chapters: list of str chapter prefixes or names, default all
+    :param repeat: int number of fresh interpreters per measurement
+    :return: dict of {'baseline': ..., 'backends': {...}, 'chapters': {...}}
+    """
+    baseline = probe('import pyviz.render, pyviz.datasets', repeat)
+    results = {'baseline': baseline, 'backends': {}, 'chapters': {}}
+    for module in BACKENDS:
+        results['backends'][module] = probe('import ' + module, repeat)
+    for path in chapter_scripts(chapters):
+        results['chapters'][os.path.basename(os.path.dirname(path))] = chapter_import(path, repeat)
+    return results
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Report import times of the chapter scripts "
+                                                 "and plotting backends")
+    parser.add_argument('chapters', nargs='*',
+                        help='chapter numbers or names to measure, e.g. 01 barcharts (default: all)')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='fresh interpreters per measurement; the fastest is kept')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    results = report(args.chapters, max(1, args.repeat))
+    print('{:<32} {:>9}  {}'.format('import', 'seconds', 'heavy modules loaded'))
+    rows = [('pyviz helpers (baseline)', results['baseline'])]
+    rows += sorted(results['backends'].items())
+    rows += sorted(results['chapters'].items())
+    for name, result in rows:
+        print('{:<32} {:>9.3f}  {}'.format(name, result['seconds'], ', '.join(result['loaded']) or '-'))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as outfile:
+            json.dump(results, outfile, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Data labels for every bar of a bar chart, drawn as one artist
+
+axis.annotate (and axis.bar_label) make a full Annotation artist for every bar, and each
+one is laid out on its own at every draw. Here the label positions come straight from
+the bar geometry as NumPy arrays, each label is turned into a glyph outline once per
+distinct text, and all of them are drawn by a single PathCollection, the same kind of
+artist that draws scatter plot markers. The labels are outlines rather than Text
+artists, so they are not picked up as text by SVG or PDF viewers.
+
+mpl_text_labels() does the same for any texts at any data positions, e.g. the names at
+the end of the lines of a bump chart.
+
+In Plotly the labels come from a texttemplate on the trace, so the browser writes them
+from the bar values instead of the figure carrying a label string for every bar.
+"""
+import numpy as np
+
+# outlines of single characters at a size of 1 point, by font and character, shared by
+# every text label
+_characters = {}
+
+
+def bar_geometry(bars) -> np.ndarray:
+    """
+    Get the corners of every bar of a bar chart
+    :param bars: BarContainer returned by axis.bar or axis.barh
+    :return: np.ndarray of shape (n, 4): x, y, width, height of each bar
+    """
+    return np.array([(bar.get_x(), bar.get_y(), bar.get_width(), bar.get_height())
+                     for bar in bars.patches], dtype=np.float64).reshape(-1, 4)
+
+
+def label_positions(bars, horizontal: bool = None) -> tuple:
+    """
+    Work out where the label of every bar goes: centered at the end of the bar
+    :param bars: BarContainer returned by axis.bar or axis.barh
+    :param horizontal: bool bars run left to right, default from the BarContainer
+    :return: tuple of (np.ndarray x, np.ndarray y, np.ndarray bar values, np.ndarray of
+             1 for bars that grow up or right and -1 for those that grow down or left)
+    """
+    if horizontal is None:
+        horizontal = getattr(bars, 'orientation', 'vertical') == 'horizontal'
+    x, y, width, height = bar_geometry(bars).T
+    if horizontal:
+        return x + width, y + height / 2, width, np.where(width < 0, -1, 1)
+    return x + width / 2, y + height, height, np.where(height < 0, -1, 1)
+
+
+def _glyphs(texts: list, size: float, horizontal: bool, signs: np.ndarray, padding: float) -> list:
+    """
+    Turn label texts into outlines in points, anchored where the label touches its bar
+    """
+    from matplotlib.path import Path
+    outlines = {}
+    paths = []
+    for text, sign in zip(texts, signs):
+        key = (text, sign)
+        if key not in outlines:
+            vertices, codes, extents = _outline(text, size)
+            shift = (0, 0)
+            if extents is not None:
+                left, bottom, right, top = extents
+                if horizontal:
+                    # vertically centered, starting `padding` beyond the end of the bar
+                    shift = (padding - left if sign > 0 else -padding - right, -(bottom + top) / 2)
+                else:
+                    # horizontally centered, `padding` above the top (or below the bottom) of the bar
+                    shift = (-(left + right) / 2, padding - bottom if sign > 0 else -padding - top)
+            outlines[key] = Path(vertices + shift, codes)
+        paths.append(outlines[key])
+    return paths
+
+
+def mpl_bar_labels(axis, bars, fmt: str = '{:.0f}', padding: float = 3, size: float = 7,
+                   color: str = 'black', horizontal: bool = None, **kwargs):
+    """
+    Write the value of every bar at its end, like axis.bar_label but as one artist
+    :param axis: matplotlib Axes the bars are on
+    :param bars: BarContainer returned by axis.bar or axis.barh
+    :param fmt: str format for the values, e.g. '{:.1f}'
+    :param padding: float gap between the bar and its label in points
+    :param size: float font size in points
+    :param color: str label color
+    :param horizontal: bool bars run left to right, default from the BarContainer
+    :param kwargs: passed on to the PathCollection
+    :return: matplotlib PathCollection of all the labels
+    """
+    from matplotlib.collections import PathCollection
+    from matplotlib.transforms import IdentityTransform
+    if horizontal is None:
+        horizontal = getattr(bars, 'orientation', 'vertical') == 'horizontal'
+    x, y, values, signs = label_positions(bars, horizontal)
+    # bars with a missing value get no label
+    keep = np.isfinite(values)
+    x, y, values, signs = x[keep], y[keep], values[keep], signs[keep]
+    paths = _glyphs([fmt.format(value) for value in values], size, horizontal, signs, padding)
+    # outlines are in points; a size of 1 scales points to pixels, like a scatter marker of s=1
+    labels = PathCollection(paths, sizes=[1], offsets=np.column_stack([x, y]),
+                            offset_transform=axis.transData, transform=IdentityTransform(),
+                            facecolors=color, edgecolors='none', clip_on=False, **kwargs)
+    axis.add_collection(labels, autolim=False)
+    return labels
+
+
+def go_bar_labels(figure, fmt: str = None, position: str = 'outside', size: float = None,
+                  horizontal: bool = False, **kwargs):
+    """
+    Label every bar of a Plotly figure with its value through a texttemplate
+    :param figure: plotly Figure with bar traces
+    :param fmt: str d3 format for the values, e.g. '.1f', default Plotly's own number format
+    :param position: str textposition: 'outside', 'inside', 'auto', ...
+    :param size: float font size in pixels
+    :param horizontal: bool the bars run left to right, so the value is x
+    :param kwargs: passed on to update_traces
+    :return: the figure
+    """
+    value = 'x' if horizontal else 'y'
+    template = '%{{{}:{}}}'.format(value, fmt) if fmt else '%{{{}}}'.format(value)
+    if size:
+        kwargs['textfont_size'] = size
+    # text sticking out past the top of the plot is drawn rather than cut off
+    figure.update_traces(texttemplate=template, textposition=position, cliponaxis=False,
+                         selector={'type': 'bar'}, **kwargs)
+    return figure
+
+
+def _outline(text: str, size: float) -> tuple:
+    """
+    Outline a text by placing cached single-character outlines side by side
+    Laying out a whole TextPath and measuring its curves takes milliseconds, which adds up
+    over thousands of different names; characters repeat, so each one is only laid out and
+    measured once. Kerning is lost.
+    :return: tuple of (np.ndarray of vertices in points, np.ndarray of path codes or None,
+             tuple of the left, bottom, right, top extents or None for blank texts)
+    """
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.path import Path
+    from matplotlib.textpath import text_to_path
+    # the font the rcParams point to now, so a change of font.family doesn't reuse old outlines
+    font = FontProperties(size=1)
+    vertices, codes, extents, advance = [], [], [], 0.0
+    for char in text:
+        key = (font, char)
+        if key not in _characters:
+            glyph_vertices, glyph_codes = text_to_path.get_text_path(font, char)
+            glyph_vertices = np.asarray(glyph_vertices, dtype=np.float64).reshape(-1, 2) / text_to_path.FONT_SCALE
+            glyph_codes = np.asarray(glyph_codes, dtype=np.uint8)
+            width = text_to_path.get_text_width_height_descent(char, font, ismath=False)[0]
+            bounds = Path(glyph_vertices, glyph_codes).get_extents().extents if len(glyph_vertices) else None
+            _characters[key] = (glyph_vertices, glyph_codes, width, bounds)
+        glyph_vertices, glyph_codes, width, bounds = _characters[key]
+        if len(glyph_vertices):
+            vertices.append(glyph_vertices * size + (advance, 0))
+            codes.append(glyph_codes)
+            extents.append(bounds * size + (advance, 0, advance, 0))
+        advance += width * size
+    if not vertices:
+        return np.zeros((0, 2)), None, None
+    extents = np.array(extents)
+    return (np.concatenate(vertices), np.concatenate(codes),
+            (extents[:, 0].min(), extents[:, 1].min(), extents[:, 2].max(), extents[:, 3].max()))
+
+
+def mpl_text_labels(axis, x, y, texts, size: float = 7, colors='black', ha: str = 'left',
+                    va: str = 'baseline', offset: tuple = (0, 0), **kwargs):
+    """
+    Write a short text at each of many data positions as one artist, like axis.text at every point
+    :param axis: matplotlib Axes to write on
+    :param x: array of x positions in data units
+    :param y: array of y positions in data units
+    :param texts: list of str, one per position
+    :param size: float font size in points
+    :param colors: str color of every label, or a list with one color per label
+    :param ha: str horizontal alignment: 'left', 'center' or 'right'
+    :param va: str vertical alignment: 'baseline', 'bottom', 'center' or 'top'
+    :param offset: tuple of (x, y) shift of every label in points
+    :param kwargs: passed on to the PathCollection
+    :return: matplotlib PathCollection of all the labels
+    """
+    from matplotlib.collections import PathCollection
+    from matplotlib.path import Path
+    from matplotlib.transforms import IdentityTransform
+    outlines = {}
+    paths = []
+    for text in texts:
+        text = str(text)
+        if text not in outlines:
+            vertices, codes, extents = _outline(text, size)
+            path = Path(vertices, codes)
+            if extents is not None:
+                left, bottom, right, top = extents
+                shift = ({'left': -left, 'center': -(left + right) / 2, 'right': -right}[ha] + offset[0],
+                         {'baseline': 0, 'bottom': -bottom, 'center': -(bottom + top) / 2,
+                          'top': -top}[va] + offset[1])
+                path = Path(path.vertices + shift, path.codes)
+            outlines[text] = path
+        paths.append(outlines[text])
+    labels = PathCollection(paths, sizes=[1], offsets=np.column_stack([x, y]),
+                            offset_transform=axis.transData, transform=IdentityTransform(),
+                            facecolors=colors, edgecolors='none', clip_on=False, **kwargs)
+    axis.add_collection(labels, autolim=False)
+    return labels
@@ -0,0 +1,158 @@
+"""
+Pair plots of wide, long tables, drawn in parallel
+
+A pair plot of n columns is n * n panels, and seaborn draws them one after the other,
+with every row scattered into every off-diagonal panel. Here:
+    - the statistics of each column (its finite values, axis range and histogram) are
+      worked out once and shared by every panel in its row and column
+    - the off-diagonal panels are drawn in a process pool, each as an image exactly the
+      size of its axes; every worker gets the columns once, when it starts
+    - the images are put back together on one Matplotlib grid with real axes, ticks and
+      labels, so the result looks like sns.pairplot
+    - past PANEL_DENSITY_ROWS rows the panels show a density image (or hexbins) instead
+      of one marker per row
+
+    fig = pairplot(features, jobs=8)
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from pyviz.histogram import Histogram
+from pyviz.scatter import data_range, rasterize
+
+# above this many points in all the off-diagonal panels together, the chapters use pairplot()
+PAIRPLOT_POINTS = 1_000_000
+# above this many rows the off-diagonal panels show densities instead of markers
+PANEL_DENSITY_ROWS = 50_000
+
+# the columns, set once in each worker process
+_panel_columns = {}
+
+
+def pair_stats(dataframe: pd.DataFrame, columns: list = None, bins='auto') -> dict:
+    """
+    Work out what every panel of a pair plot needs to know about each column, once
+    :param dataframe: pd.DataFrame
+    :param columns: list of str column names, default every numeric column
+    :param bins: int number of histogram bins, 'sturges', or 'auto' for np.histogram's choice
+    :return: dict of column name to dict with 'values' (np.ndarray of floats), 'range'
+             (tuple of axis limits with a 5% margin) and 'histogram' (Histogram)
+    """
+    if columns is None:
+        columns = list(dataframe.select_dtypes('number').columns)
+    stats = {}
+    for column in columns:
+        values = dataframe[column].to_numpy(dtype=np.float64)
+        low, high = data_range(values)
+        margin = (high - low) * 0.05
+        edges = np.histogram_bin_edges(values[np.isfinite(values)], bins) if bins == 'auto' else bins
+        stats[column] = {'values': values, 'range': (low - margin, high + margin),
+                         'histogram': Histogram.from_values(values, edges)}
+    return stats
+
+
+def _init_panels(columns: dict) -> None:
+    _panel_columns.update(columns)
+
+
+def render_panel(x: str, y: str, x_range: tuple, y_range: tuple, width: int, height: int,
+                 kind: str = 'scatter', color: str = 'C0', dpi: float = 100) -> np.ndarray:
+    """
+    Draw one off-diagonal panel as an image the size of its axes
+    :param x: str name of the column on the x axis
+    :param y: str name of the column on the y axis
+    :param x_range: tuple of (low, high) x axis limits
+    :param y_range: tuple of (low, high) y axis limits
+    :param width: int panel width in pixels
+    :param height: int panel height in pixels
+    :param kind: str 'scatter', 'hexbin' or 'density'
+    :param color: str Matplotlib color of the markers
+    :param dpi: float figure dpi, so markers come out the same size as on the grid
+    :return: np.ndarray uint8 RGBA image of shape (height, width, 4), top row first
+    """
+    x_values, y_values = _panel_columns[x], _panel_columns[y]
+    if kind == 'density':
+        image, _ = rasterize(x_values, y_values, colors={None: color}, width=width, height=height,
+                             x_range=x_range, y_range=y_range)
+        return image[::-1]
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    fig.patch.set_alpha(0)
+    axis = fig.add_axes([0, 0, 1, 1])
+    axis.set_axis_off()
+    if kind == 'hexbin':
+        axis.hexbin(x_values, y_values, gridsize=30, extent=x_range + y_range, mincnt=1, cmap='Blues')
+    else:
+        axis.scatter(x_values, y_values, color=color, edgecolor='white', linewidth=0.75)
+    axis.set_xlim(x_range)
+    axis.set_ylim(y_range)
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).copy()
+
+
+def pairplot(dataframe: pd.DataFrame, columns: list = None, height: float = 2.5, kind: str = None,
+             jobs: int = None, stats: dict = None):
+    """
+    Draw a pair plot, like sns.pairplot(dataframe), with the panels drawn in parallel
+    :param dataframe: pd.DataFrame
+    :param columns: list of str column names, default every numeric column
+    :param height: float height (and width) of each panel in inches
+    :param kind: str 'scatter', 'hexbin' or 'density' for the off-diagonal panels,
+                 default 'density' above PANEL_DENSITY_ROWS rows
+    :param jobs: int number of worker processes, default one per core; 1 draws every
+                 panel in this process
+    :param stats: dict from pair_stats(), to reuse column statistics across plots
+    :return: matplotlib Figure
+    """
+    import matplotlib.pyplot as plt
+    from pyviz.histogram import mpl_bars
+    stats = stats or pair_stats(dataframe, columns)
+    names = list(stats)
+    n = len(names)
+    if kind is None:
+        kind = 'density' if len(dataframe) > PANEL_DENSITY_ROWS else 'scatter'
+    fig, axes = plt.subplots(n, n, figsize=(n * height, n * height), sharex='col', sharey='row',
+                             squeeze=False)
+    size = n * height
+    # fixed margins in inches, so the panel sizes are known before anything is drawn
+    fig.subplots_adjust(left=0.8 / size, bottom=0.6 / size, right=1 - 0.1 / size, top=1 - 0.1 / size,
+                        wspace=0.08, hspace=0.08)
+    for i, name in enumerate(names):
+        axes[i, 0].set_ylim(stats[name]['range'])
+        axes[-1, i].set_xlim(stats[name]['range'])
+        axes[i, 0].set_ylabel(name)
+        axes[-1, i].set_xlabel(name)
+
+    tasks = []
+    for i, y in enumerate(names):
+        for j, x in enumerate(names):
+            if i != j:
+                box = axes[i, j].get_window_extent()
+                tasks.append((i, j, (x, y, stats[x]['range'], stats[y]['range'],
+                                     max(1, int(round(box.width))), max(1, int(round(box.height))),
+                                     kind, 'C0', fig.dpi)))
+    columns = {name: stats[name]['values'] for name in names}
+    jobs = min(len(tasks), jobs or os.cpu_count())
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_panels, initargs=(columns,)) as pool:
+            images = list(pool.map(render_panel, *zip(*[task[2] for task in tasks]),
+                                   chunksize=max(1, len(tasks) // (4 * jobs))))
+    else:
+        _init_panels(columns)
+        images = [render_panel(*task[2]) for task in tasks]
+
+    for (i, j, _), image in zip(tasks, images):
+        axes[i, j].imshow(image, extent=stats[names[j]]['range'] + stats[names[i]]['range'],
+                          aspect='auto', interpolation='nearest')
+    for i, name in enumerate(names):
+        # the histogram gets its own y axis, like seaborn's diagonal
+        diagonal = axes[i, i].twinx()
+        diagonal.set_axis_off()
+        mpl_bars(diagonal, stats[name]['histogram'], color='C0', edgecolor='white', linewidth=0.5)
+        diagonal.set_ylim(0, stats[name]['histogram'].counts.max() * 1.05)
+    return fig
@@ -0,0 +1,285 @@
+"""
+Heatmaps of matrices too big for memory, drawn at the detail the screen can show
+
+A 100,000 x 100,000 matrix is 40 GB of float32: it can't be loaded whole, and neither
+imshow nor go.Heatmap can draw it. A HeatmapPyramid keeps the matrix as square tiles of
+.npy files at several levels of detail. Level 0 is the matrix itself, and every level
+above it halves both sides by taking the mean (or max) of each 2 x 2 block of the level
+below, until the whole matrix fits in a single tile. Each level is built from the tiles
+of the level below, so only a few tiles are in memory at a time.
+
+To draw a view, the pyramid picks the coarsest level that still has about one cell per
+screen pixel and reads only the tiles in view, memory-mapped. The Matplotlib and Plotly
+helpers do that again whenever the user zooms or pans, like pyviz.downsample does for
+long line series.
+
+    pyramid = HeatmapPyramid.build(np.load('matrix.npy', mmap_mode='r'), 'matrix-pyramid')
+    mpl_pyramid(plt.gca(), pyramid, cmap='viridis')
+"""
+import json
+import math
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+TILE_SIZE = 512
+
+
+def _reduce_blocks(block: np.ndarray, reduce: str) -> np.ndarray:
+    """
+    Halve both sides of an array by reducing every 2 x 2 block, ignoring NaN
+    """
+    rows, columns = block.shape
+    padded = np.full((rows + rows % 2, columns + columns % 2), np.nan, dtype=np.float32)
+    padded[:rows, :columns] = block
+    quads = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+    present = ~np.isnan(quads)
+    counts = present.sum(axis=(1, 3))
+    if reduce == 'max':
+        result = np.where(present, quads, -np.inf).max(axis=(1, 3))
+    else:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = np.where(present, quads, 0).sum(axis=(1, 3)) / counts
+    return np.where(counts > 0, result, np.nan).astype(np.float32)
+
+
+class HeatmapPyramid:
+    """
+    A matrix stored as tiles at several levels of detail, read a viewport at a time
+    """
+
+    def __init__(self, directory, shape: tuple, tile: int, levels: int, reduce: str, value_range: tuple):
+        self.directory = Path(directory)
+        self.shape = tuple(shape)
+        self.tile = tile
+        self.levels = levels
+        self.reduce = reduce
+        self.value_range = tuple(value_range)
+
+    @classmethod
+    def build(cls, source, directory, tile: int = TILE_SIZE, reduce: str = 'mean') -> 'HeatmapPyramid':
+        """
+        Cut a matrix into tiles and work out every coarser level
+        :param source: 2D array-like that can be sliced without loading it whole, e.g.
+                       np.load(filename, mmap_mode='r'), a np.memmap or an h5py dataset
+        :param directory: str or Path of the folder to (re)create for the tiles; it is
+                          written under a temporary name and only replaces an older
+                          pyramid once complete
+        :param tile: int side of the square tiles
+        :param reduce: str 'mean' or 'max', how a coarser cell sums up the 2 x 2 cells below it
+        :return: HeatmapPyramid
+        """
+        if reduce not in ('mean', 'max'):
+            raise ValueError("reduce must be 'mean' or 'max', not {!r}".format(reduce))
+        directory = Path(directory)
+        tmp_dir = directory.with_name('{}.tmp{}'.format(directory.name, os.getpid()))
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        shape = tuple(source.shape)
+        levels = 1 + max(0, math.ceil(math.log2(max(shape) / tile)))
+        pyramid = cls(tmp_dir, shape, tile, levels, reduce, (np.nan, np.nan))
+        low, high = np.inf, -np.inf
+        for level in range(levels):
+            (tmp_dir / str(level)).mkdir(parents=True)
+            tile_rows, tile_columns = pyramid.tile_grid(level)
+            for row in range(tile_rows):
+                for column in range(tile_columns):
+                    if level == 0:
+                        values = np.asarray(source[row * tile:(row + 1) * tile, column * tile:(column + 1) * tile],
+                                            dtype=np.float32)
+                        if np.isfinite(values).any():
+                            low, high = min(low, np.nanmin(values)), max(high, np.nanmax(values))
+                    else:
+                        # the four tiles below this one, put back together and halved
+                        below = pyramid.read(level - 1, 2 * row * tile, 2 * (row + 1) * tile,
+                                             2 * column * tile, 2 * (column + 1) * tile)
+                        values = _reduce_blocks(below, reduce)
+                    np.save(pyramid._tile_path(level, row, column), values, allow_pickle=False)
+        pyramid.value_range = (float(low), float(high)) if low <= high else (np.nan, np.nan)
+        with open(tmp_dir / 'pyramid.json', 'w', encoding='utf-8') as outfile:
+            json.dump({'shape': shape, 'tile': tile, 'levels': levels, 'reduce': reduce,
+                       'value_range': pyramid.value_range}, outfile)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_dir, directory)
+        pyramid.directory = directory
+        return pyramid
+
+    @classmethod
+    def open(cls, directory) -> 'HeatmapPyramid':
+        """
+        Open a pyramid written by build()
+        :param directory: str or Path of its folder
+        :return: HeatmapPyramid
+        """
+        with open(Path(directory) / 'pyramid.json', encoding='utf-8') as infile:
+            meta = json.load(infile)
+        return cls(directory, meta['shape'], meta['tile'], meta['levels'], meta['reduce'], meta['value_range'])
+
+    def _tile_path(self, level: int, row: int, column: int) -> Path:
+        return self.directory / str(level) / '{}_{}.npy'.format(row, column)
+
+    def level_shape(self, level: int) -> tuple:
+        """
+        :param level: int level, 0 for full detail
+        :return: tuple of (rows, columns) of the matrix at that level
+        """
+        scale = 2 ** level
+        return -(-self.shape[0] // scale), -(-self.shape[1] // scale)
+
+    def tile_grid(self, level: int) -> tuple:
+        """
+        :param level: int level, 0 for full detail
+        :return: tuple of (rows, columns) of tiles at that level
+        """
+        rows, columns = self.level_shape(level)
+        return -(-rows // self.tile), -(-columns // self.tile)
+
+    def read(self, level: int, row_start: int, row_stop: int, column_start: int, column_stop: int) -> np.ndarray:
+        """
+        Read a block of one level, memory-mapping only the tiles it touches
+        :param level: int level, 0 for full detail
+        :param row_start: int first row, in cells of that level
+        :param row_stop: int row to stop before
+        :param column_start: int first column
+        :param column_stop: int column to stop before
+        :return: np.ndarray of float32, cut to the matrix where the block runs past its edges
+        """
+        rows, columns = self.level_shape(level)
+        row_start, row_stop = max(0, row_start), min(rows, row_stop)
+        column_start, column_stop = max(0, column_start), min(columns, column_stop)
+        block = np.empty((max(0, row_stop - row_start), max(0, column_stop - column_start)), dtype=np.float32)
+        tile = self.tile
+        for row in range(row_start // tile, -(-row_stop // tile)):
+            for column in range(column_start // tile, -(-column_stop // tile)):
+                values = np.load(self._tile_path(level, row, column), mmap_mode='r')
+                top, left = row * tile, column * tile
+                r0, r1 = max(row_start, top), min(row_stop, top + values.shape[0])
+                c0, c1 = max(column_start, left), min(column_stop, left + values.shape[1])
+                block[r0 - row_start:r1 - row_start, c0 - column_start:c1 - column_start] = \
+                    values[r0 - top:r1 - top, c0 - left:c1 - left]
+        return block
+
+    def choose_level(self, rows: float, columns: float, pixels_high: int, pixels_wide: int) -> int:
+        """
+        Pick the coarsest level that still has about one cell per pixel
+        :param rows: float number of full-detail rows in view
+        :param columns: float number of full-detail columns in view
+        :param pixels_high: int height of the view in pixels
+        :param pixels_wide: int width of the view in pixels
+        :return: int level
+        """
+        cells_per_pixel = max(rows / max(1, pixels_high), columns / max(1, pixels_wide), 1)
+        return min(self.levels - 1, int(math.floor(math.log2(cells_per_pixel))))
+
+    def view(self, row_range: tuple, column_range: tuple, pixels_high: int, pixels_wide: int) -> tuple:
+        """
+        Read what a viewport shows, at the detail it can show
+        :param row_range: tuple of the (low, high) full-detail rows in view
+        :param column_range: tuple of the (low, high) full-detail columns in view
+        :param pixels_high: int height of the view in pixels
+        :param pixels_wide: int width of the view in pixels
+        :return: tuple of (np.ndarray of the cells in view, int level, tuple of the
+                 (row start, row stop, column start, column stop) it covers in full-detail cells)
+        """
+        (row_low, row_high), (column_low, column_high) = sorted(row_range), sorted(column_range)
+        level = self.choose_level(row_high - row_low, column_high - column_low, pixels_high, pixels_wide)
+        scale = 2 ** level
+        # whole cells of that level, one extra on every side so panning doesn't show an edge
+        start_row, start_column = int(math.floor(row_low / scale)) - 1, int(math.floor(column_low / scale)) - 1
+        stop_row, stop_column = int(math.ceil(row_high / scale)) + 1, int(math.ceil(column_high / scale)) + 1
+        rows, columns = self.level_shape(level)
+        start_row, start_column = max(0, start_row), max(0, start_column)
+        stop_row, stop_column = min(rows, stop_row), min(columns, stop_column)
+        block = self.read(level, start_row, stop_row, start_column, stop_column)
+        return block, level, (start_row * scale, min(self.shape[0], stop_row * scale),
+                              start_column * scale, min(self.shape[1], stop_column * scale))
+
+    def __repr__(self) -> str:
+        return 'HeatmapPyramid({} x {}, {} levels of {} x {} tiles, {})'.format(
+            self.shape[0], self.shape[1], self.levels, self.tile, self.tile, self.reduce)
+
+
+def mpl_pyramid(axis, pyramid: HeatmapPyramid, **kwargs):
+    """
+    Show a pyramid on a Matplotlib axis, reading the detail for the view on every zoom or pan
+    The axes are in full-detail cells: x is the column and y the row, row 0 at the top.
+    :param axis: matplotlib Axes to draw on
+    :param pyramid: HeatmapPyramid
+    :param kwargs: passed on to axis.imshow, e.g. cmap; the colors cover the whole matrix
+                   unless vmin or vmax are given
+    :return: matplotlib AxesImage; pass it to plt.colorbar for a color bar
+    """
+    rows, columns = pyramid.shape
+    low, high = pyramid.value_range
+    kwargs.setdefault('vmin', low)
+    kwargs.setdefault('vmax', high)
+    kwargs.setdefault('interpolation', 'nearest')
+    kwargs.setdefault('aspect', 'auto')
+    image = axis.imshow(np.zeros((1, 1), dtype=np.float32), **kwargs)
+    state = {'view': None}
+
+    def update(changed_axis=None) -> None:
+        box = axis.get_window_extent()
+        column_range, row_range = axis.get_xlim(), axis.get_ylim()
+        block, level, (row0, row1, column0, column1) = pyramid.view(
+            row_range, column_range, int(box.height), int(box.width))
+        if state['view'] == (level, row0, row1, column0, column1):
+            return
+        state['view'] = (level, row0, row1, column0, column1)
+        image.set_data(block)
+        # cell edges sit half a cell before the cell numbers, like imshow's own extent
+        image.set_extent((column0 - 0.5, column1 - 0.5, row1 - 0.5, row0 - 0.5))
+
+    axis.set_xlim(-0.5, columns - 0.5)
+    axis.set_ylim(rows - 0.5, -0.5)
+    update()
+    # xlim and ylim both change on a zoom; the second call finds nothing new to read
+    axis.callbacks.connect('xlim_changed', update)
+    axis.callbacks.connect('ylim_changed', update)
+    return image
+
+
+def go_pyramid(pyramid: HeatmapPyramid, width: int = 700, height: int = 500, colorscale: str = 'Viridis',
+               **kwargs):
+    """
+    Show a pyramid in a Plotly figure that reads the detail for the view on every zoom or pan
+    This needs a live Python kernel (Jupyter) and the optional anywidget package; without
+    them the figure shows the whole matrix at the detail of its size, and zooming in just
+    enlarges that. Either way only what is in view goes into the figure, never the matrix.
+    :param pyramid: HeatmapPyramid
+    :param width: int figure width in pixels
+    :param height: int figure height in pixels
+    :param colorscale: str Plotly color scale
+    :param kwargs: passed on to go.Heatmap
+    :return: plotly FigureWidget, or a go.Figure without a kernel
+    """
+    import plotly.graph_objects as go
+    rows, columns = pyramid.shape
+    low, high = pyramid.value_range
+    # the plotting area inside Plotly's default margins
+    plot_width, plot_height = width - 160, height - 180
+
+    def heatmap_data(row_range, column_range) -> dict:
+        block, level, (row0, row1, column0, column1) = pyramid.view(row_range, column_range,
+                                                                     plot_height, plot_width)
+        scale = 2 ** level
+        return {'z': block, 'x0': column0 + (scale - 1) / 2, 'dx': scale, 'y0': row0 + (scale - 1) / 2, 'dy': scale}
+
+    figure = go.Figure(go.Heatmap(colorscale=colorscale, zmin=low, zmax=high,
+                                  **heatmap_data((0, rows), (0, columns)), **kwargs),
+                       layout={'width': width, 'height': height,
+                               'xaxis': {'range': [-0.5, columns - 0.5], 'constrain': 'domain'},
+                               'yaxis': {'range': [rows - 0.5, -0.5]}})
+    try:
+        widget = go.FigureWidget(figure)
+    except ImportError:
+        return figure
+
+    def update(layout, x_range, y_range) -> None:
+        # a double-click autorange can send no range at all, which means the whole matrix
+        with widget.batch_update():
+            widget.data[0].update(heatmap_data(y_range or (0, rows), x_range or (0, columns)))
+
+    widget.layout.on_change(update, 'xaxis.range', 'yaxis.range')
+    return widget
@@ -0,0 +1,328 @@
+"""
+Box and violin plot statistics from mergeable quantile sketches
+
+A box plot needs only a handful of numbers: quartiles, whisker ends, notches and the
+outliers. A QuantileSketch (a KLL sketch) gets those in one pass, in a fixed amount of
+memory, from any number of chunks. Sketches built from separate chunks, files or worker
+processes merge into one that describes all the data.
+
+The sketch keeps up to `k` values per level. Values at level h stand for 2**h of the
+original values, and whenever a level fills up, every other value of it (after sorting)
+moves up a level. Quantiles are within about 1.7/k of the true rank (0.2% for the
+default k=1000); until the first level fills up the sketch holds every value and the
+statistics are exact. The smallest and largest `extremes` values are kept as they are,
+so the whiskers and outliers come from real data points; past that many outliers on a
+side, the most extreme ones are shown.
+
+The statistics come out in the shapes the plotting libraries accept precomputed:
+Matplotlib's Axes.bxp and Axes.violin, and Plotly's box q1/median/q3 mode.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from pyviz.histogram import CHUNK_SIZE, read_frames
+
+# above this many rows the Plotly charts get precomputed statistics instead of raw values
+SKETCH_ROWS = 100_000
+
+
+class QuantileSketch:
+    """
+    A KLL quantile sketch plus the exact count, sum, minimum, maximum and extreme values
+    """
+
+    def __init__(self, k: int = 1000, extremes: int = 100, seed: int = None):
+        self.k = k
+        self.extremes = extremes
+        self.rng = np.random.default_rng(seed)
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.total = 0.0
+        self.low = np.empty(0)
+        self.high = np.empty(0)
+
+    def _capacity(self, level: int) -> int:
+        # lower levels shrink geometrically, so the whole sketch holds about 3k values
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compact(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                items = np.sort(items)
+                # an odd value out stays behind; of the rest, every other one moves up a level
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                promoted = paired[self.rng.integers(2)::2]
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                # a new top level shrinks the capacity of every level below it
+                level = 0
+            else:
+                level += 1
+
+    def _keep_extremes(self, low: np.ndarray, high: np.ndarray) -> None:
+        # the two ends are cut separately: with fewer values than `extremes` they overlap
+        low = np.concatenate([self.low, low])
+        high = np.concatenate([self.high, high])
+        if len(low) > self.extremes:
+            low = np.partition(low, self.extremes - 1)[:self.extremes]
+        if len(high) > self.extremes:
+            high = np.partition(high, len(high) - self.extremes)[-self.extremes:]
+        self.low, self.high = np.sort(low), np.sort(high)
+
+    def update(self, values) -> 'QuantileSketch':
+        """
+        Add a chunk of values; NaN is ignored
+        :param values: array or pd.Series of numbers
+        :return: this sketch
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.total += float(values.sum())
+        self._keep_extremes(values, values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compact()
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """
+        Fold another sketch into this one, e.g. one built by a worker process
+        :param other: QuantileSketch
+        :return: this sketch
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.total += other.total
+        self._keep_extremes(other.low, other.high)
+        self._compact()
+        return self
+
+    @property
+    def exact(self) -> bool:
+        """
+        True while the sketch still holds every value it was given
+        """
+        return len(self.levels) == 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else np.nan
+
+    @property
+    def min(self) -> float:
+        return float(self.low[0]) if self.count else np.nan
+
+    @property
+    def max(self) -> float:
+        return float(self.high[-1]) if self.count else np.nan
+
+    def items(self) -> tuple:
+        """
+        :return: tuple of (np.ndarray sorted values, np.ndarray how many original values each stands for)
+        """
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def quantile(self, q):
+        """
+        Estimate quantiles; exact, with NumPy's linear interpolation, while the sketch is exact
+        :param q: float or array of floats between 0 and 1
+        :return: float or np.ndarray of the quantile values
+        """
+        if not self.count:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        if self.exact:
+            return np.quantile(self.levels[0], q)
+        values, weights = self.items()
+        # each value sits at the middle of the ranks it stands for
+        ranks = (np.cumsum(weights) - weights / 2) / weights.sum()
+        result = np.interp(q, ranks, values, left=self.min, right=self.max)
+        return result if np.ndim(q) else float(result)
+
+    def __repr__(self) -> str:
+        return 'QuantileSketch({} values, {} kept, {})'.format(
+            self.count, sum(len(items) for items in self.levels), 'exact' if self.exact else 'approximate')
+
+
+def sketch_frame(chunks, columns: list, by: str = None, **kwargs) -> dict:
+    """
+    Sketch some columns of a stream of DataFrame chunks in one pass
+    :param chunks: iterable of pd.DataFrame, or a single pd.DataFrame
+    :param columns: list of str column names
+    :param by: str name of a column to group by, or None
+    :param kwargs: passed on to QuantileSketch
+    :return: dict of column name (or (group, column name) with `by`) to QuantileSketch
+    """
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+    sketches = {}
+    for chunk in chunks:
+        parts = chunk.groupby(by, observed=True, sort=False) if by else [(None, chunk)]
+        for group, part in parts:
+            for column in columns:
+                key = (group, column) if by else column
+                if key not in sketches:
+                    sketches[key] = QuantileSketch(**kwargs)
+                sketches[key].update(part[column].to_numpy())
+    return sketches
+
+
+def merge_sketches(parts) -> dict:
+    """
+    Merge the sketch_frame() results of several partitions
+    :param parts: iterable of dicts of key to QuantileSketch
+    :return: dict of key to QuantileSketch
+    """
+    merged = {}
+    for part in parts:
+        for key, sketch in part.items():
+            if key in merged:
+                merged[key].merge(sketch)
+            else:
+                merged[key] = sketch
+    return merged
+
+
+def sketch_file(path: str, columns: list, by: str = None, chunk_size: int = CHUNK_SIZE) -> dict:
+    return sketch_frame(read_frames(path, list(columns) + ([by] if by else []), chunk_size), columns, by)
+
+
+def sketch_files(paths: list, columns: list, by: str = None, jobs: int = None,
+                 chunk_size: int = CHUNK_SIZE) -> dict:
+    """
+    Sketch some columns across many CSV or Parquet files, one file per worker process
+    :param paths: list of str paths
+    :param columns: list of str column names
+    :param by: str name of a column to group by, or None
+    :param jobs: int number of worker processes, default one per core
+    :param chunk_size: int rows per chunk
+    :return: dict of column name (or (group, column name)) to QuantileSketch
+    """
+    if not paths:
+        raise ValueError('no files to sketch')
+    with ProcessPoolExecutor(max_workers=min(len(paths), jobs or os.cpu_count())) as pool:
+        return merge_sketches(pool.map(sketch_file, paths, [columns] * len(paths), [by] * len(paths),
+                                       [chunk_size] * len(paths)))
+
+
+def box_stats(sketch: QuantileSketch, whis: float = 1.5, label: str = None) -> dict:
+    """
+    The statistics of one box, in the form Matplotlib's Axes.bxp takes
+    :param sketch: QuantileSketch of the values
+    :param whis: float whisker reach in interquartile ranges past the quartiles
+    :param label: str label of the box
+    :return: dict with med, q1, q3, whislo, whishi, cilo, cihi, mean, fliers, iqr, n and label
+    """
+    q1, median, q3 = sketch.quantile([0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    low_fence, high_fence = q1 - whis * iqr, q3 + whis * iqr
+    values, _ = sketch.items()
+    candidates = np.concatenate([sketch.low, values, sketch.high])
+    inside = candidates[(candidates >= low_fence) & (candidates <= high_fence)]
+    # the notches are Matplotlib's: the median +/- 1.57 IQR / sqrt(n)
+    notch = 1.57 * iqr / np.sqrt(sketch.count)
+    fliers = np.concatenate([sketch.low[sketch.low < low_fence], sketch.high[sketch.high > high_fence]])
+    return {'label': label, 'med': median, 'q1': q1, 'q3': q3, 'iqr': iqr,
+            'whislo': inside.min() if len(inside) else q1, 'whishi': inside.max() if len(inside) else q3,
+            'cilo': median - notch, 'cihi': median + notch, 'mean': sketch.mean,
+            'fliers': np.sort(fliers), 'n': sketch.count}
+
+
+def violin_stats(sketch: QuantileSketch, quantiles: list = (), points: int = 100) -> dict:
+    """
+    The statistics of one violin, in the form Matplotlib's Axes.violin takes
+    The density is a Gaussian KDE (Scott's rule on the full count) of the sketch's values,
+    each weighted by how many values it stands for.
+    :param sketch: QuantileSketch of the values
+    :param quantiles: list of floats between 0 and 1 to mark on the violin
+    :param points: int number of points the density is evaluated at
+    :return: dict with coords, vals, mean, median, min, max and quantiles
+    """
+    from pyviz.kde import kde_1d
+    values, weights = sketch.items()
+    coords = np.linspace(sketch.min, sketch.max, points)
+    _, density = kde_1d(values, weights, bw_method=sketch.count ** (-1 / 5), support=coords)
+    return {'coords': coords, 'vals': density, 'mean': sketch.mean, 'median': sketch.quantile(0.5),
+            'min': sketch.min, 'max': sketch.max,
+            'quantiles': np.asarray(sketch.quantile(list(quantiles))) if len(quantiles) else np.empty(0)}
+
+
+def go_box_traces(stats: list, notched: bool = False, colors: list = None, outliercolor: str = None) -> list:
+    """
+    Make Plotly box traces from precomputed statistics, plus a marker trace for the outliers
+    :param stats: list of box_stats() dicts
+    :param notched: bool draw notches
+    :param colors: list of colors, one per box, default Plotly's color sequence
+    :param outliercolor: str color of the outlier markers, default the box color
+    :return: list of go.Box and go.Scatter traces
+    """
+    import plotly.graph_objects as go
+    from plotly.colors import qualitative
+    colors = colors or qualitative.Plotly
+    traces = []
+    for i, box in enumerate(stats):
+        color = colors[i % len(colors)]
+        traces.append(go.Box(x=[box['label']], q1=[box['q1']], median=[box['med']], q3=[box['q3']],
+                             lowerfence=[box['whislo']], upperfence=[box['whishi']], mean=[box['mean']],
+                             notchspan=[box['cihi'] - box['med']] if notched else None,
+                             notched=notched, name=box['label'], marker_color=color, boxpoints=False))
+        if len(box['fliers']):
+            traces.append(go.Scatter(x=[box['label']] * len(box['fliers']), y=box['fliers'], mode='markers',
+                                     marker={'color': outliercolor or color, 'symbol': 'circle-open'},
+                                     name=box['label'], showlegend=False,
+                                     hovertemplate='%{y}<extra>' + str(box['label']) + '</extra>'))
+    return traces
+
+
+def go_violin_traces(stats: list, labels: list, boxes: list = None, colors: list = None,
+                     outliercolor: str = None, width: float = 0.8) -> list:
+    """
+    Draw violins from precomputed densities as filled Plotly shapes on a numeric x axis;
+    set the x ticks to the labels with layout xaxis tickvals=list(range(len(labels)))
+    :param stats: list of violin_stats() dicts
+    :param labels: list of str violin names
+    :param boxes: list of box_stats() dicts to draw inside the violins, with their outliers
+    :param colors: list of colors, one per violin, default Plotly's color sequence
+    :param outliercolor: str color of the outlier markers, default the violin color
+    :param width: float widest violin width in x units
+    :return: list of go.Scatter and go.Box traces
+    """
+    import plotly.graph_objects as go
+    from plotly.colors import qualitative
+    colors = colors or qualitative.Plotly
+    widest = max(violin['vals'].max() for violin in stats)
+    traces = []
+    for i, (violin, label) in enumerate(zip(stats, labels)):
+        color = colors[i % len(colors)]
+        half = violin['vals'] / widest * width / 2
+        traces.append(go.Scatter(x=np.concatenate([i - half, (i + half)[::-1]]),
+                                 y=np.concatenate([violin['coords'], violin['coords'][::-1]]),
+                                 fill='toself', mode='lines', line={'color': color, 'width': 1},
+                                 name=label, hoverinfo='name'))
+        if boxes:
+            box = boxes[i]
+            traces.append(go.Box(x=[i], q1=[box['q1']], median=[box['med']], q3=[box['q3']],
+                                 lowerfence=[box['whislo']], upperfence=[box['whishi']],
+                                 width=width / 8, marker_color=color, fillcolor='white',
+                                 boxpoints=False, showlegend=False, name=label))
+            if len(box['fliers']):
+                traces.append(go.Scatter(x=[i] * len(box['fliers']), y=box['fliers'], mode='markers',
+                                         marker={'color': outliercolor or color}, showlegend=False,
+                                         name=label))
+    return traces
@@ -0,0 +1,232 @@
+"""
+Render every chapter's figures to files without opening a single window
+
+Each chapter script exposes load_data(), an optional prepare() for derived columns,
+and a FIGURES list. Every entry in FIGURES is a function that takes the prepared data
+as keyword arguments and returns a Matplotlib figure, a Matplotlib animation, or a
+Plotly figure. This module runs those functions
+in a process pool under the Agg backend and writes the results to an output folder.
+
+Run it from the code/ folder:
+    python -m pyviz.render -o figures
+    python -m pyviz.render 01 05 --formats png html --jobs 4
+"""
+import argparse
+import ast
+import glob
+import importlib.util
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORMATS = ('png', 'svg', 'html')
+
+# render_figure() puts the folder a figure is being written to here, for figures that
+# write files next to their HTML (see figure_dir)
+FIGURE_DIR_VARIABLE = 'PYVIZ_FIGURE_DIR'
+
+# per-process caches so a worker imports a chapter and loads its data only once
+_chapters = {}
+_chapter_data = {}
+
+
+def chapter_scripts(selection: list = None) -> list:
+    """
+    Find the chapter scripts, optionally narrowed down to some chapters
+    :param selection: list of str chapter prefixes or names, e.g. ['01', 'barcharts']
+    :return: list of str paths to the chapter scripts, in chapter order
+    """
+    scripts = sorted(glob.glob(os.path.join(CODE_DIR, '[0-9][0-9]-*', '*.py')))
+    if not selection:
+        return scripts
+    return [script for script in scripts
+            if any(os.path.basename(os.path.dirname(script)).startswith(choice)
+                   or choice in os.path.basename(os.path.dirname(script))
+                   for choice in selection)]
+
+
+def figure_names(path: str) -> list:
+    """
+    Read the FIGURES list of a chapter without importing it (and its plotting libraries)
+    :param path: str path to the chapter script
+    :return: list of str figure function names
+    """
+    with open(path, encoding='utf-8') as infile:
+        tree = ast.parse(infile.read(), filename=path)
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and isinstance(node.value, (ast.List, ast.Tuple))
+                and any(isinstance(target, ast.Name) and target.id == 'FIGURES'
+                        for target in node.targets)):
+            return [element.id for element in node.value.elts if isinstance(element, ast.Name)]
+    return []
+
+
+def load_chapter(path: str):
+    """
+    Import a chapter script as a module, once per process
+    :param path: str path to the chapter script
+    :return: the chapter module
+    """
+    if path not in _chapters:
+        chapter = os.path.basename(os.path.dirname(path))
+        module_name = 'chapter_' + chapter.replace('-', '_')
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        _chapters[path] = module
+    return _chapters[path]
+
+
+def prepare_data(module, data: dict) -> dict:
+    """
+    Run a chapter's prepare() step on its loaded data, if it has one
+    :param module: the chapter module
+    :param data: dict returned by the chapter's load_data()
+    :return: dict of keyword arguments for the chapter's figure functions
+    """
+    if hasattr(module, 'prepare'):
+        return module.prepare(**data)
+    return data
+
+
+def load_chapter_data(path: str) -> dict:
+    """
+    Call a chapter's load_data() and prepare(), once per process
+    :param path: str path to the chapter script
+    :return: dict of keyword arguments for the chapter's figure functions
+    """
+    if path not in _chapter_data:
+        module = load_chapter(path)
+        _chapter_data[path] = prepare_data(module, module.load_data())
+    return _chapter_data[path]
+
+
+def figure_dir():
+    """
+    The folder the figure being built will be written to, for assets its HTML loads by a
+    relative URL, such as a shared GeoJSON file
+    :return: str folder while rendering to files, or None when the figure is only shown
+    """
+    return os.environ.get(FIGURE_DIR_VARIABLE)
+
+
+def show(figure) -> None:
+    """
+    Display a figure interactively, the way the chapter scripts used to at the top level
+    :param figure: Matplotlib figure or animation, or Plotly figure
+    :return: None
+    """
+    if hasattr(figure, 'to_plotly_json'):
+        figure.show()
+    else:
+        import matplotlib.pyplot as plt
+        plt.show()
+
+
+def save(figure, stem: str, formats: tuple = FORMATS) -> list:
+    """
+    Write a figure to disk in every requested format that suits it
+    Matplotlib figures become PNG/SVG, Matplotlib animations become a GIF, and Plotly
+    figures become HTML (plus PNG/SVG when kaleido is installed).
+    :param figure: Matplotlib figure or animation, or Plotly figure
+    :param stem: str output path without an extension
+    :param formats: tuple of str formats to write
+    :return: list of str paths written
+    """
+    written = []
+    if hasattr(figure, 'to_plotly_json'):
+        if 'html' in formats:
+            # 'directory' writes plotly.min.js once next to the files instead of inlining
+            # 3 MB of JavaScript into every figure, and still works without a network
+            figure.write_html(stem + '.html', include_plotlyjs='directory')
+            written.append(stem + '.html')
+        # static Plotly export needs the optional kaleido package
+        static = [fmt for fmt in formats if fmt in ('png', 'svg')]
+        if importlib.util.find_spec('kaleido') is None:
+            static = []
+        for fmt in static:
+            figure.write_image('{}.{}'.format(stem, fmt))
+            written.append('{}.{}'.format(stem, fmt))
+        return written
+
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import Animation, PillowWriter
+    if isinstance(figure, Animation):
+        figure.save(stem + '.gif', writer=PillowWriter(fps=30))
+        plt.close(figure._fig)
+        return [stem + '.gif']
+
+    for fmt in formats:
+        if fmt in ('png', 'svg'):
+            figure.savefig('{}.{}'.format(stem, fmt), bbox_inches='tight')
+            written.append('{}.{}'.format(stem, fmt))
+    plt.close(figure)
+    return written
+
+
+def render_figure(path: str, name: str, output_dir: str, formats: tuple) -> tuple:
+    """
+    Build one figure of one chapter and save it; this is what each worker runs
+    :param path: str path to the chapter script
+    :param name: str name of the figure function in the chapter's FIGURES
+    :param output_dir: str folder to write into, one sub-folder per chapter
+    :param formats: tuple of str formats to write
+    :return: tuple of (chapter, name, list of paths written, seconds, error text or None)
+    """
+    chapter = os.path.basename(os.path.dirname(path))
+    start = time.perf_counter()
+    try:
+        module = load_chapter(path)
+        chapter_dir = os.path.join(output_dir, chapter)
+        os.makedirs(chapter_dir, exist_ok=True)
+        os.environ[FIGURE_DIR_VARIABLE] = chapter_dir
+        figure = getattr(module, name)(**load_chapter_data(path))
+        written = save(figure, os.path.join(chapter_dir, name), formats)
+        return chapter, name, written, time.perf_counter() - start, None
+    except Exception:
+        return chapter, name, [], time.perf_counter() - start, traceback.format_exc()
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Render the book's figures to files")
+    parser.add_argument('chapters', nargs='*',
+                        help="chapter numbers or names to render, e.g. 01 barcharts (default: all)")
+    parser.add_argument('-o', '--output', default='figures', help='output folder')
+    parser.add_argument('-f', '--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='number of worker processes (default: one per core)')
+    args = parser.parse_args(argv)
+
+    # workers inherit the environment, so nothing imports Matplotlib before a chart needs it
+    os.environ['MPLBACKEND'] = 'Agg'
+    jobs = [(script, name) for script in chapter_scripts(args.chapters)
+            for name in figure_names(script)]
+    if not jobs:
+        parser.error('no figures found for {}'.format(' '.join(args.chapters)))
+
+    failures = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = [pool.submit(render_figure, script, name, args.output, tuple(args.formats))
+                   for script, name in jobs]
+        for future in as_completed(futures):
+            chapter, name, written, seconds, error = future.result()
+            if error:
+                failures += 1
+                print('FAILED {}/{} ({:.2f}s)\n{}'.format(chapter, name, seconds, error),
+                      file=sys.stderr)
+            else:
+                print('{}/{} ({:.2f}s): {}'.format(chapter, name, seconds,
+                                                   ', '.join(os.path.basename(p) for p in written)))
+
+    print('Rendered {} of {} figures in {:.1f}s'.format(len(jobs) - failures, len(jobs),
+                                                        time.perf_counter() - start))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""
+Scatter plots split by a category column, built from one pass over the data
+
+Filtering the frame once per category (df[df['origin'] == 'usa'], ...) scans every row
+for every category and copies every column each time. Here the category column is turned
+into integer codes once, the row positions of each group come from one stable sort of
+those codes, and only the x and y values of each group are gathered.
+
+Past a few hundred thousand points, drawing markers stops making sense: Matplotlib
+draws every one and Plotly writes every coordinate into the HTML. Above DENSITY_POINTS
+the helpers switch to rasterizing the points into a density image at screen resolution,
+and above WEBGL_POINTS the Plotly traces switch to Scattergl. NumPy arrays are written
+by Plotly as binary typed arrays rather than JSON number lists.
+"""
+import numpy as np
+import pandas as pd
+
+WEBGL_POINTS = 50_000
+DENSITY_POINTS = 500_000
+
+
+def group_codes(groups) -> tuple:
+    """
+    Encode a category column as integer codes
+    :param groups: pd.Series or array of category values
+    :return: tuple of (np.ndarray of int codes, -1 for missing, list of the category values)
+    """
+    groups = pd.Series(groups)
+    if isinstance(groups.dtype, pd.CategoricalDtype):
+        return groups.cat.codes.to_numpy(), list(groups.cat.categories)
+    codes, uniques = pd.factorize(groups)
+    return codes, list(uniques)
+
+
+def partition(groups) -> list:
+    """
+    Find the row positions of every group with a single sort
+    :param groups: pd.Series or array of category values
+    :return: list of (category value, np.ndarray of row positions) in category order;
+             categories without rows are left out
+    """
+    codes, names = group_codes(groups)
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=len(names))
+    # missing values (code -1) sort first; skip past them
+    start = len(codes) - counts.sum()
+    bounds = start + np.concatenate([[0], np.cumsum(counts)])
+    return [(name, order[bounds[i]:bounds[i + 1]]) for i, name in enumerate(names) if counts[i]]
+
+
+def color_array(groups, colors: dict, default: str = 'gray') -> np.ndarray:
+    """
+    Look up one color per row through the category codes
+    :param groups: pd.Series or array of category values
+    :param colors: dict of category value to color
+    :param default: str color for categories missing from `colors` and for missing values
+    :return: np.ndarray of color strings, one per row
+    """
+    codes, names = group_codes(groups)
+    lookup = np.array([colors.get(name, default) for name in names] + [default], dtype=object)
+    return lookup[codes]
+
+
+def mpl_grouped_scatter(axis, x, y, groups, colors: dict = None, labels: dict = None,
+                        single_trace: bool = False, density: bool = None, **kwargs) -> list:
+    """
+    Scatter x against y on a Matplotlib axis, one color per group
+    :param axis: matplotlib Axes to draw on
+    :param x: pd.Series or array of x values
+    :param y: pd.Series or array of y values
+    :param groups: pd.Series or array of category values
+    :param colors: dict of category value to color, default the Matplotlib color cycle
+    :param labels: dict of category value to legend label, default the value itself
+    :param single_trace: bool draw one PathCollection with a color per point instead of one
+                         per group; empty per-group artists still label the legend
+    :param density: bool draw a density image instead of markers, default above DENSITY_POINTS
+    :param kwargs: passed on to axis.scatter
+    :return: list of the artists drawn
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    if density is None:
+        density = len(x) > DENSITY_POINTS
+    if density:
+        return [mpl_density_scatter(axis, x, y, groups, colors, labels)]
+    labels = labels or {}
+    parts = partition(groups)
+    if colors is None:
+        import matplotlib
+        cycle = matplotlib.rcParams['axes.prop_cycle'].by_key()['color']
+        colors = {name: cycle[i % len(cycle)] for i, (name, _) in enumerate(parts)}
+
+    if not single_trace:
+        return [axis.scatter(x[rows], y[rows], color=colors[name], label=labels.get(name, name), **kwargs)
+                for name, rows in parts]
+
+    artist = axis.scatter(x, y, c=color_array(groups, colors), **kwargs)
+    legend = [axis.scatter([], [], color=colors[name], label=labels.get(name, name), **kwargs)
+              for name, _ in parts]
+    return [artist] + legend
+
+
+def go_grouped_scatter(x, y, groups, colors: dict = None, names: dict = None,
+                       single_trace: bool = False, webgl: bool = None, **kwargs) -> list:
+    """
+    Make Plotly scatter traces of x against y, one color per group
+    :param x: pd.Series or array of x values
+    :param y: pd.Series or array of y values
+    :param groups: pd.Series or array of category values
+    :param colors: dict of category value to color, default Plotly's color sequence
+    :param names: dict of category value to trace name, default the value itself
+    :param single_trace: bool make one trace with a color per point instead of one trace per
+                         group; much faster with many groups, but the legend can't toggle groups
+    :param webgl: bool make go.Scattergl traces, default above WEBGL_POINTS
+    :param kwargs: passed on to every go.Scatter, e.g. mode or hovertemplate
+    :return: list of go.Scatter or go.Scattergl traces
+    """
+    import plotly.graph_objects as go
+    x, y = np.asarray(x), np.asarray(y)
+    if webgl is None:
+        webgl = len(x) > WEBGL_POINTS
+    trace = go.Scattergl if webgl else go.Scatter
+    names = names or {}
+    kwargs.setdefault('mode', 'markers')
+    parts = partition(groups)
+    if colors is None:
+        from plotly.colors import qualitative
+        sequence = qualitative.Plotly
+        colors = {name: sequence[i % len(sequence)] for i, (name, _) in enumerate(parts)}
+
+    if single_trace:
+        return [trace(x=x, y=y, marker={'color': color_array(groups, colors)},
+                      showlegend=False, **kwargs)]
+    return [trace(x=x[rows], y=y[rows], marker={'color': colors[name]},
+                  name=str(names.get(name, name)), **kwargs)
+            for name, rows in parts]
+
+
+def add_grouped_scatter(figure, x, y, groups, colors: dict = None, names: dict = None,
+                        single_trace: bool = False, density: bool = None, **kwargs):
+    """
+    Add a scatter plot split by category to a Plotly figure, as markers or as a density image
+    :param figure: plotly Figure to draw on
+    :param x: pd.Series or array of x values
+    :param y: pd.Series or array of y values
+    :param groups: pd.Series or array of category values
+    :param colors: dict of category value to color, default Plotly's color sequence
+    :param names: dict of category value to trace name, default the value itself
+    :param single_trace: bool one trace with a color per point instead of one per group
+    :param density: bool add a density image instead of markers, default above DENSITY_POINTS
+    :param kwargs: passed on to go_grouped_scatter; ignored for the density image
+    :return: the plotly Figure
+    """
+    if density is None:
+        density = len(x) > DENSITY_POINTS
+    if density:
+        return add_density_image(figure, x, y, groups, colors, names)
+    return figure.add_traces(go_grouped_scatter(x, y, groups, colors, names, single_trace, **kwargs))
+
+
+def present_groups(groups) -> list:
+    """
+    The category values that actually occur, in category order, without sorting the rows
+    """
+    codes, names = group_codes(groups)
+    counts = np.bincount(codes[codes >= 0], minlength=len(names))
+    return [name for name, count in zip(names, counts) if count]
+
+
+def _pixels(values, low: float, high: float, size: int) -> np.ndarray:
+    """
+    Map values to pixel numbers 0..size-1; values outside [low, high] or NaN get -1
+    """
+    scaled = (np.asarray(values, dtype=np.float64) - low) * (size / (high - low))
+    inside = (scaled >= 0) & (scaled <= size)
+    pixels = np.full(len(scaled), -1, dtype=np.int64)
+    pixels[inside] = np.minimum(scaled[inside].astype(np.int64), size - 1)
+    return pixels
+
+
+def data_range(values) -> tuple:
+    """
+    The (low, high) of some values, ignoring NaN, widened a little when they are all equal
+    """
+    low, high = float(np.nanmin(values)), float(np.nanmax(values))
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return low, high
+
+
+def rasterize(x, y, groups=None, colors: dict = None, width: int = 800, height: int = 600,
+              x_range: tuple = None, y_range: tuple = None, chunk_size: int = 5_000_000) -> tuple:
+    """
+    Aggregate points into an RGBA image instead of drawing them one by one
+    Each pixel counts the points that fall into it. Its color is the average of the group
+    colors of those points, and its opacity grows with the log of the count, so both the
+    dense cores and the sparse outliers stay visible. The points are read in chunks and
+    only per-pixel sums are kept, so memory does not grow with the number of points or
+    of groups.
+    :param x: array of x values
+    :param y: array of y values
+    :param groups: pd.Series or array of category values, or None for one color
+    :param colors: dict of category value to color (any Matplotlib color), default the color cycle
+    :param width: int image width in pixels
+    :param height: int image height in pixels
+    :param x_range: tuple of (low, high) x values to cover, default the data range
+    :param y_range: tuple of (low, high) y values to cover, default the data range
+    :param chunk_size: int points per chunk
+    :return: tuple of (np.ndarray uint8 image of shape (height, width, 4) with row 0 at the
+             bottom, tuple of (x low, x high, y low, y high))
+    """
+    import matplotlib
+    from matplotlib.colors import to_rgb
+    x, y = np.asarray(x), np.asarray(y)
+    x_range = tuple(x_range or data_range(x))
+    y_range = tuple(y_range or data_range(y))
+    cycle = matplotlib.rcParams['axes.prop_cycle'].by_key()['color']
+
+    if groups is None:
+        codes, names = np.zeros(len(x), dtype=np.int64), [None]
+        colors = colors or {None: cycle[0]}
+    else:
+        codes, names = group_codes(groups)
+        if colors is None:
+            colors = {name: cycle[i % len(cycle)] for i, name in enumerate(names)}
+    # one RGB row per group, and a last one for missing groups (code -1)
+    palette = np.array([to_rgb(colors.get(name, 'gray')) for name in names] + [to_rgb('gray')])
+
+    size = width * height
+    counts = np.zeros(size, dtype=np.float64)
+    channels = np.zeros((3, size), dtype=np.float64)
+    for start in range(0, len(x), chunk_size):
+        stop = start + chunk_size
+        columns = _pixels(x[start:stop], x_range[0], x_range[1], width)
+        rows = _pixels(y[start:stop], y_range[0], y_range[1], height)
+        inside = (columns >= 0) & (rows >= 0)
+        pixel = rows[inside] * width + columns[inside]
+        counts += np.bincount(pixel, minlength=size)
+        chunk_colors = palette[codes[start:stop][inside]]
+        for channel in range(3):
+            channels[channel] += np.bincount(pixel, weights=chunk_colors[:, channel], minlength=size)
+
+    image = np.zeros((size, 4), dtype=np.float64)
+    filled = counts > 0
+    if filled.any():
+        image[filled, :3] = (channels[:, filled] / counts[filled]).T
+        # a single point still shows at a quarter opacity; the densest pixel is opaque
+        image[filled, 3] = 0.25 + 0.75 * np.log1p(counts[filled]) / np.log1p(counts.max())
+    image = (image * 255).round().astype(np.uint8).reshape(height, width, 4)
+    return image, x_range + y_range
+
+
+def mpl_density_scatter(axis, x, y, groups=None, colors: dict = None, labels: dict = None,
+                        width: int = None, height: int = None, **kwargs):
+    """
+    Draw a rasterized scatter plot on a Matplotlib axis, one image pixel per screen pixel
+    :param axis: matplotlib Axes to draw on
+    :param x: array of x values
+    :param y: array of y values
+    :param groups: pd.Series or array of category values, or None for one color
+    :param colors: dict of category value to color, default the Matplotlib color cycle
+    :param labels: dict of category value to legend label, default the value itself
+    :param width: int image width in pixels, default the axis width
+    :param height: int image height in pixels, default the axis height
+    :param kwargs: passed on to axis.imshow
+    :return: matplotlib AxesImage
+    """
+    extent = axis.get_window_extent()
+    width = width or max(1, int(extent.width))
+    height = height or max(1, int(extent.height))
+    if groups is not None and colors is None:
+        import matplotlib
+        cycle = matplotlib.rcParams['axes.prop_cycle'].by_key()['color']
+        colors = {name: cycle[i % len(cycle)] for i, name in enumerate(group_codes(groups)[1])}
+    image, bounds = rasterize(x, y, groups, colors, width, height)
+    kwargs.setdefault('interpolation', 'nearest')
+    artist = axis.imshow(image, origin='lower', extent=bounds, aspect='auto', **kwargs)
+    if groups is not None:
+        labels = labels or {}
+        for name in present_groups(groups):
+            axis.scatter([], [], color=colors[name], label=labels.get(name, name))
+    return artist
+
+
+def add_density_image(figure, x, y, groups=None, colors: dict = None, names: dict = None,
+                      width: int = 800, height: int = 600):
+    """
+    Add a rasterized scatter plot to a Plotly figure as one PNG image
+    The output size depends on the image size, not on the number of points.
+    :param figure: plotly Figure to draw on
+    :param x: array of x values
+    :param y: array of y values
+    :param groups: pd.Series or array of category values, or None for one color
+    :param colors: dict of category value to color, default Plotly's color sequence
+    :param names: dict of category value to legend name, default the value itself
+    :param width: int image width in pixels
+    :param height: int image height in pixels
+    :return: the plotly Figure
+    """
+    import base64
+    import io
+    import plotly.graph_objects as go
+    from PIL import Image
+    if groups is not None and colors is None:
+        from plotly.colors import qualitative
+        sequence = qualitative.Plotly
+        colors = {name: sequence[i % len(sequence)] for i, name in enumerate(group_codes(groups)[1])}
+    image, (x0, x1, y0, y1) = rasterize(x, y, groups, colors, width, height)
+    buffer = io.BytesIO()
+    # PNG rows run top to bottom
+    Image.fromarray(image[::-1]).save(buffer, format='png')
+    source = 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+    figure.add_layout_image(source=source, xref='x', yref='y', x=x0, y=y1, sizex=x1 - x0, sizey=y1 - y0,
+                            sizing='stretch', layer='below')
+    figure.update_xaxes(range=[x0, x1])
+    figure.update_yaxes(range=[y0, y1])
+    # invisible corner points so the axes exist, then one legend entry per group
+    figure.add_trace(go.Scatter(x=[x0, x1], y=[y0, y1], mode='markers', marker={'opacity': 0},
+                                hoverinfo='skip', showlegend=False))
+    if groups is not None:
+        names = names or {}
+        for name in present_groups(groups):
+            figure.add_trace(go.Scatter(x=[None], y=[None], mode='markers', marker={'color': colors[name]},
+                                        name=str(names.get(name, name))))
+    return figure
@@ -0,0 +1,199 @@
+"""
+League standings kept up to date one match result at a time
+
+A bump chart of a season needs the table after every round. Re-sorting the whole table
+after every result works for one league, but not for leaderboards that take results
+continuously. Standings keeps every team's totals in NumPy arrays and the table as a
+sorted list of ranking keys. A result changes two teams: their old keys are found and
+removed with a binary search and their new keys are inserted the same way, so nobody
+else is touched. snapshot() records the ranks after a round, and history() returns every
+snapshot in the long form the bump chart helpers take.
+
+For a finished season, standings_by_round() does the same work for every round at once:
+it totals the results per (round, team) with np.bincount, takes cumulative sums down the
+rounds, and ranks every round with one np.lexsort.
+
+Teams are ranked by points, then goal difference, then goals scored, then name.
+
+    table = Standings()
+    for match in results.itertuples():
+        table.add(match.home, match.away, match.home_goals, match.away_goals)
+    weekly = standings_by_round(results, period='matchweek')
+    mpl_bump(plt.gca(), weekly, 'team', 'matchweek', 'rank')
+"""
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+
+_TOTALS = ('played', 'points', 'goals_for', 'goals_against')
+_COLUMNS = ['team', 'rank', 'played', 'points', 'goal_difference', 'goals_for']
+
+
+class Standings:
+    """
+    A league table that updates with every result
+    """
+
+    def __init__(self, teams: list = (), win: int = 3, draw: int = 1):
+        """
+        :param teams: list of str team names to start the table with; other teams are added
+                      when they first play
+        :param win: int points for a win
+        :param draw: int points for a draw
+        """
+        self.win, self.draw = win, draw
+        self.teams = []
+        self._numbers = {}
+        # totals by team number; the arrays grow ahead of the number of teams
+        for name in _TOTALS:
+            setattr(self, name, np.zeros(0, dtype=np.int64))
+        # ranking keys, best first, and the current key of every team
+        self._keys = []
+        self._key_of = []
+        self._snapshots = []
+        for team in teams:
+            self._number(team)
+
+    def _number(self, team: str) -> int:
+        if team not in self._numbers:
+            number = len(self.teams)
+            self._numbers[team] = number
+            self.teams.append(team)
+            if number == len(self.points):
+                # room for twice as many teams, so adding teams one by one stays cheap
+                for name in _TOTALS:
+                    setattr(self, name, np.concatenate([getattr(self, name), np.zeros(max(16, number), np.int64)]))
+            self._key_of.append(self._make_key(number))
+            insort(self._keys, self._key_of[number])
+        return self._numbers[team]
+
+    def _make_key(self, number: int) -> tuple:
+        # sorted ascending, so the best team comes first
+        return (-int(self.points[number]), -int(self.goals_for[number] - self.goals_against[number]),
+                -int(self.goals_for[number]), self.teams[number])
+
+    def _update(self, number: int, scored: int, conceded: int) -> None:
+        del self._keys[bisect_left(self._keys, self._key_of[number])]
+        self.played[number] += 1
+        self.goals_for[number] += scored
+        self.goals_against[number] += conceded
+        self.points[number] += self.win if scored > conceded else self.draw if scored == conceded else 0
+        self._key_of[number] = self._make_key(number)
+        insort(self._keys, self._key_of[number])
+
+    def add(self, home: str, away: str, home_goals: int, away_goals: int) -> 'Standings':
+        """
+        Add one match result, moving only the two teams that played
+        :param home: str name of the home team
+        :param away: str name of the away team
+        :param home_goals: int goals scored by the home team
+        :param away_goals: int goals scored by the away team
+        :return: this Standings
+        """
+        home, away = self._number(home), self._number(away)
+        self._update(home, int(home_goals), int(away_goals))
+        self._update(away, int(away_goals), int(home_goals))
+        return self
+
+    def rank(self, team: str) -> int:
+        """
+        :param team: str team name
+        :return: int place of the team in the table, 1 for the top
+        """
+        return bisect_left(self._keys, self._key_of[self._numbers[team]]) + 1
+
+    def ranks(self) -> np.ndarray:
+        """
+        :return: np.ndarray of the place of every team, in the order of self.teams
+        """
+        ranks = np.empty(len(self._keys), dtype=np.int64)
+        ranks[[self._numbers[key[-1]] for key in self._keys]] = np.arange(1, len(self._keys) + 1)
+        return ranks
+
+    def table(self) -> pd.DataFrame:
+        """
+        :return: pd.DataFrame of the current table, top first, one row per team
+        """
+        return self._frame(self.ranks()).sort_values('rank', ignore_index=True)
+
+    def snapshot(self, round_number) -> 'Standings':
+        """
+        Record the table as it stands, e.g. at the end of a round
+        :param round_number: the round (matchweek) to file it under
+        :return: this Standings
+        """
+        self._snapshots.append((round_number, self._frame(self.ranks())))
+        return self
+
+    def history(self, period: str = 'round') -> pd.DataFrame:
+        """
+        :param period: str name of the round column
+        :return: pd.DataFrame of every snapshot: one row per round and team, with the same
+                 columns as standings_by_round()
+        """
+        if not self._snapshots:
+            return pd.DataFrame(columns=[period] + _COLUMNS)
+        frames = [frame.assign(**{period: round_number}) for round_number, frame in self._snapshots]
+        return pd.concat(frames, ignore_index=True)[[period] + _COLUMNS]
+
+    def _frame(self, ranks: np.ndarray) -> pd.DataFrame:
+        count = len(ranks)
+        return pd.DataFrame({'team': self.teams, 'rank': ranks, 'played': self.played[:count],
+                             'points': self.points[:count],
+                             'goal_difference': self.goals_for[:count] - self.goals_against[:count],
+                             'goals_for': self.goals_for[:count]})
+
+    def __len__(self) -> int:
+        return len(self.teams)
+
+    def __repr__(self) -> str:
+        return 'Standings({} teams, {} matches)'.format(len(self.teams), int(self.played.sum()) // 2)
+
+
+def standings_by_round(results: pd.DataFrame, home: str = 'home', away: str = 'away',
+                       home_goals: str = 'home_goals', away_goals: str = 'away_goals',
+                       period: str = 'round', win: int = 3, draw: int = 1) -> pd.DataFrame:
+    """
+    Work out the table after every round of a set of match results, all rounds at once
+    :param results: pd.DataFrame with one row per match
+    :param home: str name of the home team column
+    :param away: str name of the away team column
+    :param home_goals: str name of the home goals column
+    :param away_goals: str name of the away goals column
+    :param period: str name of the round (matchweek) column
+    :param win: int points for a win
+    :param draw: int points for a draw
+    :return: pd.DataFrame with one row per round and team: the `period` column, then team,
+             rank, played, points, goal_difference and goals_for
+    """
+    teams = np.unique(np.concatenate([results[home].to_numpy(dtype=object),
+                                      results[away].to_numpy(dtype=object)]).astype(str))
+    rounds = np.unique(results[period].to_numpy())
+    count = len(teams)
+    size = len(rounds) * count
+    match_round = np.searchsorted(rounds, results[period].to_numpy())
+    scored = {side: results[column].to_numpy(dtype=np.int64)
+              for side, column in ((home, home_goals), (away, away_goals))}
+    totals = {name: np.zeros(size, dtype=np.int64) for name in ('played', 'points', 'goals_for', 'goals_against')}
+    for side, other in ((home, away), (away, home)):
+        cell = match_round * count + np.searchsorted(teams, results[side].to_numpy(dtype=object).astype(str))
+        goals, against = scored[side], scored[other]
+        points = np.select([goals > against, goals == against], [win, draw], default=0)
+        totals['played'] += np.bincount(cell, minlength=size)
+        totals['points'] += np.bincount(cell, weights=points, minlength=size).astype(np.int64)
+        totals['goals_for'] += np.bincount(cell, weights=goals, minlength=size).astype(np.int64)
+        totals['goals_against'] += np.bincount(cell, weights=against, minlength=size).astype(np.int64)
+    # running totals: each round adds to everything before it
+    totals = {name: np.cumsum(values.reshape(len(rounds), count), axis=0).ravel()
+              for name, values in totals.items()}
+    goal_difference = totals['goals_for'] - totals['goals_against']
+    round_index = np.repeat(np.arange(len(rounds)), count)
+    team_index = np.tile(np.arange(count), len(rounds))
+    # teams are sorted by name, so the team number breaks the last ties
+    order = np.lexsort((team_index, -totals['goals_for'], -goal_difference, -totals['points'], round_index))
+    ranks = np.empty(size, dtype=np.int64)
+    ranks[order] = np.arange(size) % count + 1
+    return pd.DataFrame({period: rounds[round_index], 'team': teams[team_index], 'rank': ranks,
+                         'played': totals['played'], 'points': totals['points'],
+                         'goal_difference': goal_difference, 'goals_for': totals['goals_for']})
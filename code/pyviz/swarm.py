@@ -0,0 +1,162 @@
+"""
+Beeswarm layouts that stay fast for tens of thousands of points
+
+A swarm plot moves every point sideways just enough that no two markers overlap. The
+points are placed in order of their value, so a new point can only collide with the
+points placed just before it: those less than one marker diameter lower. The sorted
+values give that window for every point with one searchsorted, and the point goes to
+the offset closest to the center that clears every marker in its window. The window
+never holds more markers than fit side by side in the band, so the layout costs about
+n log n for the sort plus a small constant amount of work per point.
+
+When a category has more points than fit in its width (seaborn warns and piles them up
+at the edges), the layout falls back to a binned strip: the values are cut into rows one
+marker high and each row is spread evenly across the width, overlapping if it has to.
+
+Offsets are worked out in screen units, so the markers are round at the size they are
+drawn. The Matplotlib helper measures the axis; for Plotly, pass the plot size in pixels.
+"""
+import numpy as np
+
+# above this many points the seaborn swarm plot is replaced by swarm_offsets()
+SWARM_POINTS = 5_000
+
+
+def _binned_offsets(values: np.ndarray, diameter: float, width: float) -> np.ndarray:
+    """
+    Spread the points of each row one diameter high evenly across the width
+    """
+    order = np.argsort(values, kind='stable')
+    rows = np.floor((values[order] - values[order[0]]) / diameter).astype(np.int64)
+    starts = np.flatnonzero(np.concatenate([[True], rows[1:] != rows[:-1]]))
+    counts = np.diff(np.append(starts, len(rows)))
+    rank = np.arange(len(rows)) - np.repeat(starts, counts)
+    count = np.repeat(counts, counts)
+    # side by side where they fit, squeezed together where they don't
+    spacing = np.minimum(diameter, width / np.maximum(count, 1))
+    offsets = np.empty(len(values))
+    offsets[order] = (rank - (count - 1) / 2) * spacing
+    return offsets
+
+
+def swarm_offsets(values, diameter: float, width: float, binned: bool = None) -> np.ndarray:
+    """
+    Work out how far to move each point sideways so that no two markers overlap
+    :param values: array of values along the value axis, NaN values get offset 0
+    :param diameter: float marker diameter in value units
+    :param width: float total width available to the swarm, in value units
+    :param binned: bool use the binned strip layout, default only when the swarm doesn't fit
+    :return: np.ndarray of offsets from the center line in value units, one per value
+    """
+    values = np.asarray(values, dtype=np.float64)
+    offsets = np.zeros(len(values))
+    finite = np.flatnonzero(np.isfinite(values))
+    if not len(finite):
+        return offsets
+    values = values[finite]
+    order = np.argsort(values, kind='stable')
+    ordered = values[order]
+    # every placed point less than one diameter below each point, as a window [start, i)
+    start = np.searchsorted(ordered, ordered - diameter, side='right')
+    fits = int(width / diameter) + 1
+    if binned is None:
+        # a band one diameter high can't hold much more than two rows of markers
+        binned = (np.arange(len(ordered)) - start).max() > 2 * fits
+    if binned:
+        offsets[finite] = _binned_offsets(values, diameter, width)
+        return offsets
+    placed = np.zeros(len(ordered))
+    limit = (width + diameter) / 2
+    for i in range(1, len(ordered)):
+        low = start[i]
+        if low == i:
+            continue
+        x = placed[low:i]
+        # how far apart sideways two markers at these value distances have to be
+        reach = np.sqrt(np.maximum(diameter ** 2 - (ordered[i] - ordered[low:i]) ** 2, 0))
+        candidates = np.concatenate([[0.0], x - reach, x + reach])
+        candidates = candidates[np.argsort(np.abs(candidates), kind='stable')]
+        # a little slack, so a candidate touching the marker it was made from counts as clear
+        clear = (np.abs(candidates[:, np.newaxis] - x) >= reach * (1 - 1e-9)).all(axis=1)
+        best = candidates[clear.argmax()]
+        if abs(best) > limit:
+            # the swarm is wider than its space after all
+            offsets[finite] = _binned_offsets(values, diameter, width)
+            return offsets
+        placed[i] = best
+    offsets[finite[order]] = placed
+    return offsets
+
+
+def mpl_swarm(axis, columns: dict, size: float = 5, width: float = 0.8, colors: list = None,
+              binned: bool = None, **kwargs) -> list:
+    """
+    Draw a swarm for each column side by side on a Matplotlib axis, at x = 0, 1, 2, ...
+    The offsets are worked out for the current figure size; resizing afterwards makes
+    the markers overlap or spread a little.
+    :param axis: matplotlib Axes to draw on
+    :param columns: dict of label to array of values
+    :param size: float marker diameter in points
+    :param width: float width of each swarm in x units
+    :param colors: list of colors, one per column, default the Matplotlib color cycle
+    :param binned: bool use the binned strip layout, default only where a swarm doesn't fit
+    :param kwargs: passed on to axis.scatter
+    :return: list of matplotlib PathCollection, one per column
+    """
+    import matplotlib.pyplot as plt
+    colors = colors or plt.rcParams['axes.prop_cycle'].by_key()['color']
+    labels = list(columns)
+    values = [np.asarray(columns[label], dtype=np.float64) for label in labels]
+    low = min(np.nanmin(column) for column in values)
+    high = max(np.nanmax(column) for column in values)
+    margin = (high - low) * 0.05 or 0.5
+    axis.set_xlim(-0.5, len(labels) - 0.5)
+    axis.set_ylim(low - margin, high + margin)
+    # screen pixels per unit along each axis
+    box = axis.get_window_extent()
+    y_pixels = box.height / (high - low + 2 * margin)
+    x_pixels = box.width / len(labels)
+    diameter = size * axis.figure.dpi / 72 / y_pixels
+    collections = []
+    for i, (label, column) in enumerate(zip(labels, values)):
+        offsets = swarm_offsets(column, diameter, width * x_pixels / y_pixels, binned)
+        collections.append(axis.scatter(i + offsets * y_pixels / x_pixels, column, s=size ** 2,
+                                        color=colors[i % len(colors)], label=label, **kwargs))
+    axis.set_xticks(range(len(labels)), labels)
+    return collections
+
+
+def go_swarm_traces(columns: dict, size: float = 5, width: float = 0.8, colors: list = None,
+                    plot_width: int = 700, plot_height: int = 450, binned: bool = None,
+                    **kwargs) -> list:
+    """
+    Make a Plotly swarm trace for each column, at x = 0, 1, 2, ...
+    Put the labels on the axis with xaxis tickvals=list(range(len(columns))), ticktext=labels.
+    :param columns: dict of label to array of values
+    :param size: float marker diameter in pixels
+    :param width: float width of each swarm in x units
+    :param colors: list of colors, one per column, default Plotly's color sequence
+    :param plot_width: int width of the plotting area in pixels
+    :param plot_height: int height of the plotting area in pixels
+    :param binned: bool use the binned strip layout, default only where a swarm doesn't fit
+    :param kwargs: passed on to every trace
+    :return: list of go.Scatter, or go.Scattergl above 50,000 points in all
+    """
+    import plotly.graph_objects as go
+    from plotly.colors import qualitative
+    from pyviz.scatter import WEBGL_POINTS
+    colors = colors or qualitative.Plotly
+    labels = list(columns)
+    values = [np.asarray(columns[label], dtype=np.float64) for label in labels]
+    low = min(np.nanmin(column) for column in values)
+    high = max(np.nanmax(column) for column in values)
+    # Plotly pads the value axis by about 5% on each side
+    y_pixels = plot_height / ((high - low) * 1.1 or 1)
+    x_pixels = plot_width / len(labels)
+    trace = go.Scattergl if sum(len(column) for column in values) > WEBGL_POINTS else go.Scatter
+    traces = []
+    for i, (label, column) in enumerate(zip(labels, values)):
+        offsets = swarm_offsets(column, size / y_pixels, width * x_pixels / y_pixels, binned)
+        traces.append(trace(x=i + offsets * y_pixels / x_pixels, y=column, mode='markers', name=label,
+                            marker={'size': size, 'color': colors[i % len(colors)]}, **kwargs))
+    return traces
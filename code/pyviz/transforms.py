@@ -0,0 +1,67 @@
+"""
+Vectorized column transforms shared by the chapter scripts
+
+These replace DataFrame.apply(..., axis=1) helpers that run Python code once per row.
+Each works on whole columns with NumPy, so the cost stays flat on multi-million-row data.
+"""
+import numpy as np
+import pandas as pd
+
+MONTHS = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+
+
+def month_numbers(months) -> np.ndarray:
+    """
+    Turn a column of months into month numbers 1-12
+    Month names are only parsed once per distinct value ('Jan', 'January' and 'jan' all work),
+    then spread to every row through the categorical codes.
+    :param months: pd.Series or array of month names, or of month numbers 1-12
+    :return: np.ndarray of int month numbers, 0 where the month is missing
+    """
+    months = pd.Series(months)
+    if months.dtype.kind in 'iuf':
+        values = months.to_numpy(dtype=np.float64)
+        # NaN can't be cast to int; missing months get the same 0 as missing names
+        return np.where(np.isfinite(values), values, 0).astype(np.int64)
+    if isinstance(months.dtype, pd.CategoricalDtype):
+        codes, names = months.cat.codes.to_numpy(), months.cat.categories
+    else:
+        codes, names = pd.factorize(months)
+    lookup = np.array([MONTHS.index(str(name).strip()[:3].lower()) + 1 for name in names] + [0],
+                      dtype=np.int64)
+    # missing values have code -1, which picks the trailing 0 and becomes NaT below
+    return lookup[codes]
+
+
+def month_year_dates(months, years, days=None) -> pd.Series:
+    """
+    Build dates from separate month and year (and optionally day) columns
+    :param months: pd.Series of month names or numbers
+    :param years: pd.Series of int years
+    :param days: pd.Series of int days of the month, default the first of the month
+    :return: pd.Series of datetime64 dates, with the index of `years` when it is a Series
+    """
+    numbers = month_numbers(months)
+    year_values = np.asarray(years, dtype=np.int64)
+    dates = ((year_values - 1970) * 12 + numbers - 1).astype('datetime64[M]').astype('datetime64[ns]')
+    dates[numbers == 0] = np.datetime64('NaT')
+    if days is not None:
+        dates = dates + (np.asarray(days, dtype=np.int64) - 1).astype('timedelta64[D]')
+    return pd.Series(dates, index=years.index if isinstance(years, pd.Series) else None)
+
+
+def add_month_year_dates(dataframe: pd.DataFrame, month: str = 'month', year: str = 'year',
+                         column: str = 'date') -> pd.DataFrame:
+    """
+    Add a date column built from the month and year columns, unless it is already there
+    The column is computed once and kept on the frame, so every chart that needs dates
+    (and every later call) reuses it.
+    :param dataframe: pd.DataFrame with month and year columns
+    :param month: str name of the month column
+    :param year: str name of the year column
+    :param column: str name of the date column to add
+    :return: the same pd.DataFrame, with the date column
+    """
+    if column not in dataframe.columns:
+        dataframe[column] = month_year_dates(dataframe[month], dataframe[year])
+    return dataframe
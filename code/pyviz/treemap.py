@@ -0,0 +1,91 @@
+"""
+Treemap nodes worked out ahead of time, with the smallest leaves folded together
+
+A treemap of a table with a hierarchy (category > subcategory > product) needs a node
+for every level, each with its total. treemap_nodes() gets the leaf totals with one
+groupby, then sums each level up from the level below it, which is much smaller than
+the table. The result is one row per node with the ids, parents and values Plotly's
+treemap takes directly, with branchvalues='total'.
+
+A treemap with hundreds of thousands of leaves freezes the browser, and most of those
+leaves are far too small to see anyway. Nodes smaller than `min_share` of the whole
+are folded into one "Other" node under their parent.
+
+    nodes = treemap_nodes(sales, ['category', 'product'], 'revenue', root='All', min_share=1e-4)
+    fig = go.Figure(go_treemap(nodes))
+"""
+import numpy as np
+import pandas as pd
+
+# above this many leaves, the chapters fold away nodes smaller than MIN_SHARE
+TREEMAP_LEAVES = 5_000
+# a node with 1/10,000 of a 700 x 450 pixel treemap is about 5 x 5 pixels
+MIN_SHARE = 1e-4
+
+
+def _join(frame: pd.DataFrame, keys: list, prefix: str = None) -> pd.Series:
+    """
+    Make node ids by joining the path columns with '/'
+    """
+    ids = frame[keys[0]].astype(str)
+    for key in keys[1:]:
+        ids = ids + '/' + frame[key].astype(str)
+    return prefix + '/' + ids if prefix else ids
+
+
+def treemap_nodes(dataframe: pd.DataFrame, path: list, value: str, root: str = None,
+                  min_share: float = 0.0, other: str = 'Other') -> pd.DataFrame:
+    """
+    Total a value over every level of a hierarchy, from the leaves up
+    :param dataframe: pd.DataFrame with one column per level of the hierarchy and a value column
+    :param path: list of str column names, from the top level down to the leaves
+    :param value: str name of the column to total
+    :param root: str label of a node holding everything, or None for no root node
+    :param min_share: float fold nodes with less than this share of the total into an
+                      `other` node under their parent; 0 keeps every node
+    :param other: str label of the folded nodes
+    :return: pd.DataFrame with one row per node: id, parent ('' at the top), label, value,
+             depth (0 for the root or the top level)
+    """
+    depth0 = 1 if root else 0
+    totals = dataframe.groupby(path, sort=False, observed=True)[value].sum().reset_index()
+    levels = []
+    for depth in range(len(path), 0, -1):
+        keys = path[:depth]
+        if depth < len(path):
+            # each level is the sum of the level below it, not another pass over the table
+            totals = totals.groupby(keys, sort=False, observed=True)[value].sum().reset_index()
+        parents = _join(totals, keys[:-1], root) if depth > 1 else pd.Series(root or '', index=totals.index)
+        levels.append(pd.DataFrame({'id': _join(totals, keys, root), 'parent': parents,
+                                    'label': totals[keys[-1]].astype(str),
+                                    'value': totals[value], 'depth': depth - 1 + depth0}))
+    total = totals[value].sum()
+    if root:
+        levels.append(pd.DataFrame({'id': [root], 'parent': [''], 'label': [root],
+                                    'value': [total], 'depth': [0]}))
+    nodes = pd.concat(levels[::-1], ignore_index=True)
+    if min_share <= 0:
+        return nodes
+    small = nodes['value'] < min_share * total
+    if root:
+        # the root is the only node without a parent
+        small &= nodes['parent'] != ''
+    parent_kept = nodes['parent'].isin(set(nodes.loc[~small, 'id']) | {''})
+    # small nodes right under a kept node fold into its "Other"; anything below them goes
+    folded = nodes[small & parent_kept].groupby('parent', sort=False).agg(
+        value=('value', 'sum'), depth=('depth', 'first')).reset_index()
+    folded['id'] = np.where(folded['parent'] == '', other, folded['parent'] + '/' + other)
+    folded['label'] = other
+    return pd.concat([nodes[~small], folded[nodes.columns]], ignore_index=True)
+
+
+def go_treemap(nodes: pd.DataFrame, **kwargs):
+    """
+    Make a Plotly treemap trace of treemap_nodes()
+    :param nodes: pd.DataFrame from treemap_nodes()
+    :param kwargs: passed on to go.Treemap
+    :return: go.Treemap
+    """
+    import plotly.graph_objects as go
+    return go.Treemap(ids=nodes['id'], parents=nodes['parent'], labels=nodes['label'],
+                      values=nodes['value'], branchvalues='total', **kwargs)